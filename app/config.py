@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from functools import lru_cache
-from typing import Optional
+from typing import List, Optional
 
 from pydantic import Field
 from pydantic_settings import BaseSettings
@@ -16,12 +16,145 @@ class Settings(BaseSettings):
         default="gemini-2.0-flash-exp",
         description="Gemini model to use. Options: gemini-2.0-flash-exp, gemini-1.5-pro, gemini-1.5-flash",
     )
+    gemini_fallback_models: List[str] = Field(
+        default_factory=list,
+        description="Ordered cheaper/faster models tried after gemini_model, as a JSON list",
+    )
+    hedge_enabled: bool = Field(
+        default=True, description="Start a fallback model when the primary exceeds its p95"
+    )
+    hedge_delay_seconds: float = Field(
+        default=5.0, gt=0, description="Hedging delay used until enough latency samples exist"
+    )
+    circuit_failure_threshold: int = Field(
+        default=5, ge=1, description="Consecutive failures that open a model's circuit"
+    )
+    circuit_reset_seconds: float = Field(
+        default=30.0, gt=0, description="Seconds before an open circuit admits a trial call"
+    )
     default_horizon_days: int = Field(default=21, ge=1, description="Fallback planning horizon")
     enable_mock_mode: bool = Field(
         default=False,
         alias="SMART_TASK_PLANNER_MOCK",
         description="Use mock planner when true or when API key missing.",
     )
+    llm_provider: str = Field(
+        default="gemini",
+        description="Provider registered in app.llm.registry.PROVIDER_FACTORIES. Options: gemini, mock",
+    )
+    llm_warmup: bool = Field(
+        default=False, description="Open model client connections at startup, before the first request"
+    )
+    llm_max_concurrency: int = Field(
+        default=8, ge=1, description="Maximum concurrent LLM calls per provider in each worker"
+    )
+    llm_timeout_seconds: float = Field(default=60.0, gt=0, description="Per-call LLM timeout")
+    llm_max_retries: int = Field(
+        default=2, ge=0, description="Retries when a response cannot be decoded or repaired"
+    )
+    llm_retry_base_delay_seconds: float = Field(
+        default=0.5, ge=0, description="Base delay for jittered exponential retry backoff"
+    )
+    llm_retry_budget_ratio: float = Field(
+        default=0.2, ge=0, description="Retries allowed per call, averaged over time"
+    )
+    prompt_variant: str = Field(
+        default="full", description="Prompt template variant. Options: full, compact"
+    )
+    llm_max_output_tokens: int = Field(
+        default=8192, ge=256, description="Upper bound for the per-request max_output_tokens"
+    )
+    batch_max_concurrency: int = Field(
+        default=8, ge=1, description="Plans generated in parallel for one batch request"
+    )
+    batch_max_items: int = Field(default=500, ge=1, description="Largest accepted batch")
+    plan_store_backend: str = Field(
+        default="sqlite", description="Where generated plans are persisted. Options: none, sqlite"
+    )
+    plan_store_path: str = Field(default="plan_store.sqlite3", description="File used by the sqlite store")
+    plan_store_queue_size: int = Field(
+        default=1000, ge=1, description="Pending plan writes held before new ones are dropped"
+    )
+    job_workers: int = Field(default=4, ge=1, description="Background workers running plan jobs")
+    job_queue_size: int = Field(
+        default=100, ge=1, description="Queued plan jobs accepted before POST /plan/jobs returns 429"
+    )
+    job_retention: int = Field(default=1000, ge=1, description="Finished plan jobs kept for polling")
+    job_webhook_timeout_seconds: float = Field(
+        default=10.0, gt=0, description="Timeout for delivering a job completion webhook"
+    )
+    job_webhook_allowed_hosts: List[str] = Field(
+        default_factory=lambda: ["localhost", "127.0.0.1"],
+        description="Hosts that job callback URLs may point at",
+    )
+    rate_limit_backend: str = Field(
+        default="memory",
+        description="Per-client rate limit backend. Options: none, memory, sqlite (shared by workers)",
+    )
+    rate_limit_per_minute: float = Field(
+        default=60.0, gt=0, description="Sustained plan requests per minute per API key or IP"
+    )
+    rate_limit_burst: int = Field(default=20, ge=1, description="Plan requests a client may burst")
+    rate_limit_batch_plans_per_minute: float = Field(
+        default=500.0,
+        gt=0,
+        description="Sustained distinct batch plans per minute per API key or IP, in a bucket separate "
+        "from single plans; a client may burst one full batch of batch_max_items",
+    )
+    rate_limit_api_keys: List[str] = Field(
+        default_factory=list,
+        description="API keys (X-API-Key) that get their own rate-limit bucket, as a JSON list; "
+        "requests with any other key are limited by client IP",
+    )
+    rate_limit_path: str = Field(default="rate_limit.sqlite3", description="File used by the sqlite backend")
+    admission_max_concurrency: int = Field(
+        default=16, ge=1, description="Plan generations served at once across all clients"
+    )
+    admission_queue_size: int = Field(
+        default=32, ge=0, description="Requests allowed to wait for a slot before shedding with 503"
+    )
+    admission_queue_timeout_seconds: float = Field(
+        default=2.0, ge=0, description="Longest a request waits for a slot before shedding"
+    )
+    metrics_enabled: bool = Field(
+        default=True, description="Record per-stage timings and serve them on /metrics"
+    )
+    response_compression_min_bytes: int = Field(
+        default=4096, ge=0, description="Compress plan responses at least this large when the client accepts it"
+    )
+    plan_cache_backend: str = Field(
+        default="memory",
+        description="Plan cache backend in front of the LLM call. Options: none, memory, sqlite",
+    )
+    plan_cache_ttl_seconds: int = Field(default=3600, ge=0, description="Seconds a cached plan stays fresh")
+    plan_cache_max_entries: int = Field(default=1024, ge=1, description="Upper bound on cached plans")
+    similar_goal_backend: str = Field(
+        default="none",
+        description="Near-duplicate goal index used to reuse earlier plans. Options: none, memory. "
+        "Durations are ignored when matching, so a reused plan only keeps its task lengths",
+    )
+    similar_goal_threshold: float = Field(
+        default=0.8, gt=0, le=1, description="Minimum estimated similarity for reusing a plan"
+    )
+    similar_goal_max_entries: int = Field(default=1000, ge=1, description="Goals kept in the index")
+    plan_cache_path: str = Field(default="plan_cache.sqlite3", description="File used by the sqlite cache")
+    link_check_mode: str = Field(
+        default="none",
+        description="Verify task reference_links after generation. Options: none, flag, drop",
+    )
+    link_check_budget_seconds: float = Field(
+        default=1.0, gt=0, description="Longest a plan response waits for link verdicts"
+    )
+    link_check_timeout_seconds: float = Field(default=3.0, gt=0, description="Per-link request timeout")
+    link_check_max_concurrency: int = Field(default=20, ge=1, description="Links checked at once")
+    link_check_per_host: int = Field(default=4, ge=1, description="Links checked at once on one host")
+    link_check_cache_ttl_seconds: int = Field(
+        default=3600, ge=0, description="Seconds a link's alive or dead verdict is reused"
+    )
+    link_check_cache_max_entries: int = Field(default=10_000, ge=1, description="Link verdicts kept")
+    link_check_allow_private: bool = Field(
+        default=False, description="Also fetch links on localhost and private network addresses"
+    )
 
     class Config:
         env_file = ".env"
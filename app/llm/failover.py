@@ -0,0 +1,242 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from typing import Any, AsyncIterator, Deque, Dict, Iterator, Optional, Sequence
+
+from app.llm.provider import LLMProvider
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ModelStats:
+    calls: int = 0
+    failures: int = 0
+    hedges_fired: int = 0
+    hedge_wins: int = 0
+    circuit_open: bool = False
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class CircuitBreaker:
+    """Opens after consecutive failures and lets one trial call through after a cool-down."""
+
+    def __init__(self, failure_threshold: int, reset_seconds: float) -> None:
+        self._threshold = failure_threshold
+        self._reset = reset_seconds
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None
+
+    def allow(self) -> bool:
+        if self._opened_at is None:
+            return True
+        # Half-open: re-arm the timer so only one trial is admitted per cool-down.
+        if time.monotonic() - self._opened_at >= self._reset:
+            self._opened_at = time.monotonic()
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._opened_at = None
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self._failures >= self._threshold:
+            self._opened_at = time.monotonic()
+
+
+class LatencyWindow:
+    """Recent successful call latencies, used to pick the hedging delay."""
+
+    def __init__(self, size: int = 100, min_samples: int = 10) -> None:
+        self._samples: Deque[float] = deque(maxlen=size)
+        self._min_samples = min_samples
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def p95(self) -> Optional[float]:
+        if len(self._samples) < self._min_samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+
+class FailoverPlanner(LLMProvider):
+    """Composite provider over an ordered pool of models.
+
+    Models are tried in order, skipping any whose circuit is open. When hedging is
+    enabled and the current model has not answered within its observed p95 latency
+    (or ``hedge_delay_seconds`` until enough samples exist), the next model is started
+    in parallel and the first valid response wins; the losers are cancelled.
+    """
+
+    def __init__(
+        self,
+        providers: Sequence[LLMProvider],
+        hedge: bool = True,
+        hedge_delay_seconds: float = 5.0,
+        failure_threshold: int = 5,
+        reset_seconds: float = 30.0,
+    ) -> None:
+        if not providers:
+            raise ValueError("FailoverPlanner needs at least one provider")
+        self._providers = list(providers)
+        self._hedge = hedge
+        self._hedge_delay = hedge_delay_seconds
+        self._breakers = {
+            p.name(): CircuitBreaker(failure_threshold, reset_seconds) for p in self._providers
+        }
+        self._latency = {p.name(): LatencyWindow() for p in self._providers}
+        self._stats = {p.name(): ModelStats() for p in self._providers}
+
+    async def generate_plan(
+        self, prompt: str, schema: Dict[str, Any], max_output_tokens: Optional[int] = None
+    ) -> Dict[str, Any]:
+        candidates = self._candidates()
+        pending: Dict[asyncio.Task, LLMProvider] = {}
+        hedged_tasks = set()
+        last_error: Optional[BaseException] = None
+        exhausted = False
+
+        def launch(hedged: bool) -> Optional[LLMProvider]:
+            nonlocal exhausted
+            provider = next(candidates, None)
+            if provider is None:
+                exhausted = True
+                return None
+            stats = self._stats[provider.name()]
+            stats.calls += 1
+            task = asyncio.ensure_future(self._timed_call(provider, prompt, schema, max_output_tokens))
+            pending[task] = provider
+            if hedged:
+                stats.hedges_fired += 1
+                hedged_tasks.add(task)
+            return provider
+
+        current = launch(hedged=False)
+        try:
+            while pending:
+                timeout = None if exhausted else self._hedge_after(current)
+                done, _ = await asyncio.wait(
+                    pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    hedge = launch(hedged=True)
+                    if hedge is not None:
+                        current = hedge
+                        logger.info(f"Hedging slow call with model {current.name()}")
+                    continue
+                for task in done:
+                    provider = pending.pop(task)
+                    error = task.exception()
+                    if error is None:
+                        if task in hedged_tasks:
+                            self._stats[provider.name()].hedge_wins += 1
+                        return task.result()
+                    last_error = error
+                    logger.warning(f"Model {provider.name()} failed: {error}")
+                if not pending and not exhausted:
+                    current = launch(hedged=False) or current
+        finally:
+            for task in pending:
+                task.cancel()
+
+        raise ValueError(f"All models failed; last error: {last_error}")
+
+    async def stream_plan(
+        self, prompt: str, schema: Dict[str, Any], max_output_tokens: Optional[int] = None
+    ) -> AsyncIterator[str]:
+        # Streams fail over only before the first chunk; hedging would duplicate output.
+        last_error: Optional[BaseException] = None
+        for provider in self._candidates():
+            breaker = self._breakers[provider.name()]
+            self._stats[provider.name()].calls += 1
+            emitted = False
+            try:
+                async for chunk in provider.stream_plan(
+                    prompt, schema, max_output_tokens=max_output_tokens
+                ):
+                    emitted = True
+                    yield chunk
+            except Exception as e:
+                breaker.record_failure()
+                self._stats[provider.name()].failures += 1
+                if emitted:
+                    raise
+                last_error = e
+                logger.warning(f"Model {provider.name()} failed: {e}")
+                continue
+            breaker.record_success()
+            return
+        raise ValueError(f"All models failed; last error: {last_error}")
+
+    def name(self) -> str:
+        return self._providers[0].name()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        for model, breaker in self._breakers.items():
+            self._stats[model].circuit_open = breaker.is_open
+        return {model: stats.as_dict() for model, stats in self._stats.items()}
+
+    async def aclose(self) -> None:
+        for provider in self._providers:
+            await provider.aclose()
+
+    def _candidates(self) -> Iterator[LLMProvider]:
+        """Yield models in order, consulting each breaker only when its model is next.
+
+        Asking up front would spend a half-open breaker's single trial on a model that
+        is never called.
+        """
+
+        launched = False
+        for provider in self._providers:
+            if self._breakers[provider.name()].allow():
+                launched = True
+                yield provider
+        if not launched:
+            # With every circuit open, still try the pool rather than failing outright.
+            yield from self._providers
+
+    def _hedge_after(self, provider: LLMProvider) -> Optional[float]:
+        if not self._hedge:
+            return None
+        observed = self._latency[provider.name()].p95()
+        return observed if observed is not None else self._hedge_delay
+
+    async def _timed_call(
+        self,
+        provider: LLMProvider,
+        prompt: str,
+        schema: Dict[str, Any],
+        max_output_tokens: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        started = time.perf_counter()
+        breaker = self._breakers[provider.name()]
+        try:
+            result = await provider.generate_plan(
+                prompt, schema, max_output_tokens=max_output_tokens
+            )
+            if not isinstance(result, (dict, list)):
+                raise ValueError(f"Model {provider.name()} returned {type(result).__name__}")
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            breaker.record_failure()
+            self._stats[provider.name()].failures += 1
+            raise
+        breaker.record_success()
+        self._latency[provider.name()].record(time.perf_counter() - started)
+        return result
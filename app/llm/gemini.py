@@ -1,45 +1,248 @@
 from __future__ import annotations
 
 import asyncio
-import json
-from typing import Any, Dict, Optional
+import logging
+import random
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, AsyncIterator, Dict, Optional
 
 import google.generativeai as genai
 
+from app.config import Settings
 from app.llm.provider import LLMProvider
+from app.utils.metrics import (
+    JSON_FAILURES,
+    JSON_RECOVERED,
+    LLM_QUEUE_WAIT,
+    LLM_RETRIES,
+    LLM_TOKENS,
+    stage,
+)
+from app.utils.stream_parser import decode_plan
+
+logger = logging.getLogger(__name__)
+
+# Used when the caller does not size the response itself.
+DEFAULT_MAX_OUTPUT_TOKENS = 2048
+
+
+@dataclass
+class ConcurrencyStats:
+    """Queue-wait accounting for calls gated by the concurrency semaphore.
+
+    Exported per model on /metrics as ``plan_llm_*`` gauges; the wait distribution is
+    the ``plan_llm_queue_wait_seconds`` histogram.
+    """
+
+    calls: int = 0
+    in_flight: int = 0
+    timeouts: int = 0
+    recovered: int = 0
+    retried: int = 0
+    prompt_tokens: int = 0
+    output_tokens: int = 0
+    total_wait_seconds: float = 0.0
+    max_wait_seconds: float = 0.0
+
+    def record_wait(self, seconds: float) -> None:
+        self.calls += 1
+        self.total_wait_seconds += seconds
+        self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+
+    def as_dict(self) -> Dict[str, float]:
+        return asdict(self)
+
+
+class RetryBudget:
+    """Token bucket that caps retries to a fraction of calls.
+
+    Each call deposits ``ratio`` tokens and each retry spends one, so a failing model
+    cannot multiply traffic beyond ``1 + ratio`` once the initial reserve is used up.
+    """
+
+    def __init__(self, ratio: float = 0.2, reserve: float = 10.0) -> None:
+        self._ratio = ratio
+        self._reserve = reserve
+        self._tokens = reserve
+
+    def record_call(self) -> None:
+        self._tokens = min(self._reserve, self._tokens + self._ratio)
+
+    def try_spend(self) -> bool:
+        if self._tokens >= 1.0:
+            self._tokens -= 1.0
+            return True
+        return False
 
 
 class GeminiPlanner(LLMProvider):
-    """Gemini implementation that asks the model for structured task plans."""
+    """Gemini implementation that asks the model for structured task plans.
+
+    Calls go through the SDK's native async API and are bounded by a per-provider
+    semaphore, so LLM concurrency is tuned independently of the default thread pool.
+    """
 
     def __init__(
         self,
         api_key: str,
         model: str = "gemini-2.0-flash-exp",
         temperature: float = 0.4,
+        max_concurrency: int = 8,
+        timeout_seconds: float = 60.0,
+        max_retries: int = 2,
+        retry_base_delay_seconds: float = 0.5,
+        retry_budget_ratio: float = 0.2,
     ) -> None:
         genai.configure(api_key=api_key)
         self._model_name = model
         self._temperature = temperature
         self._model = genai.GenerativeModel(model)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._timeout = timeout_seconds
+        self._max_retries = max_retries
+        self._retry_base_delay = retry_base_delay_seconds
+        self._retry_budget = RetryBudget(retry_budget_ratio)
+        self.stats = ConcurrencyStats()
+
+    async def generate_plan(
+        self, prompt: str, schema: Dict[str, Any], max_output_tokens: Optional[int] = None
+    ) -> Dict[str, Any]:
+        attempt = 0
+        while True:
+            self._retry_budget.record_call()
+            response = await self._generate(prompt, self._generation_config(max_output_tokens))
+            self._record_usage(response)
+            with stage("decode"):
+                decoded = decode_plan(_response_text(response))
+            if decoded is not None:
+                if decoded.recovered:
+                    self.stats.recovered += 1
+                    JSON_RECOVERED.inc()
+                return decoded.plan
+
+            JSON_FAILURES.inc()
+            if attempt >= self._max_retries or not self._retry_budget.try_spend():
+                raise ValueError("Gemini response was not valid JSON.")
+            attempt += 1
+            self.stats.retried += 1
+            LLM_RETRIES.inc()
+            # Full jitter keeps synchronized clients from retrying in lockstep.
+            await asyncio.sleep(random.uniform(0, self._retry_base_delay * 2 ** (attempt - 1)))
+
+    async def stream_plan(
+        self, prompt: str, schema: Dict[str, Any], max_output_tokens: Optional[int] = None
+    ) -> AsyncIterator[str]:
+        queued_at = time.perf_counter()
+        async with self._semaphore:
+            self._record_wait(time.perf_counter() - queued_at)
+            self.stats.in_flight += 1
+            try:
+                response = await asyncio.wait_for(
+                    self._model.generate_content_async(
+                        prompt,
+                        generation_config=self._generation_config(max_output_tokens),
+                        stream=True,
+                    ),
+                    timeout=self._timeout,
+                )
+                chunks = response.__aiter__()
+                chunk = None
+                while True:
+                    # The timeout bounds the gap between chunks rather than the whole stream.
+                    try:
+                        chunk = await asyncio.wait_for(chunks.__anext__(), timeout=self._timeout)
+                    except StopAsyncIteration:
+                        break
+                    text = getattr(chunk, "text", "")
+                    if text:
+                        yield text
+                # Usage totals arrive with the final chunk.
+                if chunk is not None:
+                    self._record_usage(chunk)
+            except asyncio.TimeoutError as exc:
+                self.stats.timeouts += 1
+                raise TimeoutError(
+                    f"Gemini stream stalled for more than {self._timeout:g}s"
+                ) from exc
+            finally:
+                self.stats.in_flight -= 1
 
-    async def generate_plan(self, prompt: str, schema: Dict[str, Any]) -> Dict[str, Any]:
-        generation_config = {
+    def _generation_config(self, max_output_tokens: Optional[int] = None) -> Dict[str, Any]:
+        return {
             "temperature": self._temperature,
             "response_mime_type": "application/json",
-            "max_output_tokens": 2048,
+            "max_output_tokens": max_output_tokens or DEFAULT_MAX_OUTPUT_TOKENS,
         }
 
-        loop = asyncio.get_event_loop()
-        response = await loop.run_in_executor(
-            None,
-            lambda: self._model.generate_content(prompt, generation_config=generation_config),
+    def _record_wait(self, seconds: float) -> None:
+        self.stats.record_wait(seconds)
+        LLM_QUEUE_WAIT.labels(self._model_name).observe(seconds)
+
+    def _record_usage(self, response: Any) -> None:
+        usage = getattr(response, "usage_metadata", None)
+        if usage is None:
+            return
+        prompt_tokens = getattr(usage, "prompt_token_count", 0) or 0
+        output_tokens = getattr(usage, "candidates_token_count", 0) or 0
+        self.stats.prompt_tokens += prompt_tokens
+        self.stats.output_tokens += output_tokens
+        LLM_TOKENS.labels("prompt").inc(prompt_tokens)
+        LLM_TOKENS.labels("output").inc(output_tokens)
+        logger.info(
+            f"Gemini {self._model_name} usage: {prompt_tokens} prompt + "
+            f"{output_tokens} output tokens"
         )
 
+    async def _generate(self, prompt: str, generation_config: Dict[str, Any]) -> Any:
+        queued_at = time.perf_counter()
+        async with self._semaphore:
+            self._record_wait(time.perf_counter() - queued_at)
+            self.stats.in_flight += 1
+            try:
+                return await asyncio.wait_for(
+                    self._model.generate_content_async(
+                        prompt, generation_config=generation_config
+                    ),
+                    timeout=self._timeout,
+                )
+            except asyncio.TimeoutError as exc:
+                self.stats.timeouts += 1
+                raise TimeoutError(
+                    f"Gemini call exceeded {self._timeout:g}s timeout"
+                ) from exc
+            finally:
+                self.stats.in_flight -= 1
+
+    async def warm_up(self) -> None:
+        # A token count is the cheapest call that opens the async channel.
+        started = time.perf_counter()
         try:
-            return json.loads(response.text)
-        except (json.JSONDecodeError, AttributeError) as exc:
-            raise ValueError("Gemini response was not valid JSON.") from exc
+            await asyncio.wait_for(self._model.count_tokens_async("warm-up"), timeout=self._timeout)
+        except Exception as e:
+            logger.warning(f"Gemini {self._model_name} warm-up failed: {e}")
+            return
+        logger.info(f"Gemini {self._model_name} warmed up in {time.perf_counter() - started:.2f}s")
 
     def name(self) -> str:
         return self._model_name
+
+
+def build_gemini_planner(settings: Settings, model: str) -> GeminiPlanner:
+    return GeminiPlanner(
+        api_key=settings.gemini_api_key,
+        model=model,
+        max_concurrency=settings.llm_max_concurrency,
+        timeout_seconds=settings.llm_timeout_seconds,
+        max_retries=settings.llm_max_retries,
+        retry_base_delay_seconds=settings.llm_retry_base_delay_seconds,
+        retry_budget_ratio=settings.llm_retry_budget_ratio,
+    )
+
+
+def _response_text(response: Any) -> str:
+    # ``.text`` raises ValueError when the candidate was blocked or is empty.
+    try:
+        return response.text or ""
+    except (AttributeError, ValueError):
+        return ""
@@ -0,0 +1,174 @@
+"""
+Prompt templates with precompiled instruction prefixes, plus token budgeting.
+
+Each template splits into a static prefix, built once at import, and a short
+per-request block. Keeping the instructions first and byte-identical across requests
+also lets providers with prefix caching reuse them.
+"""
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+
+# Rough ratio for English prose and JSON; close enough to budget without a tokenizer.
+CHARS_PER_TOKEN = 4
+# Output cost of one task object with description and reference links, and of the
+# metadata block and JSON framing around the task list.
+OUTPUT_TOKENS_PER_TASK = 160
+OUTPUT_OVERHEAD_TOKENS = 200
+OUTPUT_HEADROOM = 1.25
+MIN_OUTPUT_TOKENS = 512
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count of ``text``."""
+
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def task_range(task_count: Optional[int], horizon_days: int) -> Tuple[int, int]:
+    """Number of tasks to ask for: the explicit count, else scaled with the horizon."""
+
+    if task_count:
+        return task_count, task_count
+    upper = min(15, max(5, math.ceil(horizon_days / 3)))
+    return max(3, upper // 2), upper
+
+
+def output_token_budget(max_tasks: int, ceiling: int) -> int:
+    """``max_output_tokens`` large enough for ``max_tasks`` tasks, capped at ``ceiling``."""
+
+    needed = (OUTPUT_OVERHEAD_TOKENS + OUTPUT_TOKENS_PER_TASK * max_tasks) * OUTPUT_HEADROOM
+    return max(MIN_OUTPUT_TOKENS, min(ceiling, math.ceil(needed)))
+
+
+@dataclass(frozen=True)
+class PromptTemplate:
+    """A static instruction prefix followed by a ``str.format`` request block."""
+
+    name: str
+    prefix: str
+    request: str
+    prefix_tokens: int = field(init=False)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "prefix_tokens", estimate_tokens(self.prefix))
+
+    def render(self, **fields: object) -> str:
+        return self.prefix + self.request.format(**fields)
+
+
+PLAN_TEMPLATES: Dict[str, PromptTemplate] = {
+    "full": PromptTemplate(
+        name="full",
+        prefix="""You are an expert execution strategist AI. Break down the goal given at the end into a realistic, dependency-aware action plan.
+
+Return ONLY valid JSON with this exact structure:
+{
+  "metadata": {
+    "planning_strategy": "brief description of your planning approach",
+    "assumptions": ["assumption 1", "assumption 2"]
+  },
+  "tasks": [
+    {
+      "id": "T1",
+      "title": "Task title",
+      "description": "Detailed description",
+      "owner": "Role (optional)",
+      "start_date": "2025-10-13",
+      "due_date": "2025-10-15",
+      "duration_days": 2,
+      "depends_on": [],
+      "confidence": 0.85,
+      "reference_links": ["https://example.com/tutorial1", "https://example.com/docs"]
+    }
+  ]
+}
+
+Requirements:
+- Use ISO format (YYYY-MM-DD) for all dates
+- Task IDs must be unique (T1, T2, T3, etc.)
+- Dependencies must reference valid task IDs that come before
+- Confidence is a float between 0.0 and 1.0
+- Ensure logical task ordering and realistic timelines
+- For each task, provide 1-3 helpful reference_links to tutorials, documentation, guides, or tools that would help someone complete that task
+- Reference links should be real, publicly accessible URLs (documentation sites, tutorial sites, tool websites, etc.)
+- Prioritize official documentation, popular tutorials, and widely-used resources
+""",
+        request="""
+Goal: {goal}
+{target_clause}
+Assume a planning horizon of {horizon_days} days.
+{guidance_clause}
+Include {min_tasks}-{max_tasks} meaningful tasks that cover the complete goal.""",
+    ),
+    "compact": PromptTemplate(
+        name="compact",
+        prefix="""Plan the goal below as dependency-aware tasks. Reply with JSON only:
+{"metadata":{"planning_strategy":str,"assumptions":[str]},"tasks":[{"id":"T1","title":str,"description":str,"owner":str,"start_date":"YYYY-MM-DD","due_date":"YYYY-MM-DD","duration_days":int,"depends_on":["T0"],"confidence":0.0-1.0,"reference_links":[url]}]}
+Unique ids T1..Tn; depends_on only earlier ids; 1-2 real documentation or tutorial links per task.
+""",
+        request="""Goal: {goal}
+{target_clause}
+Horizon: {horizon_days} days. {guidance_clause}
+Tasks: {min_tasks}-{max_tasks}.""",
+    ),
+}
+
+REPLAN_TEMPLATES: Dict[str, PromptTemplate] = {
+    "full": PromptTemplate(
+        name="full",
+        prefix="""You are an expert execution strategist AI. Revise part of an existing action plan to satisfy a new constraint.
+
+Return ONLY valid JSON with this exact structure, containing the replacement tasks only:
+{
+  "tasks": [
+    {
+      "id": "T1",
+      "title": "Task title",
+      "description": "Detailed description",
+      "owner": "Role (optional)",
+      "duration_days": 2,
+      "depends_on": [],
+      "confidence": 0.85,
+      "reference_links": ["https://example.com/docs"]
+    }
+  ]
+}
+
+Requirements:
+- Keep an existing task ID when revising that task; use new unique IDs for added tasks
+- Never reuse the ID of a task that stays as it is
+- Dependencies may reference any kept task or any replacement task
+- Confidence is a float between 0.0 and 1.0
+""",
+        request="""
+Goal: {goal}
+New constraint: {constraint}
+
+Tasks that stay as they are (they may be used as dependencies):
+{context_json}
+
+Tasks to revise:
+{affected_json}""",
+    ),
+    "compact": PromptTemplate(
+        name="compact",
+        prefix="""Revise the listed tasks of a plan to satisfy a new constraint. Reply with JSON only, replacement tasks only:
+{"tasks":[{"id":"T1","title":str,"description":str,"owner":str,"duration_days":int,"depends_on":[id],"confidence":0.0-1.0,"reference_links":[url]}]}
+Keep ids of revised tasks; new ids for added tasks; never reuse a kept task's id; depends_on may use kept or replacement ids.
+""",
+        request="""Goal: {goal}
+Constraint: {constraint}
+Kept: {context_json}
+Revise: {affected_json}""",
+    ),
+}
+
+
+def get_template(templates: Dict[str, PromptTemplate], variant: str) -> PromptTemplate:
+    try:
+        return templates[variant.lower()]
+    except KeyError:
+        raise ValueError(f"Unknown prompt variant '{variant}'") from None
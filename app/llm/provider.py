@@ -1,25 +1,65 @@
 from __future__ import annotations
 
 import abc
-from typing import Any, Dict, List, Optional
+import json
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from app.config import Settings
 
 
 class LLMProvider(abc.ABC):
     """Abstract base class for large language model integrations."""
 
     @abc.abstractmethod
-    async def generate_plan(self, prompt: str, schema: Dict[str, Any]) -> Dict[str, Any]:
-        """Return structured plan data following the supplied schema."""
+    async def generate_plan(
+        self, prompt: str, schema: Dict[str, Any], max_output_tokens: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Return structured plan data following the supplied schema.
+
+        ``max_output_tokens`` caps the response length; ``None`` uses the provider default.
+        """
+
+    async def stream_plan(
+        self, prompt: str, schema: Dict[str, Any], max_output_tokens: Optional[int] = None
+    ) -> AsyncIterator[str]:
+        """Yield the raw JSON plan document in text chunks as the model produces it.
+
+        Providers without native streaming emit the whole document as one chunk.
+        """
+
+        yield json.dumps(
+            await self.generate_plan(prompt, schema, max_output_tokens=max_output_tokens)
+        )
 
     @abc.abstractmethod
     def name(self) -> str:
         """Human-friendly provider label."""
 
+    async def warm_up(self) -> None:
+        """Open client connections ahead of the first request; a no-op by default."""
+
+    async def aclose(self) -> None:
+        """Release any client resources held by the provider."""
+
 
 class MockPlanner(LLMProvider):
     """Deterministic fallback planner used when no API key is available."""
 
-    async def generate_plan(self, prompt: str, schema: Dict[str, Any]) -> Dict[str, Any]:
+    stream_chunk_size = 48
+
+    async def generate_plan(
+        self, prompt: str, schema: Dict[str, Any], max_output_tokens: Optional[int] = None
+    ) -> Dict[str, Any]:
+        return self._plan()
+
+    async def stream_plan(
+        self, prompt: str, schema: Dict[str, Any], max_output_tokens: Optional[int] = None
+    ) -> AsyncIterator[str]:
+        document = json.dumps(self._plan())
+        for offset in range(0, len(document), self.stream_chunk_size):
+            yield document[offset : offset + self.stream_chunk_size]
+
+    def _plan(self) -> Dict[str, Any]:
         return {
             "metadata": {
                 "planning_strategy": "rule-based prototype",
@@ -54,3 +94,7 @@ class MockPlanner(LLMProvider):
 
     def name(self) -> str:
         return "mock-planner"
+
+
+def build_mock_planner(settings: Settings, model: str) -> MockPlanner:
+    return MockPlanner()
@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import asyncio
+import importlib
+import logging
+from typing import Callable, Dict, List, Optional
+
+from app.config import Settings, get_settings
+from app.llm.failover import FailoverPlanner
+from app.llm.provider import LLMProvider
+
+logger = logging.getLogger(__name__)
+
+ProviderFactory = Callable[[Settings, str], LLMProvider]
+
+# Factories by ``Settings.llm_provider`` name, as "module:callable". The module is only
+# imported when that provider is built, so SDKs a deployment never calls are never loaded.
+PROVIDER_FACTORIES: Dict[str, str] = {
+    "gemini": "app.llm.gemini:build_gemini_planner",
+    "mock": "app.llm.provider:build_mock_planner",
+}
+
+
+def register_provider(name: str, target: str) -> None:
+    """Make ``target`` ("module:callable") available as ``Settings.llm_provider=name``."""
+
+    PROVIDER_FACTORIES[name.lower()] = target
+
+
+def load_factory(name: str) -> ProviderFactory:
+    try:
+        target = PROVIDER_FACTORIES[name.lower()]
+    except KeyError:
+        raise ValueError(f"Unknown LLM provider '{name}'") from None
+    module_name, _, attribute = target.partition(":")
+    return getattr(importlib.import_module(module_name), attribute)
+
+
+class ProviderRegistry:
+    """Holds one long-lived provider instance per configured model.
+
+    Providers are built once (normally at application startup) and shared by every
+    request. ``reload`` builds a fresh set from new settings and swaps it in atomically,
+    so workers pick up configuration changes without restarting.
+    """
+
+    def __init__(self, settings: Optional[Settings] = None) -> None:
+        self._settings = settings or get_settings()
+        self._providers: Dict[str, LLMProvider] = {}
+        self._default: Optional[LLMProvider] = None
+
+    @property
+    def settings(self) -> Settings:
+        return self._settings
+
+    def start(self) -> None:
+        """Build providers for the current settings if not already built."""
+
+        if not self._providers:
+            self._providers, self._default = self._build(self._settings)
+
+    def default(self) -> LLMProvider:
+        """Return the provider for the primary model, failing over to fallbacks if any."""
+
+        self.start()
+        return self._default
+
+    def get(self, model: str) -> LLMProvider:
+        """Return the shared provider for ``model``."""
+
+        self.start()
+        try:
+            return self._providers[model]
+        except KeyError as exc:
+            raise KeyError(f"No provider configured for model '{model}'") from exc
+
+    def names(self) -> List[str]:
+        self.start()
+        return list(self._providers)
+
+    def provider_stats(self) -> Dict[str, Dict[str, float]]:
+        """Per-model concurrency, timeout and token counters for providers that keep them."""
+
+        stats = {}
+        for model, provider in self._providers.items():
+            counters = getattr(provider, "stats", None)
+            if hasattr(counters, "as_dict"):
+                stats[model] = counters.as_dict()
+        return stats
+
+    def failover_stats(self) -> Optional[Dict[str, Dict[str, object]]]:
+        """Per-model hedging and circuit state, when the default provider fails over."""
+
+        if isinstance(self._default, FailoverPlanner):
+            return self._default.stats()
+        return None
+
+    async def reload(self, settings: Settings) -> None:
+        """Swap in providers built from ``settings`` and close the previous ones."""
+
+        providers, default = self._build(settings)
+        previous = self._providers
+        self._settings = settings
+        self._providers, self._default = providers, default
+        logger.info(f"Provider registry reloaded with models: {list(providers)}")
+        await self._close_all(previous)
+
+    async def warm_up(self) -> None:
+        """Open every provider's client connection ahead of the first request."""
+
+        self.start()
+        await asyncio.gather(*(provider.warm_up() for provider in self._providers.values()))
+
+    async def aclose(self) -> None:
+        previous = self._providers
+        self._providers, self._default = {}, None
+        await self._close_all(previous)
+
+    @staticmethod
+    def _build(settings: Settings) -> tuple[Dict[str, LLMProvider], LLMProvider]:
+        name = settings.llm_provider.lower()
+        if settings.enable_mock_mode or (name == "gemini" and not settings.gemini_api_key):
+            name = "mock"
+        factory = load_factory(name)
+        if name == "mock":
+            mock = factory(settings, settings.gemini_model)
+            return {mock.name(): mock}, mock
+
+        providers = {model: factory(settings, model) for model in configured_models(settings)}
+        if len(providers) == 1:
+            return providers, providers[settings.gemini_model]
+        return providers, FailoverPlanner(
+            list(providers.values()),
+            hedge=settings.hedge_enabled,
+            hedge_delay_seconds=settings.hedge_delay_seconds,
+            failure_threshold=settings.circuit_failure_threshold,
+            reset_seconds=settings.circuit_reset_seconds,
+        )
+
+    @staticmethod
+    async def _close_all(providers: Dict[str, LLMProvider]) -> None:
+        for provider in providers.values():
+            try:
+                await provider.aclose()
+            except Exception as e:
+                logger.warning(f"Failed to close provider {provider.name()}: {e}")
+
+
+def configured_models(settings: Settings) -> List[str]:
+    """Return the ordered, de-duplicated list of models the deployment uses."""
+
+    return list(dict.fromkeys([settings.gemini_model, *settings.gemini_fallback_models]))
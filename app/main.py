@@ -1,24 +1,177 @@
 from __future__ import annotations
 
+import asyncio
+import json
 import logging
-from fastapi import Depends, FastAPI, HTTPException, status
+import signal
+import time
+from contextlib import asynccontextmanager
+from datetime import date, datetime, timezone
+from typing import AsyncIterator, Optional
+
+from fastapi import Depends, FastAPI, HTTPException, Query, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from pydantic import BaseModel
 
 from app.config import get_settings
-from app.schemas import PlanRequest, PlanResponse
+from app.llm.registry import ProviderRegistry
+from app.schemas import (
+    PlanBatchRequest,
+    PlanBatchResponse,
+    PlanJob,
+    PlanJobRequest,
+    PlanRequest,
+    PlanResponse,
+    PlanSummaryItem,
+    PortfolioRequest,
+    PortfolioResponse,
+    ReplanRequest,
+)
+from app.services.admission import AdmissionMiddleware, Rejected, build_admission, client_key
+from app.services.job_queue import JobQueue, JobQueueFull
+from app.services.link_checker import build_link_checker
+from app.services.plan_cache import build_plan_cache
 from app.services.plan_service import PlanService
+from app.services.portfolio import schedule_portfolio
+from app.services.plan_store import (
+    PlanStore,
+    PlanStoreWriter,
+    build_plan_store,
+    decode_cursor,
+    encode_cursor,
+    goal_fingerprint,
+)
+from app.services.similar_goals import build_goal_index
+from app.utils.encoding import UnsupportedFormat, compress, encode, negotiate_format
+from app.utils.metrics import (
+    REGISTRY,
+    RESPONSE_BYTES,
+    STARTUP,
+    stage,
+    start_request_timings,
+)
+from app.utils.validation import ValidationError
 
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 )
+logger = logging.getLogger(__name__)
+
+
+async def reload_providers(app: FastAPI) -> None:
+    """Re-read settings and swap the shared providers without restarting the worker.
+
+    Triggered by SIGHUP (``kill -HUP <worker pid>``). Only the providers are rebuilt;
+    caches, stores and limits keep the settings they started with.
+    """
+
+    get_settings.cache_clear()
+    try:
+        await app.state.registry.reload(get_settings())
+    except Exception as e:
+        logger.error(f"Provider reload failed, keeping the current providers: {e}")
+
+
+def _install_reload_handler(app: FastAPI) -> bool:
+    loop = asyncio.get_running_loop()
+    reloads = set()
+
+    def on_hangup() -> None:
+        task = asyncio.ensure_future(reload_providers(app))
+        reloads.add(task)
+        task.add_done_callback(reloads.discard)
+
+    try:
+        loop.add_signal_handler(signal.SIGHUP, on_hangup)
+    except (AttributeError, NotImplementedError, RuntimeError, ValueError):
+        # No SIGHUP on Windows, and signal handlers need the main thread.
+        logger.info("SIGHUP provider reload is unavailable in this process")
+        return False
+    return True
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    # Providers are built once per worker and shared by every request.
+    started = time.perf_counter()
+    settings = get_settings()
+    registry = ProviderRegistry(settings)
+    registry.start()
+    STARTUP.provider_build_seconds = time.perf_counter() - started
+    if settings.llm_warmup:
+        warmup_started = time.perf_counter()
+        await registry.warm_up()
+        STARTUP.warmup_seconds = time.perf_counter() - warmup_started
+    cache = build_plan_cache(settings)
+    store = build_plan_store(settings)
+    writer = None
+    if store is not None:
+        writer = PlanStoreWriter(store, max_queue=settings.plan_store_queue_size)
+        writer.start()
+    app.state.registry = registry
+    app.state.plan_store = store
+    links = build_link_checker(settings)
+    app.state.service = PlanService(
+        registry=registry,
+        cache=cache,
+        store=writer,
+        similar=build_goal_index(settings),
+        links=links,
+    )
+    jobs = JobQueue(
+        app.state.service,
+        workers=settings.job_workers,
+        max_queue=settings.job_queue_size,
+        max_jobs=settings.job_retention,
+        webhook_timeout_seconds=settings.job_webhook_timeout_seconds,
+        webhook_allowed_hosts=settings.job_webhook_allowed_hosts,
+    )
+    jobs.start()
+    app.state.jobs = jobs
+    admission = build_admission(settings)
+    app.state.admission = admission
+    REGISTRY.enabled = settings.metrics_enabled
+    REGISTRY.add_collector("plan_llm", registry.provider_stats, label="model")
+    REGISTRY.add_collector("plan_failover", registry.failover_stats, label="model")
+    REGISTRY.add_collector("plan_cache", app.state.service.cache_stats)
+    REGISTRY.add_collector("plan_coalescing", app.state.service.coalescing_stats)
+    REGISTRY.add_collector("plan_similarity", app.state.service.similarity_stats)
+    REGISTRY.add_collector("plan_links", app.state.service.link_stats)
+    REGISTRY.add_collector("plan_jobs", lambda: jobs.stats.as_dict())
+    REGISTRY.add_collector("plan_admission", lambda: admission.stats.as_dict())
+    REGISTRY.add_collector("plan_startup", STARTUP.as_dict)
+    reload_on_hangup = _install_reload_handler(app)
+    STARTUP.startup_seconds = time.perf_counter() - started
+    logger.info(f"Startup finished in {STARTUP.startup_seconds:.3f}s")
+    try:
+        yield
+    finally:
+        if reload_on_hangup:
+            asyncio.get_running_loop().remove_signal_handler(signal.SIGHUP)
+        await jobs.stop()
+        admission.close()
+        app.state.admission = None
+        await registry.aclose()
+        if links is not None:
+            await links.aclose()
+        if cache is not None:
+            cache.close()
+        if writer is not None:
+            await writer.stop()
+
 
 app = FastAPI(
     title="Smart Task Planner API",
     description="AI-powered task planning service that breaks down goals into actionable plans",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
+# Added first so CORS headers also reach rejected requests.
+app.add_middleware(AdmissionMiddleware)
+
 # Enable CORS for frontend integration
 app.add_middleware(
     CORSMiddleware,
@@ -29,29 +182,304 @@ app.add_middleware(
 )
 
 
-def get_service() -> PlanService:
-    settings = get_settings()
-    return PlanService()
+@app.middleware("http")
+async def record_stage_timings(request: Request, call_next):
+    # The first request pays for lazy imports and connection setup; track it apart.
+    first_started = time.perf_counter() if STARTUP.first_request_seconds is None else None
+    if not REGISTRY.enabled:
+        response = await call_next(request)
+    else:
+        timings = start_request_timings()
+        response = await call_next(request)
+        if timings.stages:
+            response.headers["Server-Timing"] = timings.header()
+    if first_started is not None:
+        STARTUP.first_request_seconds = time.perf_counter() - first_started
+    return response
+
+
+@app.exception_handler(Rejected)
+async def rejected_handler(request: Request, exc: Rejected) -> JSONResponse:
+    # Endpoints that admit their own work, such as /plan/batch, raise this directly.
+    headers = {"Retry-After": str(exc.retry_after)} if exc.retry_after is not None else None
+    return JSONResponse({"detail": exc.detail}, status_code=exc.status_code, headers=headers)
+
+
+def get_service(request: Request) -> PlanService:
+    return request.app.state.service
+
+
+def model_response(model: BaseModel) -> Response:
+    # Returning a Response skips FastAPI's dump-and-revalidate pass over response_model.
+    return Response(content=model.model_dump_json(), media_type="application/json")
+
+
+def encoded_response(
+    model: BaseModel,
+    request: Request,
+    fmt: Optional[str] = None,
+    default: str = "json",
+) -> Response:
+    """Encode ``model`` in the negotiated format, compressing large bodies."""
+
+    try:
+        name = negotiate_format(request.headers.get("accept"), fmt, default)
+        with stage("encode"):
+            body, media_type = encode(model, name)
+            body, content_encoding = compress(
+                body,
+                request.headers.get("accept-encoding"),
+                get_settings().response_compression_min_bytes,
+            )
+    except UnsupportedFormat as exc:
+        raise HTTPException(status_code=status.HTTP_406_NOT_ACCEPTABLE, detail=str(exc)) from exc
+    if REGISTRY.enabled:
+        RESPONSE_BYTES.labels(name, content_encoding or "identity").observe(len(body))
+    headers = {"Vary": "Accept, Accept-Encoding"}
+    if content_encoding:
+        headers["Content-Encoding"] = content_encoding
+    return Response(content=body, media_type=media_type, headers=headers)
 
 
 @app.post("/plan", response_model=PlanResponse, summary="Generate an execution plan")
 async def create_plan(
     payload: PlanRequest,
+    request: Request,
+    format: Optional[str] = Query(default=None, description="json, orjson, msgpack or csv"),
     service: PlanService = Depends(get_service),
-) -> PlanResponse:
+) -> Response:
     try:
-        return await service.generate(payload)
+        plan = await service.generate(payload)
     except ValueError as exc:
         raise HTTPException(
             status_code=status.HTTP_502_BAD_GATEWAY,
             detail=str(exc),
         ) from exc
+    return encoded_response(plan, request, format)
+
+
+@app.post(
+    "/plan/batch",
+    response_model=PlanBatchResponse,
+    summary="Generate several plans with bounded parallelism",
+)
+async def create_plan_batch(
+    payload: PlanBatchRequest,
+    request: Request,
+    service: PlanService = Depends(get_service),
+) -> Response:
+    limit = get_settings().batch_max_items
+    if len(payload.requests) > limit:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Batch exceeds the limit of {limit} requests",
+        )
+    # A batch costs one batch rate-limit token per distinct plan, matching the
+    # duplicates generate_batch collapses, and one concurrency slot per plan.
+    admission = request.app.state.admission
+    slot = None
+    if admission is not None:
+        key = client_key(dict(request.headers), request.client, admission.api_key_hashes)
+        distinct = len({item.model_dump_json() for item in payload.requests})
+        await admission.check_rate(key, cost=distinct, batch=True)
+        slot = admission.slot
+    return model_response(await service.generate_batch(payload.requests, slot=slot))
+
+
+@app.post(
+    "/plan/replan",
+    response_model=PlanResponse,
+    summary="Patch an existing plan with a new deadline, completed tasks or a constraint",
+)
+async def replan(
+    payload: ReplanRequest,
+    service: PlanService = Depends(get_service),
+) -> Response:
+    try:
+        return model_response(await service.replan(payload))
+    except ValidationError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(exc),
+        ) from exc
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail=str(exc),
+        ) from exc
+
+
+@app.post(
+    "/plan/portfolio",
+    response_model=PortfolioResponse,
+    summary="Schedule several plans together and report where they compete for owners",
+)
+async def plan_portfolio(payload: PortfolioRequest, request: Request) -> Response:
+    try:
+        # Large portfolios take a while to schedule; keep the event loop free meanwhile.
+        portfolio = await asyncio.to_thread(
+            schedule_portfolio, payload, date.today(), get_settings().default_horizon_days
+        )
+    except ValidationError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(exc),
+        ) from exc
+    return encoded_response(portfolio, request)
+
+
+def get_jobs(request: Request) -> JobQueue:
+    return request.app.state.jobs
+
+
+@app.post(
+    "/plan/jobs",
+    response_model=PlanJob,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Queue a plan for background generation",
+)
+async def submit_plan_job(
+    payload: PlanJobRequest,
+    jobs: JobQueue = Depends(get_jobs),
+) -> Response:
+    try:
+        job = jobs.submit(payload)
+    except JobQueueFull as exc:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(exc),
+            headers={"Retry-After": str(exc.retry_after)},
+        ) from exc
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(exc),
+        ) from exc
+    response = model_response(job)
+    response.status_code = status.HTTP_202_ACCEPTED
+    response.headers["Location"] = f"/plan/jobs/{job.job_id}"
+    return response
+
+
+@app.get("/plan/jobs/{job_id}", response_model=PlanJob, summary="Poll a background plan job")
+async def get_plan_job(job_id: str, jobs: JobQueue = Depends(get_jobs)) -> Response:
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return model_response(job)
+
+
+@app.delete("/plan/jobs/{job_id}", response_model=PlanJob, summary="Cancel a background plan job")
+async def cancel_plan_job(job_id: str, jobs: JobQueue = Depends(get_jobs)) -> Response:
+    job = jobs.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return model_response(job)
+
+
+@app.post("/plan/stream", summary="Stream an execution plan as NDJSON frames")
+async def stream_plan(
+    payload: PlanRequest,
+    service: PlanService = Depends(get_service),
+) -> StreamingResponse:
+    async def frames():
+        try:
+            async for frame in service.generate_stream(payload):
+                yield json.dumps(frame) + "\n"
+        except ValueError as exc:
+            yield json.dumps({"type": "error", "detail": str(exc)}) + "\n"
+
+    return StreamingResponse(frames(), media_type="application/x-ndjson")
+
+
+def get_plan_store(request: Request) -> PlanStore:
+    store = request.app.state.plan_store
+    if store is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Plan storage is disabled",
+        )
+    return store
+
+
+@app.get("/plans/{plan_id}", response_model=PlanResponse, summary="Fetch a stored plan")
+async def get_plan(
+    plan_id: str,
+    request: Request,
+    format: Optional[str] = Query(default=None, description="json, orjson, msgpack or csv"),
+    store: PlanStore = Depends(get_plan_store),
+) -> Response:
+    stored = await asyncio.to_thread(store.get, plan_id)
+    if stored is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Plan not found")
+    return encoded_response(stored.plan, request, format)
+
+
+@app.get("/plans/{plan_id}/export", summary="Export a stored plan, as a CSV task table by default")
+async def export_plan(
+    plan_id: str,
+    request: Request,
+    format: str = Query(default="csv", description="csv, json, orjson or msgpack"),
+    store: PlanStore = Depends(get_plan_store),
+) -> Response:
+    stored = await asyncio.to_thread(store.get, plan_id)
+    if stored is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Plan not found")
+    response = encoded_response(stored.plan, request, format)
+    extension = "json" if format.lower() == "orjson" else format.lower()
+    response.headers["Content-Disposition"] = f'attachment; filename="{plan_id}.{extension}"'
+    return response
+
+
+@app.get("/plans", summary="List stored plans, newest first")
+async def list_plans(
+    limit: int = Query(default=20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    goal: Optional[str] = Query(default=None, description="Only plans for this goal"),
+    task_id: Optional[str] = Query(default=None, description="Only plans containing this task"),
+    store: PlanStore = Depends(get_plan_store),
+) -> StreamingResponse:
+    if cursor:
+        try:
+            decode_cursor(cursor)
+        except ValueError as exc:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    rows = store.iter_summaries(
+        limit,
+        cursor=cursor,
+        goal_fingerprint=goal_fingerprint(goal) if goal else None,
+        task_id=task_id,
+    )
+
+    # A sync generator runs in the threadpool, so SQLite reads never block the event loop.
+    def body():
+        yield '{"items": ['
+        last = None
+        count = 0
+        for row in rows:
+            item = PlanSummaryItem(
+                plan_id=row.plan_id,
+                goal=row.goal,
+                created_at=datetime.fromtimestamp(row.created_at, tz=timezone.utc),
+                task_count=row.task_count,
+            )
+            yield ("," if count else "") + item.model_dump_json()
+            last = row
+            count += 1
+        next_cursor = encode_cursor(last.created_at, last.plan_id) if count == limit else None
+        yield f'], "next_cursor": {json.dumps(next_cursor)}}}'
+
+    return StreamingResponse(body(), media_type="application/json")
+
+
+@app.get("/metrics", response_class=PlainTextResponse, summary="Prometheus metrics")
+async def metrics() -> PlainTextResponse:
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
 
 
 @app.get("/health", summary="Simple service health check")
-async def health() -> dict[str, str]:
+async def health(service: PlanService = Depends(get_service)) -> dict[str, str]:
     settings = get_settings()
-    service = PlanService()
     return {
         "status": "ok",
         "provider": service.provider_name(),
@@ -1,9 +1,9 @@
 from __future__ import annotations
 
-from datetime import date
-from typing import List, Optional
+from datetime import date, datetime
+from typing import Dict, List, Literal, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, TypeAdapter
 
 
 class Task(BaseModel):
@@ -33,13 +33,38 @@ class Task(BaseModel):
     )
 
 
+# Validates a whole ``tasks`` array in a single pydantic-core call.
+TASK_LIST_ADAPTER = TypeAdapter(List[Task])
+
+
 class PlanMetadata(BaseModel):
     """Exposes reasoning metadata returned by the LLM."""
 
     goal: str
+    plan_id: Optional[str] = Field(default=None, description="Identifier for GET /plans/{plan_id}")
     planning_strategy: Optional[str] = None
     assumptions: List[str] = Field(default_factory=list)
     horizon_days: Optional[int] = None
+    critical_path: List[str] = Field(
+        default_factory=list,
+        description="Task IDs on the longest dependency chain, in execution order",
+    )
+    makespan_days: Optional[int] = Field(
+        default=None, description="Days from the first task start to the last task finish"
+    )
+    owner_utilization: Dict[str, float] = Field(
+        default_factory=dict,
+        description="Share of each capacity-limited owner's available task-days in use",
+    )
+    similarity: Optional[float] = Field(
+        default=None,
+        description="Similarity to the earlier goal whose plan was reused and rescheduled; "
+        "unset when the plan was generated for this request",
+    )
+    dead_links: List[str] = Field(
+        default_factory=list,
+        description="Reference links found dead by link verification; removed from tasks in drop mode",
+    )
 
 
 class PlanRequest(BaseModel):
@@ -58,6 +83,17 @@ class PlanRequest(BaseModel):
         default=None,
         description="Additional context such as resources, constraints, or priorities.",
     )
+    task_count: Optional[int] = Field(
+        default=None,
+        ge=1,
+        le=50,
+        description="Preferred number of tasks. Defaults to a range scaled with the horizon.",
+    )
+    owner_capacity: Optional[Dict[str, int]] = Field(
+        default=None,
+        description="Maximum concurrent tasks per owner role, e.g. {\"Engineer\": 2}. "
+        "Enables resource-levelled scheduling.",
+    )
 
 
 class PlanResponse(BaseModel):
@@ -65,3 +101,146 @@ class PlanResponse(BaseModel):
 
     metadata: PlanMetadata
     tasks: List[Task]
+
+
+class ReplanRequest(BaseModel):
+    """An existing plan plus the changes to apply to it."""
+
+    plan: PlanResponse = Field(..., description="Plan previously returned by the service")
+    target_date: Optional[date] = Field(
+        default=None, description="New absolute deadline. Overrides horizon_days when set."
+    )
+    horizon_days: Optional[int] = Field(
+        default=None, ge=1, description="New relative planning window"
+    )
+    completed_task_ids: List[str] = Field(
+        default_factory=list, description="Tasks already done; kept as-is and not rescheduled"
+    )
+    constraint: Optional[str] = Field(
+        default=None,
+        description="New requirement that changes plan structure; triggers an LLM call.",
+    )
+    affected_task_ids: List[str] = Field(
+        default_factory=list,
+        description="Tasks the constraint touches. They and their dependents are regenerated; "
+        "when empty every open task is.",
+    )
+    owner_capacity: Optional[Dict[str, int]] = Field(
+        default=None, description="Maximum concurrent tasks per owner role"
+    )
+
+
+class PlanBatchRequest(BaseModel):
+    """Several plan requests processed in one call."""
+
+    requests: List[PlanRequest] = Field(..., min_length=1, description="Plans to generate")
+
+
+class PlanBatchItem(BaseModel):
+    """Outcome of one request within a batch."""
+
+    index: int = Field(..., description="Position of the request in the batch")
+    plan: Optional[PlanResponse] = None
+    error: Optional[str] = None
+    elapsed_ms: float = Field(..., description="Time spent producing this item")
+
+
+class PlanBatchResponse(BaseModel):
+    """Per-item results plus timing for the whole batch."""
+
+    results: List[PlanBatchItem]
+    wall_time_ms: float = Field(..., description="Elapsed time for the whole batch")
+    summed_item_time_ms: float = Field(
+        ..., description="Sum of per-item times; the ratio to wall time is the parallel speedup"
+    )
+
+
+class PlanSummaryItem(BaseModel):
+    """One row of the plan listing."""
+
+    plan_id: str
+    goal: str
+    created_at: datetime
+    task_count: int
+
+
+class PlanJobRequest(PlanRequest):
+    """Plan request run in the background, optionally with a completion callback."""
+
+    callback_url: Optional[str] = Field(
+        default=None,
+        description="URL that receives the finished job as a JSON POST. "
+        "Only hosts listed in JOB_WEBHOOK_ALLOWED_HOSTS are accepted.",
+    )
+
+
+class PlanJob(BaseModel):
+    """State of a background plan job."""
+
+    job_id: str
+    status: Literal["queued", "running", "succeeded", "failed", "cancelled"]
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    deduplicated: bool = Field(
+        default=False, description="True when an identical queued or finished job was reused"
+    )
+    result: Optional[PlanResponse] = None
+    error: Optional[str] = None
+
+
+class PortfolioPlan(BaseModel):
+    """One plan in a portfolio, with the namespace its task ids are prefixed with."""
+
+    key: str = Field(
+        ..., pattern=r"^[A-Za-z0-9_-]+$", description="Namespace, e.g. 'mobile' -> 'mobile:T1'"
+    )
+    plan: PlanResponse
+
+
+class PortfolioRequest(BaseModel):
+    """Several plans to schedule together against shared owners."""
+
+    plans: List[PortfolioPlan] = Field(..., min_length=1)
+    cross_plan_dependencies: Dict[str, List[str]] = Field(
+        default_factory=dict,
+        description="Extra prerequisites by namespaced task id, e.g. {\"web:T4\": [\"api:T2\"]}",
+    )
+    start_date: Optional[date] = Field(default=None, description="Portfolio start; defaults to today")
+    horizon_days: Optional[int] = Field(
+        default=None, ge=1, description="Window shared by tasks without a duration"
+    )
+    owner_capacity: Optional[Dict[str, int]] = Field(
+        default=None,
+        description="Maximum concurrent tasks per owner across all plans. When omitted, "
+        "schedules are unconstrained and overlaps between plans are reported as conflicts.",
+    )
+
+
+class PortfolioConflict(BaseModel):
+    """Days on which plans compete for the same owner beyond its capacity."""
+
+    owner: str
+    start_date: date
+    end_date: date
+    plans: List[str]
+    task_ids: List[str]
+
+
+class PortfolioMetadata(BaseModel):
+    plans: List[str]
+    horizon_days: int
+    critical_path: List[str] = Field(default_factory=list)
+    makespan_days: Optional[int] = None
+    owner_utilization: Dict[str, float] = Field(default_factory=dict)
+    plan_finish: Dict[str, date] = Field(
+        default_factory=dict, description="Last due date of each plan in the shared schedule"
+    )
+    conflicts: List[PortfolioConflict] = Field(default_factory=list)
+
+
+class PortfolioResponse(BaseModel):
+    """The merged schedule; task ids are namespaced as '<key>:<id>'."""
+
+    metadata: PortfolioMetadata
+    tasks: List[Task]
@@ -0,0 +1,321 @@
+"""
+Admission control for plan generation: per-client token buckets, a global concurrency
+cap and a short bounded wait queue that sheds load with ``Retry-After`` hints.
+"""
+from __future__ import annotations
+
+import abc
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass
+from typing import AsyncIterator, Collection, Dict, FrozenSet, Optional, Tuple
+
+from app.config import Settings
+
+logger = logging.getLogger(__name__)
+
+# Endpoints that start one LLM generation. Job submission is rate limited, but the
+# work itself is bounded by the job worker pool rather than the concurrency cap.
+# /plan/batch is admitted by its endpoint, which charges one token and takes one
+# slot per item.
+GENERATION_PATHS = frozenset({"/plan", "/plan/stream", "/plan/replan"})
+RATE_LIMITED_PATHS = GENERATION_PATHS | {"/plan/jobs"}
+
+
+class Rejected(Exception):
+    """Raised when a request is refused; ``retry_after`` is a wait hint in seconds.
+
+    ``retry_after`` is ``None`` when retrying the same request cannot succeed.
+    """
+
+    def __init__(self, status_code: int, detail: str, retry_after: Optional[float]) -> None:
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = max(1, math.ceil(retry_after)) if retry_after is not None else None
+
+
+@dataclass
+class AdmissionStats:
+    admitted: int = 0
+    rate_limited: int = 0
+    shed_queue_full: int = 0
+    shed_timeout: int = 0
+    in_flight: int = 0
+    waiting: int = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return asdict(self)
+
+
+class RateLimiter(abc.ABC):
+    """Token bucket per client key: ``burst`` tokens, refilled at ``rate`` per second."""
+
+    # Backends whose acquire can block on I/O run it off the event loop.
+    blocking = False
+
+    def __init__(self, rate_per_second: float, burst: int) -> None:
+        self.rate = rate_per_second
+        self.burst = burst
+
+    @abc.abstractmethod
+    def acquire(self, key: str, cost: float = 1.0) -> float:
+        """Take ``cost`` tokens for ``key``; return 0 on success, else seconds until they free up."""
+
+    def close(self) -> None:
+        """Release backend resources."""
+
+    def _take(self, tokens: float, updated: float, now: float, cost: float) -> Tuple[float, float]:
+        """Refill then spend from a bucket; returns ``(tokens_left, wait_seconds)``."""
+
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        if tokens >= cost:
+            return tokens - cost, 0.0
+        return tokens, (cost - tokens) / self.rate
+
+
+class MemoryRateLimiter(RateLimiter):
+    """Per-process buckets, LRU-bounded to ``max_keys`` clients."""
+
+    def __init__(self, rate_per_second: float, burst: int, max_keys: int = 10_000) -> None:
+        super().__init__(rate_per_second, burst)
+        self._max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    def acquire(self, key: str, cost: float = 1.0) -> float:
+        now = time.monotonic()
+        tokens, updated = self._buckets.pop(key, (float(self.burst), now))
+        tokens, wait = self._take(tokens, updated, now, cost)
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self._max_keys:
+            self._buckets.popitem(last=False)
+        return wait
+
+
+class SQLiteRateLimiter(RateLimiter):
+    """Buckets in a SQLite file, shared by every worker process on the host."""
+
+    blocking = True
+
+    def __init__(self, path: str, rate_per_second: float, burst: int) -> None:
+        super().__init__(rate_per_second, burst)
+        self._conn = sqlite3.connect(path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS rate_buckets ("
+                "key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+            )
+
+    def acquire(self, key: str, cost: float = 1.0) -> float:
+        # Wall-clock time, since buckets are compared across processes.
+        now = time.time()
+        with self._lock:
+            # IMMEDIATE takes the write lock up front so concurrent workers serialize.
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT tokens, updated FROM rate_buckets WHERE key = ?", (key,)
+                ).fetchone()
+                tokens, updated = row if row is not None else (float(self.burst), now)
+                tokens, wait = self._take(tokens, updated, now, cost)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO rate_buckets (key, tokens, updated) VALUES (?, ?, ?)",
+                    (key, tokens, now),
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return wait
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class AdmissionController:
+    """Cap concurrent generations and queue at most ``max_queue`` more, briefly.
+
+    Requests beyond the queue, or still queued after ``queue_timeout_seconds``, are
+    shed at once so latency stays bounded under overload. Batches are charged to
+    ``batch_limiter``, a separate bucket per client sized for one full batch, so a
+    batch neither exceeds the single-plan burst nor drains it.
+    """
+
+    def __init__(
+        self,
+        limiter: Optional[RateLimiter],
+        batch_limiter: Optional[RateLimiter] = None,
+        max_concurrency: int = 16,
+        max_queue: int = 32,
+        queue_timeout_seconds: float = 2.0,
+        api_keys: Collection[str] = (),
+    ) -> None:
+        self.limiter = limiter
+        self.batch_limiter = batch_limiter
+        self.api_key_hashes = frozenset(_hash_key(key) for key in api_keys)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._max_concurrency = max_concurrency
+        self._max_queue = max_queue
+        self._queue_timeout = queue_timeout_seconds
+        self._avg_seconds = 0.0
+        self.stats = AdmissionStats()
+
+    async def check_rate(self, client_key: str, cost: int = 1, batch: bool = False) -> None:
+        """Charge ``cost`` plans to the client's plan or batch bucket or raise ``Rejected``."""
+
+        limiter = self.batch_limiter if batch else self.limiter
+        if limiter is None:
+            return
+        if batch:
+            client_key = f"batch:{client_key}"
+        # A bucket never holds more than ``burst`` tokens, so a larger charge could never pass.
+        cost = min(cost, limiter.burst)
+        if limiter.blocking:
+            # Waits up to the busy timeout while another worker holds the write lock.
+            wait = await asyncio.to_thread(limiter.acquire, client_key, cost)
+        else:
+            wait = limiter.acquire(client_key, cost)
+        if wait > 0:
+            self.stats.rate_limited += 1
+            raise Rejected(429, "Rate limit exceeded", wait)
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        if self._semaphore.locked():
+            if self.stats.waiting >= self._max_queue:
+                self.stats.shed_queue_full += 1
+                raise Rejected(503, "Planner is at capacity", self._estimated_wait())
+            self.stats.waiting += 1
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), timeout=self._queue_timeout)
+            except asyncio.TimeoutError:
+                self.stats.shed_timeout += 1
+                raise Rejected(503, "Planner is at capacity", self._estimated_wait()) from None
+            finally:
+                self.stats.waiting -= 1
+        else:
+            await self._semaphore.acquire()
+
+        self.stats.admitted += 1
+        self.stats.in_flight += 1
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stats.in_flight -= 1
+            self._semaphore.release()
+            elapsed = time.perf_counter() - started
+            self._avg_seconds = elapsed if not self._avg_seconds else 0.9 * self._avg_seconds + 0.1 * elapsed
+
+    def close(self) -> None:
+        for limiter in (self.limiter, self.batch_limiter):
+            if limiter is not None:
+                limiter.close()
+
+    def _estimated_wait(self) -> float:
+        return (self._avg_seconds or 1.0) * (self.stats.waiting + 1) / self._max_concurrency
+
+
+def _hash_key(api_key: str) -> str:
+    return hashlib.sha256(api_key.encode()).hexdigest()[:32]
+
+
+def client_key(
+    headers: Dict[str, str],
+    client: Optional[Tuple[str, int]],
+    api_key_hashes: FrozenSet[str] = frozenset(),
+) -> str:
+    """Rate-limit key: a known API key when one is sent, else the client address.
+
+    Unknown keys fall back to the address, so rotating made-up keys does not buy a
+    fresh bucket per request.
+    """
+
+    api_key = headers.get("x-api-key")
+    if api_key:
+        hashed = _hash_key(api_key)
+        if hashed in api_key_hashes:
+            return "key:" + hashed
+    return "ip:" + (client[0] if client else "unknown")
+
+
+class AdmissionMiddleware:
+    """ASGI middleware applying ``app.state.admission`` to plan generation endpoints.
+
+    Works at the ASGI layer so the concurrency slot is held until a streamed body has
+    been fully sent, not just until the endpoint returns.
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        controller = None
+        if scope["type"] == "http" and scope["method"] == "POST":
+            state = getattr(scope.get("app"), "state", None)
+            controller = getattr(state, "admission", None)
+        path = scope.get("path", "")
+        if controller is None or path not in RATE_LIMITED_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        headers = {name.decode("latin-1"): value.decode("latin-1") for name, value in scope["headers"]}
+        try:
+            await controller.check_rate(
+                client_key(headers, scope.get("client"), controller.api_key_hashes)
+            )
+            if path not in GENERATION_PATHS:
+                await self.app(scope, receive, send)
+                return
+            async with controller.slot():
+                await self.app(scope, receive, send)
+        except Rejected as exc:
+            await _reject(send, exc)
+
+
+async def _reject(send, exc: Rejected) -> None:
+    body = json.dumps({"detail": exc.detail}).encode()
+    headers = [
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(body)).encode()),
+    ]
+    if exc.retry_after is not None:
+        headers.append((b"retry-after", str(exc.retry_after).encode()))
+    await send({"type": "http.response.start", "status": exc.status_code, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
+
+
+def build_admission(settings: Settings) -> AdmissionController:
+    """Create the controller with the rate-limit backend selected in settings."""
+
+    backend = settings.rate_limit_backend.lower()
+    rate = settings.rate_limit_per_minute / 60.0
+    batch_rate = settings.rate_limit_batch_plans_per_minute / 60.0
+    if backend == "memory":
+        limiter: Optional[RateLimiter] = MemoryRateLimiter(rate, settings.rate_limit_burst)
+        batch_limiter: Optional[RateLimiter] = MemoryRateLimiter(batch_rate, settings.batch_max_items)
+    elif backend == "sqlite":
+        limiter = SQLiteRateLimiter(settings.rate_limit_path, rate, settings.rate_limit_burst)
+        batch_limiter = SQLiteRateLimiter(settings.rate_limit_path, batch_rate, settings.batch_max_items)
+    elif backend == "none":
+        limiter = batch_limiter = None
+    else:
+        raise ValueError(f"Unknown rate limit backend '{settings.rate_limit_backend}'")
+    return AdmissionController(
+        limiter,
+        batch_limiter,
+        max_concurrency=settings.admission_max_concurrency,
+        max_queue=settings.admission_queue_size,
+        queue_timeout_seconds=settings.admission_queue_timeout_seconds,
+        api_keys=settings.rate_limit_api_keys,
+    )
@@ -0,0 +1,264 @@
+"""
+Background plan jobs: a bounded queue drained by a fixed pool of workers.
+
+Clients get a job id immediately and poll for the result or receive it on a webhook,
+so no HTTP connection is held open for the length of an LLM call.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import math
+import uuid
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence, Set
+from urllib.parse import urlsplit
+
+import httpx
+
+from app.schemas import PlanJob, PlanJobRequest, PlanRequest, PlanResponse
+from app.services.plan_service import PlanService
+
+logger = logging.getLogger(__name__)
+
+ACTIVE = ("queued", "running")
+
+
+class JobQueueFull(Exception):
+    """Raised when the queue is at capacity; ``retry_after`` is a wait estimate in seconds."""
+
+    def __init__(self, retry_after: int) -> None:
+        super().__init__("Job queue is full")
+        self.retry_after = retry_after
+
+
+@dataclass
+class JobQueueStats:
+    submitted: int = 0
+    deduplicated: int = 0
+    rejected: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    cancelled: int = 0
+    webhook_failures: int = 0
+    queued: int = 0
+    running: int = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return asdict(self)
+
+
+@dataclass
+class _Job:
+    job_id: str
+    fingerprint: str
+    payload: PlanRequest
+    callback_url: Optional[str]
+    status: str = "queued"
+    created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    result: Optional[PlanResponse] = None
+    error: Optional[str] = None
+    task: Optional[asyncio.Task] = None
+
+    def view(self, deduplicated: bool = False) -> PlanJob:
+        return PlanJob.model_construct(
+            job_id=self.job_id,
+            status=self.status,
+            created_at=self.created_at,
+            started_at=self.started_at,
+            finished_at=self.finished_at,
+            deduplicated=deduplicated,
+            result=self.result,
+            error=self.error,
+        )
+
+
+def request_fingerprint(payload: PlanRequest) -> str:
+    """Hash of the plan inputs; the callback URL does not affect the plan."""
+
+    plan_request = PlanRequest.model_validate(payload.model_dump(exclude={"callback_url"}))
+    return hashlib.sha256(plan_request.model_dump_json().encode()).hexdigest()
+
+
+class JobQueue:
+    """Run ``PlanService.generate`` for submitted jobs on ``workers`` background tasks.
+
+    Identical requests share one job while it is queued or running; once it has
+    finished, the same request starts a new job, so a plan is never served with an
+    old calendar. At most
+    ``max_jobs`` jobs are remembered, finished ones being forgotten oldest first.
+    """
+
+    def __init__(
+        self,
+        service: PlanService,
+        workers: int = 4,
+        max_queue: int = 100,
+        max_jobs: int = 1000,
+        webhook_timeout_seconds: float = 10.0,
+        webhook_allowed_hosts: Sequence[str] = ("localhost", "127.0.0.1"),
+    ) -> None:
+        self.service = service
+        # Queued jobs in submission order; cancelling one removes it, freeing its place.
+        self._queued: "OrderedDict[str, _Job]" = OrderedDict()
+        self._wakeup = asyncio.Event()
+        self._max_queue = max_queue
+        self._worker_count = workers
+        self._max_jobs = max_jobs
+        self._webhook_timeout = webhook_timeout_seconds
+        self._allowed_hosts = {host.lower() for host in webhook_allowed_hosts}
+        self._jobs: "OrderedDict[str, _Job]" = OrderedDict()
+        self._by_fingerprint: Dict[str, str] = {}
+        self._workers: List[asyncio.Task] = []
+        self._webhooks: Set[asyncio.Task] = set()
+        self._client: Optional[httpx.AsyncClient] = None
+        self._stopping = False
+        self._avg_seconds = 0.0
+        self.stats = JobQueueStats()
+
+    def start(self) -> None:
+        if self._workers:
+            return
+        self._stopping = False
+        self._client = httpx.AsyncClient(timeout=self._webhook_timeout)
+        self._workers = [asyncio.ensure_future(self._run()) for _ in range(self._worker_count)]
+
+    async def stop(self) -> None:
+        self._stopping = True
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        if self._webhooks:
+            await asyncio.gather(*self._webhooks, return_exceptions=True)
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def submit(self, payload: PlanJobRequest) -> PlanJob:
+        """Queue ``payload`` or return the queued or running job for an identical request."""
+
+        if payload.callback_url is not None:
+            self._check_callback(payload.callback_url)
+        fingerprint = request_fingerprint(payload)
+        existing = self._jobs.get(self._by_fingerprint.get(fingerprint, ""))
+        if existing is not None and existing.status in ACTIVE:
+            self.stats.deduplicated += 1
+            return existing.view(deduplicated=True)
+
+        job = _Job(
+            job_id=uuid.uuid4().hex,
+            fingerprint=fingerprint,
+            payload=payload,
+            callback_url=payload.callback_url,
+        )
+        if len(self._queued) >= self._max_queue:
+            self.stats.rejected += 1
+            raise JobQueueFull(self._retry_after())
+        self._queued[job.job_id] = job
+        self._wakeup.set()
+        self.stats.submitted += 1
+        self.stats.queued += 1
+        self._jobs[job.job_id] = job
+        self._by_fingerprint[fingerprint] = job.job_id
+        self._evict()
+        return job.view()
+
+    def get(self, job_id: str) -> Optional[PlanJob]:
+        job = self._jobs.get(job_id)
+        return job.view() if job is not None else None
+
+    def cancel(self, job_id: str) -> Optional[PlanJob]:
+        """Cancel a queued or running job; finished jobs are returned unchanged."""
+
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        if job.status == "queued":
+            del self._queued[job_id]
+            self.stats.queued -= 1
+            self._finish(job, "cancelled")
+        elif job.status == "running" and job.task is not None:
+            job.task.cancel()
+        return job.view()
+
+    async def _run(self) -> None:
+        while True:
+            while not self._queued:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+            _, job = self._queued.popitem(last=False)
+            await self._execute(job)
+
+    async def _execute(self, job: _Job) -> None:
+        self.stats.queued -= 1
+        self.stats.running += 1
+        job.status = "running"
+        job.started_at = datetime.now(timezone.utc)
+        job.task = asyncio.ensure_future(self.service.generate(job.payload))
+        try:
+            job.result = await job.task
+        except asyncio.CancelledError:
+            self._finish(job, "cancelled")
+            if self._stopping:
+                # The worker itself is being stopped, not just this job.
+                raise
+        except Exception as e:
+            logger.error(f"Plan job {job.job_id} failed: {e}")
+            job.error = str(e)
+            self._finish(job, "failed")
+        else:
+            self._finish(job, "succeeded")
+        finally:
+            self.stats.running -= 1
+            job.task = None
+
+    def _finish(self, job: _Job, status: str) -> None:
+        job.status = status
+        job.finished_at = datetime.now(timezone.utc)
+        setattr(self.stats, status, getattr(self.stats, status) + 1)
+        if job.started_at is not None:
+            elapsed = (job.finished_at - job.started_at).total_seconds()
+            self._avg_seconds = elapsed if not self._avg_seconds else 0.8 * self._avg_seconds + 0.2 * elapsed
+        if job.callback_url is not None and self._client is not None:
+            webhook = asyncio.ensure_future(self._notify(job))
+            self._webhooks.add(webhook)
+            webhook.add_done_callback(self._webhooks.discard)
+
+    async def _notify(self, job: _Job) -> None:
+        try:
+            response = await self._client.post(
+                job.callback_url,
+                content=job.view().model_dump_json(),
+                headers={"Content-Type": "application/json"},
+            )
+            response.raise_for_status()
+        except httpx.HTTPError as e:
+            self.stats.webhook_failures += 1
+            logger.warning(f"Webhook for plan job {job.job_id} failed: {e}")
+
+    def _check_callback(self, url: str) -> None:
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or (parts.hostname or "").lower() not in self._allowed_hosts:
+            raise ValueError(f"Callback host for '{url}' is not allowed")
+
+    def _retry_after(self) -> int:
+        average = self._avg_seconds or 1.0
+        return max(1, math.ceil(average * len(self._queued) / max(1, self._worker_count)))
+
+    def _evict(self) -> None:
+        if len(self._jobs) <= self._max_jobs:
+            return
+        for job_id, job in list(self._jobs.items()):
+            if len(self._jobs) <= self._max_jobs:
+                break
+            if job.status in ACTIVE:
+                continue
+            del self._jobs[job_id]
+            if self._by_fingerprint.get(job.fingerprint) == job_id:
+                del self._by_fingerprint[job.fingerprint]
@@ -0,0 +1,302 @@
+"""
+Reference-link verification for generated tasks.
+
+Links are checked with one pooled ``httpx.AsyncClient`` under a global and a per-host
+concurrency cap, and the verdict for each URL is cached for a while so popular docs
+sites are fetched once. A plan waits at most ``budget_seconds`` for verdicts; checks
+still running then are left to finish in the background and fill the cache.
+"""
+from __future__ import annotations
+
+import asyncio
+import ipaddress
+import logging
+import socket
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+
+from app.config import Settings
+from app.schemas import Task
+
+logger = logging.getLogger(__name__)
+
+DEAD_STATUSES = frozenset({404, 410})
+# Servers that refuse HEAD outright; the link is retried with GET.
+HEAD_UNSUPPORTED = frozenset({405, 501})
+MODES = ("flag", "drop")
+MAX_REDIRECTS = 5
+
+
+@dataclass
+class LinkCheckStats:
+    requests: int = 0
+    cache_hits: int = 0
+    alive: int = 0
+    dead: int = 0
+    unknown: int = 0
+    over_budget: int = 0
+    blocked: int = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return asdict(self)
+
+
+class LinkChecker:
+    """Check task ``reference_links`` and flag or drop the dead ones.
+
+    A link is dead on 404/410, when its host does not resolve or refuses connections,
+    or when it is not a well-formed http(s) URL. Timeouts, 5xx, 401/403/429 and links not
+    checked within the budget are unknown and kept. Unless ``allow_private`` is set,
+    hosts are resolved first and never fetched when any address is private, loopback
+    or link-local; redirects are followed by hand, at most ``MAX_REDIRECTS`` hops,
+    with the same check on every hop.
+    """
+
+    def __init__(
+        self,
+        mode: str = "flag",
+        budget_seconds: float = 1.0,
+        timeout_seconds: float = 3.0,
+        max_concurrency: int = 20,
+        per_host: int = 4,
+        ttl_seconds: int = 3600,
+        max_entries: int = 10_000,
+        allow_private: bool = False,
+    ) -> None:
+        if mode not in MODES:
+            raise ValueError(f"Unknown link check mode '{mode}'")
+        self.mode = mode
+        self._budget = budget_seconds
+        self._timeout = timeout_seconds
+        self._max_concurrency = max_concurrency
+        self._per_host = per_host
+        self._ttl = ttl_seconds
+        self._max_entries = max_entries
+        self._allow_private = allow_private
+        self._cache: "OrderedDict[str, Tuple[bool, float]]" = OrderedDict()
+        self._pending: Dict[str, asyncio.Task] = {}
+        self._hosts: Dict[str, Tuple[asyncio.Semaphore, int]] = {}
+        self._limit: Optional[asyncio.Semaphore] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self.stats = LinkCheckStats()
+
+    async def verify(self, tasks: List[Task]) -> List[str]:
+        """Check every link in ``tasks`` and return the dead ones, in task order.
+
+        In ``drop`` mode dead links are also removed from the tasks.
+        """
+
+        urls = list(dict.fromkeys(link for task in tasks for link in task.reference_links))
+        if not urls:
+            return []
+        verdicts = await self.check(urls)
+        dead = [url for url in urls if verdicts[url] is False]
+        if dead and self.mode == "drop":
+            gone = set(dead)
+            for task in tasks:
+                if any(link in gone for link in task.reference_links):
+                    task.reference_links = [link for link in task.reference_links if link not in gone]
+        if dead:
+            logger.info(f"Found {len(dead)} dead reference links out of {len(urls)}")
+        return dead
+
+    async def check(self, urls: Iterable[str]) -> Dict[str, Optional[bool]]:
+        """Map each URL to alive (True), dead (False) or unknown (None) within the budget."""
+
+        verdicts: Dict[str, Optional[bool]] = {}
+        waiting: Dict[str, asyncio.Task] = {}
+        now = time.monotonic()
+        for url in urls:
+            cached = self._cached(url, now)
+            if cached is not None:
+                self.stats.cache_hits += 1
+                verdicts[url] = cached
+            elif url not in waiting:
+                waiting[url] = self._start(url)
+
+        if waiting:
+            done, _ = await asyncio.wait(set(waiting.values()), timeout=self._budget)
+            for url, check in waiting.items():
+                if check in done and not check.cancelled():
+                    try:
+                        verdicts[url] = check.result()
+                    except Exception as e:
+                        # A link check must never fail the plan it belongs to.
+                        logger.warning(f"Link check for {url} failed: {e!r}")
+                        self.stats.unknown += 1
+                        verdicts[url] = None
+                else:
+                    self.stats.over_budget += 1
+                    verdicts[url] = None
+        return verdicts
+
+    async def aclose(self) -> None:
+        for check in list(self._pending.values()):
+            check.cancel()
+        if self._pending:
+            await asyncio.gather(*self._pending.values(), return_exceptions=True)
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _cached(self, url: str, now: float) -> Optional[bool]:
+        entry = self._cache.get(url)
+        if entry is None:
+            return None
+        alive, expires = entry
+        if expires <= now:
+            del self._cache[url]
+            return None
+        self._cache.move_to_end(url)
+        return alive
+
+    def _remember(self, url: str, alive: bool) -> None:
+        self._cache[url] = (alive, time.monotonic() + self._ttl)
+        self._cache.move_to_end(url)
+        while len(self._cache) > self._max_entries:
+            self._cache.popitem(last=False)
+
+    def _start(self, url: str) -> asyncio.Task:
+        # A URL already being checked for another plan shares that check.
+        check = self._pending.get(url)
+        if check is None:
+            check = asyncio.ensure_future(self._check(url))
+            self._pending[url] = check
+            check.add_done_callback(lambda _, url=url: self._pending.pop(url, None))
+        return check
+
+    async def _check(self, url: str) -> Optional[bool]:
+        if self._client is None:
+            self._limit = asyncio.Semaphore(self._max_concurrency)
+            # Redirects are followed by hand so every hop passes the address check.
+            self._client = httpx.AsyncClient(
+                timeout=self._timeout,
+                follow_redirects=False,
+                limits=httpx.Limits(max_connections=self._max_concurrency),
+            )
+        async with self._limit:
+            verdict = await self._follow(url)
+
+        if verdict is None:
+            self.stats.unknown += 1
+        else:
+            self._remember(url, verdict)
+            if verdict:
+                self.stats.alive += 1
+            else:
+                self.stats.dead += 1
+        return verdict
+
+    async def _follow(self, url: str) -> Optional[bool]:
+        for _ in range(MAX_REDIRECTS + 1):
+            try:
+                parts = urlsplit(url)
+                host = (parts.hostname or "").lower()
+                port = parts.port or (443 if parts.scheme == "https" else 80)
+            except ValueError:
+                # Unparseable, e.g. an unclosed IPv6 bracket; treated like a non-http link.
+                return False
+            if parts.scheme not in ("http", "https") or not host:
+                return False
+            if not self._allow_private:
+                try:
+                    public = await _resolves_public(host, port)
+                except (OSError, ValueError):
+                    # Unresolvable, or not a valid hostname at all (UnicodeError for
+                    # empty or over-long labels such as "a..b").
+                    return False
+                if not public:
+                    self.stats.blocked += 1
+                    logger.warning(f"Not checking link {url}: host resolves to a private address")
+                    return None
+
+            async with self._host_slot(host):
+                response = await self._fetch(url)
+            if not isinstance(response, httpx.Response):
+                return response
+            if response.next_request is None:
+                return _status_verdict(response.status_code)
+            url = str(response.next_request.url)
+        return None
+
+    async def _fetch(self, url: str):
+        """One hop: the response, or a verdict when the request itself failed."""
+
+        self.stats.requests += 1
+        try:
+            response = await self._client.head(url)
+            if response.status_code in HEAD_UNSUPPORTED:
+                # Only the status line is needed; the body is never read.
+                async with self._client.stream("GET", url) as response:
+                    pass
+        except (httpx.ConnectError, httpx.UnsupportedProtocol, httpx.InvalidURL):
+            return False
+        except httpx.HTTPError as e:
+            logger.debug(f"Could not check link {url}: {e}")
+            return None
+        return response
+
+    @asynccontextmanager
+    async def _host_slot(self, host: str) -> AsyncIterator[None]:
+        # Reference-counted so the table only holds hosts with checks in flight.
+        semaphore, users = self._hosts.get(host, (None, 0))
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self._per_host)
+        self._hosts[host] = (semaphore, users + 1)
+        try:
+            async with semaphore:
+                yield
+        finally:
+            semaphore, users = self._hosts[host]
+            if users == 1:
+                del self._hosts[host]
+            else:
+                self._hosts[host] = (semaphore, users - 1)
+
+
+def _status_verdict(status_code: int) -> Optional[bool]:
+    if status_code < 400:
+        return True
+    if status_code in DEAD_STATUSES:
+        return False
+    return None
+
+
+def _is_private_address(address: str) -> bool:
+    ip = ipaddress.ip_address(address.split("%", 1)[0])
+    return ip.is_private or ip.is_loopback or ip.is_link_local or ip.is_reserved or ip.is_multicast
+
+
+async def _resolves_public(host: str, port: int) -> bool:
+    """True when every address ``host`` resolves to is public; raises OSError if it does not resolve."""
+
+    if host == "localhost" or host.endswith(".localhost"):
+        return False
+    infos = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    return bool(infos) and not any(_is_private_address(info[4][0]) for info in infos)
+
+
+def build_link_checker(settings: Settings) -> Optional[LinkChecker]:
+    """Create the checker for the mode selected in settings, or ``None`` when disabled."""
+
+    mode = settings.link_check_mode.lower()
+    if mode == "none":
+        return None
+    if mode not in MODES:
+        raise ValueError(f"Unknown link check mode '{settings.link_check_mode}'")
+    return LinkChecker(
+        mode=mode,
+        budget_seconds=settings.link_check_budget_seconds,
+        timeout_seconds=settings.link_check_timeout_seconds,
+        max_concurrency=settings.link_check_max_concurrency,
+        per_host=settings.link_check_per_host,
+        ttl_seconds=settings.link_check_cache_ttl_seconds,
+        max_entries=settings.link_check_cache_max_entries,
+        allow_private=settings.link_check_allow_private,
+    )
@@ -0,0 +1,213 @@
+"""
+Content-addressed cache for raw LLM plan output.
+
+Entries are keyed on a hash of the normalized prompt plus the model name and hold the
+provider's raw JSON. Callers drop the model's task dates on a hit, so scheduling
+(``backfill_dates``) still runs against today's date.
+"""
+from __future__ import annotations
+
+import abc
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Optional, Tuple
+
+from app.config import Settings
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return asdict(self)
+
+
+def cache_key(prompt: str, model: str) -> str:
+    """Return a stable fingerprint for a prompt/model pair.
+
+    Whitespace is collapsed so cosmetic differences in templated goals share an entry.
+    """
+
+    normalized = " ".join(prompt.split())
+    digest = hashlib.sha256()
+    digest.update(model.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(normalized.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class PlanCache(abc.ABC):
+    """Pluggable store for raw plan payloads.
+
+    Async callers use ``aget``/``aset``, which run blocking backends off the event loop.
+    """
+
+    # Backends whose reads and writes do I/O set this.
+    blocking = False
+
+    def __init__(self, ttl_seconds: int, max_entries: int) -> None:
+        self._ttl = ttl_seconds
+        self._max_entries = max_entries
+        self.stats = CacheStats()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        value = self._get(key)
+        if value is None:
+            self.stats.misses += 1
+        else:
+            self.stats.hits += 1
+        return value
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        self._set(key, value)
+
+    async def aget(self, key: str) -> Optional[Dict[str, Any]]:
+        if self.blocking:
+            return await asyncio.to_thread(self.get, key)
+        return self.get(key)
+
+    async def aset(self, key: str, value: Dict[str, Any]) -> None:
+        if self.blocking:
+            await asyncio.to_thread(self.set, key, value)
+        else:
+            self.set(key, value)
+
+    def _expired(self, stored_at: float) -> bool:
+        return self._ttl > 0 and time.time() - stored_at > self._ttl
+
+    @abc.abstractmethod
+    def _get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the live entry for ``key`` or ``None``."""
+
+    @abc.abstractmethod
+    def _set(self, key: str, value: Dict[str, Any]) -> None:
+        """Store ``value`` and enforce the size bound."""
+
+    def close(self) -> None:
+        """Release backend resources."""
+
+
+class MemoryPlanCache(PlanCache):
+    """Process-local LRU cache with a TTL and size bound.
+
+    Cached payloads are shared between callers and must be treated as read-only.
+    """
+
+    def __init__(self, ttl_seconds: int = 3600, max_entries: int = 1024) -> None:
+        super().__init__(ttl_seconds, max_entries)
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+
+    def _get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        stored_at, value = entry
+        if self._expired(stored_at):
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def _set(self, key: str, value: Dict[str, Any]) -> None:
+        self._entries[key] = (time.time(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLitePlanCache(PlanCache):
+    """On-disk cache that survives restarts; access time drives LRU eviction.
+
+    Access times are refreshed at most once per ``ACCESS_RESOLUTION_SECONDS`` so hot
+    entries do not cost a write on every hit.
+    """
+
+    blocking = True
+    ACCESS_RESOLUTION_SECONDS = 60.0
+
+    def __init__(self, path: str, ttl_seconds: int = 3600, max_entries: int = 1024) -> None:
+        super().__init__(ttl_seconds, max_entries)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS plan_cache ("
+            "key TEXT PRIMARY KEY, payload TEXT NOT NULL, "
+            "stored_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS plan_cache_accessed ON plan_cache (accessed_at)"
+        )
+        self._conn.commit()
+
+    def _get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload, stored_at, accessed_at FROM plan_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            payload, stored_at, accessed_at = row
+            if self._expired(stored_at):
+                self._conn.execute("DELETE FROM plan_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            now = time.time()
+            if now - accessed_at >= self.ACCESS_RESOLUTION_SECONDS:
+                self._conn.execute(
+                    "UPDATE plan_cache SET accessed_at = ? WHERE key = ?", (now, key)
+                )
+                self._conn.commit()
+        return json.loads(payload)
+
+    def _set(self, key: str, value: Dict[str, Any]) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO plan_cache (key, payload, stored_at, accessed_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now, now),
+            )
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM plan_cache").fetchone()
+            overflow = count - self._max_entries
+            if overflow > 0:
+                self._conn.execute(
+                    "DELETE FROM plan_cache WHERE key IN ("
+                    "SELECT key FROM plan_cache ORDER BY accessed_at LIMIT ?)",
+                    (overflow,),
+                )
+                self.stats.evictions += overflow
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def build_plan_cache(settings: Settings) -> Optional[PlanCache]:
+    """Create the cache backend selected in settings, or ``None`` when disabled."""
+
+    backend = settings.plan_cache_backend.lower()
+    if backend == "memory":
+        return MemoryPlanCache(settings.plan_cache_ttl_seconds, settings.plan_cache_max_entries)
+    if backend == "sqlite":
+        return SQLitePlanCache(
+            settings.plan_cache_path,
+            settings.plan_cache_ttl_seconds,
+            settings.plan_cache_max_entries,
+        )
+    if backend == "none":
+        return None
+    raise ValueError(f"Unknown plan cache backend '{settings.plan_cache_backend}'")
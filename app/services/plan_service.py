@@ -1,15 +1,65 @@
 from __future__ import annotations
 
+import asyncio
+import json
 import logging
+import time
+import uuid
 from datetime import date
-from typing import Dict, Optional
+from typing import (
+    Any,
+    AsyncContextManager,
+    AsyncIterator,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
 
-from app.config import get_settings
-from app.llm.gemini import GeminiPlanner
-from app.llm.provider import LLMProvider, MockPlanner
-from app.schemas import PlanMetadata, PlanRequest, PlanResponse, Task
-from app.utils.timeline import backfill_dates
-from app.utils.validation import validate_dependencies, validate_timeline
+
+from app.config import Settings, get_settings
+from app.llm.prompts import (
+    PLAN_TEMPLATES,
+    REPLAN_TEMPLATES,
+    estimate_tokens,
+    get_template,
+    output_token_budget,
+    task_range,
+)
+from app.llm.provider import LLMProvider
+from app.llm.registry import ProviderRegistry
+from app.schemas import (
+    TASK_LIST_ADAPTER,
+    PlanBatchItem,
+    PlanBatchResponse,
+    PlanMetadata,
+    PlanRequest,
+    PlanResponse,
+    ReplanRequest,
+    Task,
+)
+from app.services.link_checker import LinkChecker
+from app.services.plan_cache import PlanCache, cache_key
+from app.services.plan_store import PlanStoreWriter
+from app.services.similar_goals import GoalIndex, goal_text, undated
+from app.services.single_flight import SingleFlight
+from app.utils.metrics import (
+    PLAN_TASKS,
+    PLANS_IN_FLIGHT,
+    PROVIDER_ERRORS,
+    TIMELINE_CONFLICTS,
+    stage,
+)
+from app.utils.stream_parser import TaskStreamParser
+from app.utils.timeline import Schedule, level_resources, schedule_tasks
+from app.utils.validation import (
+    ValidationError,
+    validate_changed_dependencies,
+    validate_dependencies,
+    validate_timeline,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -17,126 +67,485 @@ logger = logging.getLogger(__name__)
 class PlanService:
     """Coordinates prompt construction, LLM calls, and post-processing."""
 
-    def __init__(self, provider: Optional[LLMProvider] = None) -> None:
-        self._settings = get_settings()
-        if provider is not None:
-            self._provider = provider
-        else:
-            self._provider = self._resolve_provider()
+    def __init__(
+        self,
+        provider: Optional[LLMProvider] = None,
+        registry: Optional[ProviderRegistry] = None,
+        cache: Optional[PlanCache] = None,
+        store: Optional[PlanStoreWriter] = None,
+        similar: Optional[GoalIndex] = None,
+        links: Optional[LinkChecker] = None,
+    ) -> None:
+        self._fixed_provider = provider
+        self._cache = cache
+        self._store = store
+        self._similar = similar
+        self._links = links
+        self._single_flight = SingleFlight()
+        if registry is None and provider is None:
+            registry = ProviderRegistry()
+        self._registry = registry
 
-    def _resolve_provider(self) -> LLMProvider:
-        if self._settings.gemini_api_key and not self._settings.enable_mock_mode:
-            return GeminiPlanner(
-                api_key=self._settings.gemini_api_key,
-                model=self._settings.gemini_model,
-            )
-        return MockPlanner()
+    # Resolved on each access so a registry reload takes effect for shared services.
+    @property
+    def _settings(self) -> Settings:
+        if self._registry is not None:
+            return self._registry.settings
+        return get_settings()
+
+    @property
+    def _provider(self) -> LLMProvider:
+        if self._fixed_provider is not None:
+            return self._fixed_provider
+        return self._registry.default()
 
     async def generate(self, payload: PlanRequest) -> PlanResponse:
         logger.info(f"Generating plan for goal: {payload.goal[:50]}...")
-        
-        prompt = self._build_prompt(payload)
-        schema = self._target_schema()
-        
+        PLANS_IN_FLIGHT.inc()
         try:
-            raw = await self._provider.generate_plan(prompt, schema)
-        except Exception as e:
-            logger.error(f"LLM provider failed: {e}")
-            raise ValueError(f"Failed to generate plan: {str(e)}")
-        
+            with stage("prompt"):
+                prompt, max_output_tokens = self._build_prompt(payload)
+                schema = self._target_schema()
+
+            with stage("llm"):
+                raw, similarity = await self._fetch_raw_plan(
+                    prompt, schema, max_output_tokens, similar_to=payload
+                )
+                raw = self._normalize_raw(raw)
+            with stage("parse"):
+                tasks = TASK_LIST_ADAPTER.validate_python(raw.get("tasks", []))
+            logger.info(f"Generated {len(tasks)} tasks from LLM")
+            dead_links: List[str] = []
+            if self._links is not None:
+                with stage("links"):
+                    dead_links = await self._links.verify(tasks)
+
+            return self._assemble(payload, raw, tasks, similarity, dead_links)
+        finally:
+            PLANS_IN_FLIGHT.dec()
+
+    async def generate_stream(self, payload: PlanRequest) -> AsyncIterator[Dict[str, Any]]:
+        """Yield ``task`` frames as tasks are produced, then a final ``plan`` frame.
+
+        The final frame carries metadata and backfilled dates. Streaming requests read
+        and populate the plan cache but are not coalesced.
+        """
+
+        logger.info(f"Streaming plan for goal: {payload.goal[:50]}...")
+
+        prompt, max_output_tokens = self._build_prompt(payload)
+        schema = self._target_schema()
+        provider = self._provider
+        key = cache_key(prompt, provider.name())
+        tasks: List[Task] = []
+
+        cached = await self._cache.aget(key) if self._cache is not None else None
+        if cached is not None:
+            raw = undated(self._normalize_raw(cached))
+            for item in raw.get("tasks", []):
+                task = Task.model_validate(item)
+                tasks.append(task)
+                yield {"type": "task", "data": task.model_dump(mode="json")}
+        else:
+            parser = TaskStreamParser()
+            try:
+                async for chunk in provider.stream_plan(
+                    prompt, schema, max_output_tokens=max_output_tokens
+                ):
+                    for item in parser.feed(chunk):
+                        task = Task.model_validate(item)
+                        tasks.append(task)
+                        yield {"type": "task", "data": task.model_dump(mode="json")}
+            except ValueError:
+                raise
+            except Exception as e:
+                PROVIDER_ERRORS.inc()
+                logger.error(f"LLM provider failed: {e}")
+                raise ValueError(f"Failed to generate plan: {str(e)}")
+
+            document = parser.document()
+            if document is None:
+                logger.warning("Streamed plan was not a complete JSON document")
+                raw = {"tasks": [], "metadata": {}}
+            else:
+                raw = self._normalize_raw(document)
+                if self._cache is not None:
+                    await self._cache.aset(key, document)
+
+        logger.info(f"Streamed {len(tasks)} tasks from LLM")
+        response = self._assemble(payload, raw, tasks)
+        yield {"type": "plan", "data": response.model_dump(mode="json")}
+
+    async def generate_batch(
+        self,
+        payloads: List[PlanRequest],
+        concurrency: Optional[int] = None,
+        slot: Optional[Callable[[], AsyncContextManager[None]]] = None,
+    ) -> PlanBatchResponse:
+        """Generate several plans with bounded parallelism.
+
+        Identical requests run once and share the result; a
+        failing item is reported in place without failing the batch. With ``slot``,
+        each generation also holds one slot of the shared admission cap.
+        """
+
+        limit = asyncio.Semaphore(concurrency or self._settings.batch_max_concurrency)
+        unique: Dict[str, asyncio.Future] = {}
+        batch_started = time.perf_counter()
+
+        async def run(payload: PlanRequest) -> PlanResponse:
+            async with limit:
+                if slot is None:
+                    return await self.generate(payload)
+                async with slot():
+                    return await self.generate(payload)
+
+        async def item(index: int, payload: PlanRequest) -> PlanBatchItem:
+            started = time.perf_counter()
+            # Identical payloads share one run; same-prompt variants still share the
+            # provider call through the cache and single-flight layers.
+            key = payload.model_dump_json()
+            if key not in unique:
+                unique[key] = asyncio.ensure_future(run(payload))
+            try:
+                plan = await asyncio.shield(unique[key])
+                error = None
+            except Exception as e:
+                plan, error = None, str(e)
+            elapsed = (time.perf_counter() - started) * 1000
+            return PlanBatchItem(index=index, plan=plan, error=error, elapsed_ms=elapsed)
+
+        results = await asyncio.gather(*(item(i, p) for i, p in enumerate(payloads)))
+        wall = (time.perf_counter() - batch_started) * 1000
+        logger.info(
+            f"Batch of {len(payloads)} plans ({len(unique)} unique) finished in {wall:.0f}ms"
+        )
+        return PlanBatchResponse(
+            results=list(results),
+            wall_time_ms=wall,
+            summed_item_time_ms=sum(r.elapsed_ms for r in results),
+        )
+
+    async def replan(self, request: ReplanRequest) -> PlanResponse:
+        """Patch an existing plan instead of regenerating it.
+
+        Completed tasks are kept verbatim and drop out of scheduling. Date-only changes
+        are handled by the local scheduler alone; a ``constraint`` asks the model to
+        regenerate just the affected tasks and their dependents, and only those are
+        re-validated.
+
+        Raises:
+            ValidationError: If the request references unknown tasks or the patched
+                plan has invalid dependencies.
+        """
+
+        plan = request.plan
+        by_id = {task.id: task for task in plan.tasks}
+        completed = set(request.completed_task_ids)
+        unknown = (completed | set(request.affected_task_ids)) - by_id.keys()
+        if unknown:
+            raise ValidationError(f"Unknown task ids: {', '.join(sorted(unknown))}")
+
+        open_tasks = [task for task in plan.tasks if task.id not in completed]
+        assumptions = list(plan.metadata.assumptions)
+        if request.constraint:
+            affected = self._affected_subgraph(
+                open_tasks, set(request.affected_task_ids) or {t.id for t in open_tasks}
+            )
+            kept = [task for task in open_tasks if task.id not in affected]
+            replacements = await self._regenerate_subgraph(
+                plan.metadata.goal,
+                request.constraint,
+                [task for task in plan.tasks if task.id not in affected],
+                [task for task in open_tasks if task.id in affected],
+            )
+            open_tasks = kept + replacements
+            with stage("validate"):
+                validate_changed_dependencies(
+                    [by_id[task_id] for task_id in completed] + open_tasks,
+                    {task.id for task in replacements},
+                )
+            assumptions.append(f"Re-planned for constraint: {request.constraint}")
+            logger.info(
+                f"Regenerated {len(affected)} affected tasks as {len(replacements)} tasks"
+            )
+
+        # Drop completed prerequisites and stale dates; durations carry over from the plan.
+        schedulable = [
+            task.model_copy(
+                update={
+                    "start_date": None,
+                    "due_date": None,
+                    "depends_on": [dep for dep in task.depends_on if dep not in completed],
+                }
+            )
+            for task in open_tasks
+        ]
+        horizon = self._horizon(
+            request.target_date, request.horizon_days or plan.metadata.horizon_days
+        )
+        schedule = self._schedule(schedulable, horizon, request.owner_capacity, order=None)
+        rescheduled = [
+            task
+            if task.depends_on == original.depends_on
+            else task.model_copy(update={"depends_on": original.depends_on})
+            for task, original in zip(schedule.tasks, open_tasks)
+        ]
+
+        metadata = plan.metadata.model_copy(
+            update={
+                "assumptions": assumptions,
+                "horizon_days": horizon,
+                "critical_path": schedule.critical_path,
+                "makespan_days": schedule.makespan_days,
+                "owner_utilization": schedule.owner_utilization,
+            }
+        )
+        tasks = [by_id[task.id] for task in plan.tasks if task.id in completed] + rescheduled
+        return self._persist(PlanResponse.model_construct(metadata=metadata, tasks=tasks))
+
+    @staticmethod
+    def _affected_subgraph(tasks: List[Task], seeds: Set[str]) -> Set[str]:
+        """Return ``seeds`` plus every task that transitively depends on them."""
+
+        dependents: Dict[str, List[str]] = {}
+        for task in tasks:
+            for dep in task.depends_on:
+                dependents.setdefault(dep, []).append(task.id)
+        affected = set(seeds)
+        frontier = list(seeds)
+        while frontier:
+            for child in dependents.get(frontier.pop(), ()):
+                if child not in affected:
+                    affected.add(child)
+                    frontier.append(child)
+        return affected
+
+    async def _regenerate_subgraph(
+        self, goal: str, constraint: str, context: List[Task], affected: List[Task]
+    ) -> List[Task]:
+        prompt, max_output_tokens = self._build_replan_prompt(goal, constraint, context, affected)
+        raw, _ = await self._fetch_raw_plan(prompt, self._target_schema(), max_output_tokens)
+        raw = self._normalize_raw(raw)
+        with stage("parse"):
+            return TASK_LIST_ADAPTER.validate_python(raw.get("tasks", []))
+
+    def _normalize_raw(self, raw: Any) -> Dict[str, Any]:
         # Handle case where LLM might return unexpected format
         if isinstance(raw, list):
             logger.warning("LLM returned list instead of dict, wrapping in structure")
             raw = {"tasks": raw, "metadata": {}}
-        
-        tasks = [Task.model_validate(task) for task in raw.get("tasks", [])]
-        logger.info(f"Generated {len(tasks)} tasks from LLM")
-
-        today = date.today()
-        fallback_start = today
-        horizon = payload.horizon_days or self._settings.default_horizon_days
-        if payload.target_date:
-            horizon = max((payload.target_date - today).days, 1)
-            fallback_start = today
-        tasks = backfill_dates(tasks, fallback_start=fallback_start, horizon_days=horizon)
-        
-        # Validate task dependencies and timelines
-        try:
-            validate_dependencies(tasks)
-            conflicts = validate_timeline(tasks)
-            if conflicts:
-                logger.warning(f"Timeline conflicts detected: {conflicts}")
-        except Exception as e:
-            logger.error(f"Validation failed: {e}")
-            # Continue with plan but log the issue
+        return raw
+
+    def _assemble(
+        self,
+        payload: PlanRequest,
+        raw: Dict[str, Any],
+        tasks: List[Task],
+        similarity: Optional[float] = None,
+        dead_links: Optional[List[str]] = None,
+    ) -> PlanResponse:
+        horizon = self._horizon(payload.target_date, payload.horizon_days)
+        # Validate task dependencies, then schedule along the resulting topological order
+        order = None
+        with stage("validate"):
+            try:
+                order = validate_dependencies(tasks)
+            except ValidationError as e:
+                logger.error(f"Validation failed: {e}")
+                # Continue with plan but log the issue
+        schedule = self._schedule(tasks, horizon, payload.owner_capacity, order)
 
         metadata = PlanMetadata(
             goal=payload.goal,
             planning_strategy=raw.get("metadata", {}).get("planning_strategy"),
             assumptions=raw.get("metadata", {}).get("assumptions", []),
             horizon_days=horizon,
+            critical_path=schedule.critical_path,
+            makespan_days=schedule.makespan_days,
+            owner_utilization=schedule.owner_utilization,
+            similarity=similarity,
+            dead_links=dead_links or [],
         )
         
         logger.info("Plan generation completed successfully")
-        return PlanResponse(metadata=metadata, tasks=tasks)
+        # Both parts are validated already; skip re-validating every task.
+        return self._persist(PlanResponse.model_construct(metadata=metadata, tasks=schedule.tasks))
+
+    def _persist(self, response: PlanResponse) -> PlanResponse:
+        """Assign a plan id and queue the plan for the background store writer."""
+
+        if self._store is not None:
+            response.metadata.plan_id = uuid.uuid4().hex
+            self._store.submit(response.metadata.plan_id, response)
+        return response
+
+    def _horizon(self, target_date: Optional[date], horizon_days: Optional[int]) -> int:
+        if target_date:
+            return max((target_date - date.today()).days, 1)
+        return horizon_days or self._settings.default_horizon_days
+
+    def _schedule(
+        self,
+        tasks: List[Task],
+        horizon: int,
+        owner_capacity: Optional[Dict[str, int]],
+        order: Optional[List[str]],
+    ) -> Schedule:
+        """Date ``tasks`` in place from today and log any remaining timeline conflicts."""
+
+        fallback_start = date.today()
+        with stage("schedule"):
+            if owner_capacity:
+                schedule = level_resources(
+                    tasks,
+                    owner_capacity,
+                    fallback_start=fallback_start,
+                    horizon_days=horizon,
+                    order=order,
+                    in_place=True,
+                )
+            else:
+                schedule = schedule_tasks(
+                    tasks,
+                    fallback_start=fallback_start,
+                    horizon_days=horizon,
+                    order=order,
+                    in_place=True,
+                )
+        with stage("timeline"):
+            conflicts = validate_timeline(schedule.tasks)
+        if conflicts:
+            TIMELINE_CONFLICTS.inc(len(conflicts))
+            logger.warning(f"Timeline conflicts detected: {conflicts}")
+        PLAN_TASKS.observe(len(schedule.tasks))
+        return schedule
+
+    async def _fetch_raw_plan(
+        self,
+        prompt: str,
+        schema: Dict[str, str],
+        max_output_tokens: Optional[int] = None,
+        similar_to: Optional[PlanRequest] = None,
+    ) -> Tuple[Any, Optional[float]]:
+        """Return the raw plan and, when an earlier plan was reused, its similarity.
+
+        Lookups go exact cache, then the near-duplicate goal index for ``similar_to``,
+        then the provider. Cached plans come back ``undated`` so they are rescheduled
+        from today rather than anchored to the day they were generated.
+        """
+
+        provider = self._provider
+        key = cache_key(prompt, provider.name())
+        if self._cache is not None:
+            cached = await self._cache.aget(key)
+            if cached is not None:
+                logger.info("Plan cache hit")
+                return undated(self._normalize_raw(cached)), None
+
+        text = None
+        if similar_to is not None and self._similar is not None:
+            text = goal_text(similar_to.goal, similar_to.guidance)
+            match = self._similar.lookup(text, similar_to.task_count)
+            if match is not None:
+                logger.info(f"Reusing plan for similar goal ({match.score:.2f}): {match.goal[:50]}")
+                return match.raw, match.score
+
+        raw = await self._single_flight.run(
+            key,
+            lambda: self._call_provider(provider, key, prompt, schema, max_output_tokens, text),
+        )
+        return raw, None
+
+    async def _call_provider(
+        self,
+        provider: LLMProvider,
+        key: str,
+        prompt: str,
+        schema: Dict[str, str],
+        max_output_tokens: Optional[int] = None,
+        index_text: Optional[str] = None,
+    ) -> Any:
+        try:
+            raw = await provider.generate_plan(prompt, schema, max_output_tokens=max_output_tokens)
+        except Exception as e:
+            PROVIDER_ERRORS.inc()
+            logger.error(f"LLM provider failed: {e}")
+            raise ValueError(f"Failed to generate plan: {str(e)}")
+
+        if self._cache is not None:
+            await self._cache.aset(key, raw)
+        if index_text is not None and isinstance(raw, dict):
+            self._similar.add(index_text, raw)
+        return raw
+
+    def cache_stats(self) -> Optional[Dict[str, int]]:
+        return self._cache.stats.as_dict() if self._cache is not None else None
+
+    def similarity_stats(self) -> Optional[Dict[str, int]]:
+        return self._similar.stats.as_dict() if self._similar is not None else None
+
+    def link_stats(self) -> Optional[Dict[str, int]]:
+        return self._links.stats.as_dict() if self._links is not None else None
+
+    def coalescing_stats(self) -> Dict[str, int]:
+        return self._single_flight.stats.as_dict()
 
     def provider_name(self) -> str:
         return self._provider.name()
 
-    def _build_prompt(self, payload: PlanRequest) -> str:
-        target_clause = (
-            f"The user needs this done by {payload.target_date.isoformat()}."
-            if payload.target_date
-            else ""
+    def _build_prompt(self, payload: PlanRequest) -> Tuple[str, int]:
+        """Render the plan prompt and size ``max_output_tokens`` for the expected tasks."""
+
+        horizon = self._horizon(payload.target_date, payload.horizon_days)
+        min_tasks, max_tasks = task_range(payload.task_count, horizon)
+        template = get_template(PLAN_TEMPLATES, self._settings.prompt_variant)
+        prompt = template.render(
+            goal=payload.goal,
+            target_clause=(
+                f"The user needs this done by {payload.target_date.isoformat()}."
+                if payload.target_date
+                else ""
+            ),
+            horizon_days=horizon,
+            guidance_clause=f"Additional context: {payload.guidance}." if payload.guidance else "",
+            min_tasks=min_tasks,
+            max_tasks=max_tasks,
+        )
+        return prompt, self._token_budget(template.name, prompt, max_tasks)
+
+    def _build_replan_prompt(
+        self, goal: str, constraint: str, context: List[Task], affected: List[Task]
+    ) -> Tuple[str, int]:
+        context_json = json.dumps(
+            [{"id": t.id, "title": t.title, "depends_on": t.depends_on} for t in context]
         )
-        horizon_clause = (
-            f"Assume a planning horizon of {payload.horizon_days} days."
-            if payload.horizon_days
-            else f"Assume a planning horizon of {self._settings.default_horizon_days} days."
+        affected_json = json.dumps(
+            [
+                t.model_dump(
+                    mode="json",
+                    include={"id", "title", "description", "owner", "duration_days", "depends_on"},
+                )
+                for t in affected
+            ]
         )
-        guidance_clause = (
-            f"Additional context: {payload.guidance}." if payload.guidance else ""
+        template = get_template(REPLAN_TEMPLATES, self._settings.prompt_variant)
+        prompt = template.render(
+            goal=goal,
+            constraint=constraint,
+            context_json=context_json,
+            affected_json=affected_json,
         )
+        # Leave room for the model to split revised tasks.
+        return prompt, self._token_budget(template.name, prompt, 2 * len(affected) + 1)
 
-        return f"""You are an expert execution strategist AI. Break down the following goal into a realistic, dependency-aware action plan.
-
-Goal: {payload.goal}
-{target_clause}
-{horizon_clause}
-{guidance_clause}
-
-Return ONLY valid JSON with this exact structure:
-{{
-  "metadata": {{
-    "planning_strategy": "brief description of your planning approach",
-    "assumptions": ["assumption 1", "assumption 2"]
-  }},
-  "tasks": [
-    {{
-      "id": "T1",
-      "title": "Task title",
-      "description": "Detailed description",
-      "owner": "Role (optional)",
-      "start_date": "2025-10-13",
-      "due_date": "2025-10-15",
-      "duration_days": 2,
-      "depends_on": [],
-      "confidence": 0.85,
-      "reference_links": ["https://example.com/tutorial1", "https://example.com/docs"]
-    }}
-  ]
-}}
-
-Requirements:
-- Use ISO format (YYYY-MM-DD) for all dates
-- Task IDs must be unique (T1, T2, T3, etc.)
-- Dependencies must reference valid task IDs that come before
-- Confidence is a float between 0.0 and 1.0
-- Ensure logical task ordering and realistic timelines
-- Include 5-10 meaningful tasks that cover the complete goal
-- For each task, provide 1-3 helpful reference_links to tutorials, documentation, guides, or tools that would help someone complete that task
-- Reference links should be real, publicly accessible URLs (documentation sites, tutorial sites, tool websites, etc.)
-- Prioritize official documentation, popular tutorials, and widely-used resources"""
+    def _token_budget(self, variant: str, prompt: str, max_tasks: int) -> int:
+        max_output_tokens = output_token_budget(max_tasks, self._settings.llm_max_output_tokens)
+        logger.info(
+            f"Prompt '{variant}': ~{estimate_tokens(prompt)} input tokens, "
+            f"max_output_tokens={max_output_tokens} for up to {max_tasks} tasks"
+        )
+        return max_output_tokens
 
     def _target_schema(self) -> Dict[str, str]:
         return {
@@ -0,0 +1,256 @@
+"""
+Persistent storage for generated plans.
+
+Writes are queued and flushed by a background task so persisting a plan never adds
+latency to the request that produced it. Listing walks a keyset-paginated cursor so
+only one page of summaries is materialised at a time.
+"""
+from __future__ import annotations
+
+import abc
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Iterator, List, Optional, Tuple
+
+from app.config import Settings
+from app.schemas import PlanResponse
+
+logger = logging.getLogger(__name__)
+
+
+def goal_fingerprint(goal: str) -> str:
+    """Case- and whitespace-insensitive hash used to find plans for the same goal."""
+
+    return hashlib.sha256(" ".join(goal.lower().split()).encode("utf-8")).hexdigest()
+
+
+@dataclass
+class StoredPlan:
+    plan_id: str
+    goal_fingerprint: str
+    created_at: float
+    plan: PlanResponse
+
+
+@dataclass
+class PlanSummary:
+    plan_id: str
+    goal: str
+    created_at: float
+    task_count: int
+
+
+def encode_cursor(created_at: float, plan_id: str) -> str:
+    return base64.urlsafe_b64encode(json.dumps([created_at, plan_id]).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[float, str]:
+    try:
+        created_at, plan_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return float(created_at), str(plan_id)
+    except (ValueError, TypeError) as exc:
+        raise ValueError("Invalid pagination cursor") from exc
+
+
+class PlanStore(abc.ABC):
+    """Pluggable persistence backend for plans."""
+
+    @abc.abstractmethod
+    def save_many(self, records: List[StoredPlan]) -> None:
+        """Persist ``records`` in one transaction."""
+
+    @abc.abstractmethod
+    def get(self, plan_id: str) -> Optional[StoredPlan]:
+        """Return the stored plan or ``None``."""
+
+    @abc.abstractmethod
+    def iter_summaries(
+        self,
+        limit: int,
+        cursor: Optional[str] = None,
+        goal_fingerprint: Optional[str] = None,
+        task_id: Optional[str] = None,
+    ) -> Iterator[PlanSummary]:
+        """Yield up to ``limit`` summaries, newest first, after ``cursor``."""
+
+    def close(self) -> None:
+        """Release backend resources."""
+
+
+class SQLitePlanStore(PlanStore):
+    """Local SQLite backend with indexes on goal fingerprint, creation time and task id."""
+
+    def __init__(self, path: str) -> None:
+        self._path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS plans (
+                plan_id TEXT PRIMARY KEY,
+                goal_fingerprint TEXT NOT NULL,
+                goal TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                task_count INTEGER NOT NULL,
+                payload TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS plans_goal ON plans (goal_fingerprint, created_at);
+            CREATE INDEX IF NOT EXISTS plans_created ON plans (created_at, plan_id);
+            CREATE TABLE IF NOT EXISTS plan_tasks (
+                task_id TEXT NOT NULL,
+                plan_id TEXT NOT NULL REFERENCES plans (plan_id),
+                PRIMARY KEY (task_id, plan_id)
+            );
+            """
+        )
+        self._conn.commit()
+
+    def save_many(self, records: List[StoredPlan]) -> None:
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO plans VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        r.plan_id,
+                        r.goal_fingerprint,
+                        r.plan.metadata.goal,
+                        r.created_at,
+                        len(r.plan.tasks),
+                        r.plan.model_dump_json(),
+                    )
+                    for r in records
+                ],
+            )
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO plan_tasks VALUES (?, ?)",
+                [(task.id, r.plan_id) for r in records for task in r.plan.tasks],
+            )
+            self._conn.commit()
+
+    def get(self, plan_id: str) -> Optional[StoredPlan]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT plan_id, goal_fingerprint, created_at, payload FROM plans WHERE plan_id = ?",
+                (plan_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        return StoredPlan(
+            plan_id=row[0],
+            goal_fingerprint=row[1],
+            created_at=row[2],
+            plan=PlanResponse.model_validate_json(row[3]),
+        )
+
+    def iter_summaries(
+        self,
+        limit: int,
+        cursor: Optional[str] = None,
+        goal_fingerprint: Optional[str] = None,
+        task_id: Optional[str] = None,
+    ) -> Iterator[PlanSummary]:
+        clauses, params = [], []
+        if cursor:
+            created_at, plan_id = decode_cursor(cursor)
+            clauses.append("(p.created_at, p.plan_id) < (?, ?)")
+            params.extend([created_at, plan_id])
+        if goal_fingerprint:
+            clauses.append("p.goal_fingerprint = ?")
+            params.append(goal_fingerprint)
+        source = "plans p"
+        if task_id:
+            source = "plan_tasks t JOIN plans p ON p.plan_id = t.plan_id"
+            clauses.append("t.task_id = ?")
+            params.append(task_id)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        query = (
+            f"SELECT p.plan_id, p.goal, p.created_at, p.task_count FROM {source} {where} "
+            "ORDER BY p.created_at DESC, p.plan_id DESC LIMIT ?"
+        )
+        params.append(limit)
+
+        # A dedicated connection lets rows be fetched lazily without holding the lock.
+        conn = sqlite3.connect(self._path)
+        try:
+            rows = conn.execute(query, params)
+            while True:
+                batch = rows.fetchmany(64)
+                if not batch:
+                    break
+                for plan_id, goal, created_at, task_count in batch:
+                    yield PlanSummary(plan_id, goal, created_at, task_count)
+        finally:
+            conn.close()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class PlanStoreWriter:
+    """Bounded queue drained by a background task that batches writes to the store."""
+
+    def __init__(self, store: PlanStore, max_queue: int = 1000, batch_size: int = 50) -> None:
+        self.store = store
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self._batch_size = batch_size
+        self._task: Optional[asyncio.Task] = None
+        self.dropped = 0
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    def submit(self, plan_id: str, plan: PlanResponse) -> None:
+        record = StoredPlan(
+            plan_id=plan_id,
+            goal_fingerprint=goal_fingerprint(plan.metadata.goal),
+            created_at=time.time(),
+            plan=plan,
+        )
+        try:
+            self._queue.put_nowait(record)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            logger.warning(f"Plan store queue full; dropped plan {plan_id}")
+
+    async def flush(self) -> None:
+        await self._queue.join()
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            await self.flush()
+            self._task.cancel()
+            self._task = None
+        self.store.close()
+
+    async def _run(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self._batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            try:
+                await asyncio.to_thread(self.store.save_many, batch)
+            except Exception as e:
+                logger.error(f"Failed to persist {len(batch)} plans: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+
+def build_plan_store(settings: Settings) -> Optional[PlanStore]:
+    """Create the store backend selected in settings, or ``None`` when disabled."""
+
+    backend = settings.plan_store_backend.lower()
+    if backend == "sqlite":
+        return SQLitePlanStore(settings.plan_store_path)
+    if backend == "none":
+        return None
+    raise ValueError(f"Unknown plan store backend '{settings.plan_store_backend}'")
@@ -0,0 +1,149 @@
+"""
+Portfolio scheduling: several plans merged into one dependency graph and scheduled
+together, so goals that share owners are placed against each other instead of each
+starting from today in isolation.
+"""
+from __future__ import annotations
+
+import logging
+from datetime import date
+from typing import Dict, List, Optional
+
+from app.schemas import (
+    PortfolioConflict,
+    PortfolioMetadata,
+    PortfolioRequest,
+    PortfolioResponse,
+    Task,
+)
+from app.utils.metrics import stage
+from app.utils.timeline import level_resources, schedule_tasks
+from app.utils.validation import ValidationError, find_owner_overloads, validate_dependencies
+
+logger = logging.getLogger(__name__)
+
+SEPARATOR = ":"
+
+
+def namespaced(key: str, task_id: str) -> str:
+    return f"{key}{SEPARATOR}{task_id}"
+
+
+def merge_plans(request: PortfolioRequest) -> List[Task]:
+    """Copy every task with a namespaced id and dependencies, dropping old dates.
+
+    Durations implied by a task's previous dates are kept so re-scheduling preserves
+    its length.
+
+    Raises:
+        ValidationError: On duplicate plan keys or cross-plan dependencies that name
+            unknown tasks.
+    """
+
+    keys = [item.key for item in request.plans]
+    if len(set(keys)) != len(keys):
+        raise ValidationError("Portfolio plan keys must be unique")
+
+    tasks: List[Task] = []
+    for item in request.plans:
+        for task in item.plan.tasks:
+            duration = task.duration_days
+            if duration is None and task.start_date and task.due_date:
+                duration = max((task.due_date - task.start_date).days, 1)
+            tasks.append(
+                task.model_copy(
+                    update={
+                        "id": namespaced(item.key, task.id),
+                        "depends_on": [namespaced(item.key, dep) for dep in task.depends_on],
+                        "start_date": None,
+                        "due_date": None,
+                        "duration_days": duration,
+                    }
+                )
+            )
+
+    if request.cross_plan_dependencies:
+        by_id = {task.id: task for task in tasks}
+        for task_id, prerequisites in request.cross_plan_dependencies.items():
+            task = by_id.get(task_id)
+            if task is None:
+                raise ValidationError(f"Cross-plan dependency names unknown task '{task_id}'")
+            task.depends_on = task.depends_on + [
+                dep for dep in prerequisites if dep not in task.depends_on
+            ]
+    return tasks
+
+
+def schedule_portfolio(
+    request: PortfolioRequest, fallback_start: date, default_horizon_days: int
+) -> PortfolioResponse:
+    """Merge the plans, schedule them in one pass and report cross-plan conflicts.
+
+    With ``owner_capacity`` the shared schedule is resource-levelled, so conflicts only
+    remain for owners that could not be levelled. Without it the schedule is
+    unconstrained and every day on which two plans give the same owner overlapping
+    work is reported.
+
+    Raises:
+        ValidationError: If the merged graph has unknown dependencies or a cycle.
+    """
+
+    with stage("merge"):
+        tasks = merge_plans(request)
+    with stage("validate"):
+        order = validate_dependencies(tasks)
+
+    horizon = request.horizon_days or max(
+        (item.plan.metadata.horizon_days or 0 for item in request.plans), default=0
+    )
+    horizon = horizon or default_horizon_days
+    start = request.start_date or fallback_start
+    with stage("schedule"):
+        if request.owner_capacity:
+            schedule = level_resources(
+                tasks, request.owner_capacity, start, horizon, order=order, in_place=True
+            )
+        else:
+            schedule = schedule_tasks(tasks, start, horizon, order=order, in_place=True)
+
+    with stage("conflicts"):
+        overloads = find_owner_overloads(
+            schedule.tasks,
+            request.owner_capacity or {},
+            default_capacity=None if request.owner_capacity else 1,
+        )
+    conflicts: List[PortfolioConflict] = []
+    for overload in overloads:
+        plans = sorted({task_id.split(SEPARATOR, 1)[0] for task_id in overload.task_ids})
+        if len(plans) > 1:
+            conflicts.append(
+                PortfolioConflict(
+                    owner=overload.owner,
+                    start_date=overload.start,
+                    end_date=overload.end,
+                    plans=plans,
+                    task_ids=overload.task_ids,
+                )
+            )
+
+    plan_finish: Dict[str, date] = {}
+    for task in schedule.tasks:
+        key = task.id.split(SEPARATOR, 1)[0]
+        finish: Optional[date] = plan_finish.get(key)
+        if finish is None or task.due_date > finish:
+            plan_finish[key] = task.due_date
+
+    logger.info(
+        f"Scheduled portfolio of {len(request.plans)} plans and {len(tasks)} tasks "
+        f"with {len(conflicts)} cross-plan conflicts"
+    )
+    metadata = PortfolioMetadata(
+        plans=[item.key for item in request.plans],
+        horizon_days=horizon,
+        critical_path=schedule.critical_path,
+        makespan_days=schedule.makespan_days,
+        owner_utilization=schedule.owner_utilization,
+        plan_finish=plan_finish,
+        conflicts=conflicts,
+    )
+    return PortfolioResponse.model_construct(metadata=metadata, tasks=schedule.tasks)
@@ -0,0 +1,239 @@
+"""
+Near-duplicate goal index used to reuse earlier plans without an LLM call.
+
+Goals (plus guidance) are normalized, reduced to word shingles and summarized with a
+MinHash signature; locality-sensitive hashing over signature bands finds candidates
+without scanning every entry. Durations are dropped during normalization because a
+reused plan is rescheduled for the new horizon anyway.
+"""
+from __future__ import annotations
+
+import hashlib
+import random
+import re
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from datetime import date
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from app.config import Settings
+
+NUM_PERMUTATIONS = 64
+BAND_ROWS = 4
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = random.Random(20240601)
+_PERMUTATIONS = [
+    (_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+    for _ in range(NUM_PERMUTATIONS)
+]
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and the our my your their its to for of in on at by with within into from "
+    "next over about around this that these those we i you they is are be it as".split()
+)
+_DURATION_UNITS = frozenset(
+    "day days week weeks month months year years quarter quarters hour hours".split()
+)
+_NUMBER_WORDS = frozenset(
+    "a an one two three four five six seven eight nine ten eleven twelve few couple".split()
+)
+_SYNONYMS = {
+    "ship": "launch",
+    "release": "launch",
+    "deploy": "launch",
+    "publish": "launch",
+    "rollout": "launch",
+    "develop": "build",
+    "create": "build",
+    "make": "build",
+    "application": "app",
+    "study": "learn",
+    "prep": "prepare",
+    "site": "website",
+    "webpage": "website",
+}
+
+
+@dataclass
+class SimilarityStats:
+    lookups: int = 0
+    reused: int = 0
+    indexed: int = 0
+    evictions: int = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return asdict(self)
+
+
+@dataclass
+class SimilarMatch:
+    score: float
+    goal: str
+    raw: Dict[str, Any]
+
+
+def undated(raw: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy of a raw plan with task dates removed and their spans kept as durations.
+
+    Model-supplied dates are fixed anchors for the scheduler, so a reused plan would
+    otherwise keep the earlier plan's calendar instead of fitting the new horizon.
+    """
+
+    tasks = []
+    for item in raw.get("tasks", []):
+        if not isinstance(item, dict):
+            tasks.append(item)
+            continue
+        task = {key: value for key, value in item.items() if key not in ("start_date", "due_date")}
+        if not task.get("duration_days") and item.get("start_date") and item.get("due_date"):
+            try:
+                span = date.fromisoformat(str(item["due_date"])) - date.fromisoformat(str(item["start_date"]))
+            except ValueError:
+                pass
+            else:
+                task["duration_days"] = max(span.days, 1)
+        tasks.append(task)
+    return {**raw, "tasks": tasks}
+
+
+def normalize_goal(text: str) -> List[str]:
+    """Lowercase content words with synonyms folded and durations removed."""
+
+    words = _TOKEN.findall(text.lower())
+    tokens = []
+    for index, token in enumerate(words):
+        following = words[index + 1] if index + 1 < len(words) else ""
+        # "3 months", "two weeks": both the amount and the unit go.
+        if token in _DURATION_UNITS or (
+            following in _DURATION_UNITS and (token.isdigit() or token in _NUMBER_WORDS)
+        ):
+            continue
+        if token in _STOPWORDS:
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(_SYNONYMS.get(token, token))
+    return tokens
+
+
+def shingles(tokens: List[str]) -> Set[str]:
+    """Words plus adjacent word pairs, so order matters a little but not much."""
+
+    found = set(tokens)
+    found.update(f"{a} {b}" for a, b in zip(tokens, tokens[1:]))
+    return found
+
+
+def minhash(features: Set[str]) -> Tuple[int, ...]:
+    hashes = [
+        int.from_bytes(hashlib.blake2b(f.encode(), digest_size=8).digest(), "big")
+        for f in features
+    ]
+    if not hashes:
+        return tuple([_MERSENNE_PRIME] * NUM_PERMUTATIONS)
+    return tuple(
+        min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in _PERMUTATIONS
+    )
+
+
+def estimated_similarity(left: Tuple[int, ...], right: Tuple[int, ...]) -> float:
+    """Share of equal MinHash slots, an estimate of the shingle Jaccard similarity."""
+
+    return sum(1 for a, b in zip(left, right) if a == b) / NUM_PERMUTATIONS
+
+
+@dataclass
+class _Entry:
+    goal: str
+    signature: Tuple[int, ...]
+    raw: Dict[str, Any]
+    task_count: int
+
+
+class GoalIndex:
+    """In-memory MinHash/LSH index of generated plans, FIFO-bounded to ``max_entries``.
+
+    Plans are stored without their dates (see ``undated``) so a match is rescheduled
+    for the request that reuses it.
+    """
+
+    def __init__(self, threshold: float = 0.8, max_entries: int = 1000) -> None:
+        self.threshold = threshold
+        self._max_entries = max_entries
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()
+        self._bands: Dict[Tuple[int, Tuple[int, ...]], Set[int]] = {}
+        self._next_id = 0
+        self.stats = SimilarityStats()
+
+    def add(self, text: str, raw: Dict[str, Any]) -> None:
+        features = shingles(normalize_goal(text))
+        if not features:
+            return
+        entry_id = self._next_id
+        self._next_id += 1
+        entry = _Entry(text, minhash(features), undated(raw), len(raw.get("tasks", [])))
+        self._entries[entry_id] = entry
+        for band in self._band_keys(entry.signature):
+            self._bands.setdefault(band, set()).add(entry_id)
+        self.stats.indexed += 1
+        if len(self._entries) > self._max_entries:
+            self._evict()
+
+    def lookup(self, text: str, task_count: Optional[int] = None) -> Optional[SimilarMatch]:
+        """Return the most similar entry at or above the threshold, if any.
+
+        With ``task_count`` set, only plans with exactly that many tasks qualify.
+        """
+
+        self.stats.lookups += 1
+        features = shingles(normalize_goal(text))
+        if not features:
+            return None
+        signature = minhash(features)
+        candidates: Set[int] = set()
+        for band in self._band_keys(signature):
+            candidates.update(self._bands.get(band, ()))
+
+        best: Optional[SimilarMatch] = None
+        for entry_id in candidates:
+            entry = self._entries[entry_id]
+            if task_count and entry.task_count != task_count:
+                continue
+            score = estimated_similarity(signature, entry.signature)
+            if score >= self.threshold and (best is None or score > best.score):
+                best = SimilarMatch(score=score, goal=entry.goal, raw=entry.raw)
+        if best is not None:
+            self.stats.reused += 1
+        return best
+
+    def _band_keys(self, signature: Tuple[int, ...]) -> List[Tuple[int, Tuple[int, ...]]]:
+        return [
+            (start, signature[start : start + BAND_ROWS])
+            for start in range(0, NUM_PERMUTATIONS, BAND_ROWS)
+        ]
+
+    def _evict(self) -> None:
+        entry_id, entry = self._entries.popitem(last=False)
+        for band in self._band_keys(entry.signature):
+            members = self._bands.get(band)
+            if members is not None:
+                members.discard(entry_id)
+                if not members:
+                    del self._bands[band]
+        self.stats.evictions += 1
+
+
+def goal_text(goal: str, guidance: Optional[str]) -> str:
+    return f"{goal}\n{guidance}" if guidance else goal
+
+
+def build_goal_index(settings: Settings) -> Optional[GoalIndex]:
+    """Create the index selected in settings, or ``None`` when reuse is disabled."""
+
+    backend = settings.similar_goal_backend.lower()
+    if backend == "memory":
+        return GoalIndex(settings.similar_goal_threshold, settings.similar_goal_max_entries)
+    if backend == "none":
+        return None
+    raise ValueError(f"Unknown similar goal backend '{settings.similar_goal_backend}'")
@@ -0,0 +1,50 @@
+"""
+Coalesces concurrent calls that share a fingerprint into one in-flight task.
+"""
+from __future__ import annotations
+
+import asyncio
+from dataclasses import asdict, dataclass
+from typing import Any, Awaitable, Callable, Dict
+
+
+@dataclass
+class SingleFlightStats:
+    originated: int = 0
+    coalesced: int = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return asdict(self)
+
+
+class SingleFlight:
+    """Run at most one ``factory()`` per key at a time and share its result.
+
+    Waiters are shielded from the shared task, so cancelling one caller never cancels
+    the work the others are still waiting on.
+    """
+
+    def __init__(self) -> None:
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.stats = SingleFlightStats()
+
+    async def run(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        if task is None:
+            self.stats.originated += 1
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            self.stats.coalesced += 1
+        return await asyncio.shield(task)
+
+    def inflight(self) -> int:
+        return len(self._inflight)
+
+    def _finish(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the exception as retrieved in case every waiter was cancelled.
+        if not task.cancelled():
+            task.exception()
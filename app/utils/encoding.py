@@ -0,0 +1,150 @@
+"""
+Response encodings for plans: JSON variants, MessagePack and a CSV task table.
+
+``orjson``, ``msgpack`` and ``brotli`` are optional; formats whose library is missing
+are simply not offered.
+"""
+from __future__ import annotations
+
+import csv
+import gzip
+import io
+from typing import Callable, Dict, Optional, Tuple
+
+from pydantic import BaseModel
+
+from app.schemas import PlanResponse, PortfolioResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+
+class UnsupportedFormat(ValueError):
+    """Raised when no acceptable encoding is available."""
+
+
+CSV_COLUMNS = (
+    "id",
+    "title",
+    "owner",
+    "start_date",
+    "due_date",
+    "duration_days",
+    "depends_on",
+    "confidence",
+    "reference_links",
+    "description",
+)
+
+
+def _encode_json(model: BaseModel) -> bytes:
+    return model.model_dump_json().encode()
+
+
+def _encode_orjson(model: BaseModel) -> bytes:
+    return orjson.dumps(model.model_dump())
+
+
+def _encode_msgpack(model: BaseModel) -> bytes:
+    return msgpack.packb(model.model_dump(mode="json"))
+
+
+def _encode_csv(model: BaseModel) -> bytes:
+    if not isinstance(model, (PlanResponse, PortfolioResponse)):
+        raise UnsupportedFormat("CSV export is only available for plans")
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_COLUMNS)
+    for task in model.tasks:
+        writer.writerow(
+            (
+                task.id,
+                task.title,
+                task.owner or "",
+                task.start_date.isoformat() if task.start_date else "",
+                task.due_date.isoformat() if task.due_date else "",
+                task.duration_days if task.duration_days is not None else "",
+                ";".join(task.depends_on),
+                task.confidence if task.confidence is not None else "",
+                " ".join(task.reference_links),
+                task.description or "",
+            )
+        )
+    return buffer.getvalue().encode()
+
+
+# format name -> (media type, encoder, available)
+FORMATS: Dict[str, Tuple[str, Callable[[BaseModel], bytes], bool]] = {
+    "json": ("application/json", _encode_json, True),
+    "orjson": ("application/json", _encode_orjson, orjson is not None),
+    "msgpack": ("application/msgpack", _encode_msgpack, msgpack is not None),
+    "csv": ("text/csv", _encode_csv, True),
+}
+
+_MEDIA_TYPES = {
+    "application/json": "json",
+    "application/msgpack": "msgpack",
+    "application/x-msgpack": "msgpack",
+    "text/csv": "csv",
+}
+
+
+def negotiate_format(accept: Optional[str], requested: Optional[str], default: str = "json") -> str:
+    """Pick an output format from an explicit ``format`` parameter or the Accept header."""
+
+    if requested:
+        name = requested.lower()
+        if name not in FORMATS or not FORMATS[name][2]:
+            raise UnsupportedFormat(f"Format '{requested}' is not available")
+        return name
+
+    best, best_q = None, 0.0
+    for part in (accept or "").split(","):
+        media, _, params = part.strip().partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        media = media.strip().lower()
+        name = default if media in ("*/*", "application/*", "") else _MEDIA_TYPES.get(media)
+        if name and FORMATS[name][2] and quality > best_q:
+            best, best_q = name, quality
+    if best is None and accept and "*/*" not in accept:
+        raise UnsupportedFormat(f"None of '{accept}' can be produced")
+    return best or default
+
+
+def encode(model: BaseModel, fmt: str) -> Tuple[bytes, str]:
+    """Return the encoded body and media type for ``fmt``."""
+
+    media_type, encoder, _ = FORMATS[fmt]
+    return encoder(model), media_type
+
+
+def compress(body: bytes, accept_encoding: Optional[str], min_size: int) -> Tuple[bytes, Optional[str]]:
+    """Compress ``body`` with brotli or gzip when accepted and large enough."""
+
+    if len(body) < min_size or not accept_encoding:
+        return body, None
+    accepted = {part.split(";")[0].strip().lower() for part in accept_encoding.split(",")}
+    if "br" in accepted and brotli is not None:
+        return brotli.compress(body, quality=4), "br"
+    if "gzip" in accepted:
+        return gzip.compress(body, compresslevel=5), "gzip"
+    return body, None
@@ -0,0 +1,313 @@
+"""
+Lightweight in-process metrics with Prometheus text exposition.
+
+Recording is a ``perf_counter`` call plus a bisect into fixed buckets, so stage timing
+costs a few microseconds per stage and nothing when disabled.
+"""
+from __future__ import annotations
+
+import bisect
+import math
+import time
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        if not self.labelnames:
+            self.labels()
+
+    def labels(self, *values: str):
+        child = self._children.get(values)
+        if child is None:
+            child = self._children[values] = self._new_child()
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _label_text(self, values: Tuple[str, ...], extra: str = "") -> str:
+        pairs = [f'{name}="{value}"' for name, value in zip(self.labelnames, values)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in sorted(self._children.items()):
+            lines.extend(self._render_child(values, child))
+        return lines
+
+    def _render_child(self, values: Tuple[str, ...], child) -> List[str]:
+        return [f"{self.name}{self._label_text(values)} {_format(child.value)}"]
+
+
+class _Value:
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self) -> _Value:
+        return _Value()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.labels().dec(amount)
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+
+class _Buckets:
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Tuple[float, ...]) -> None:
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, help_text, labelnames)
+
+    def _new_child(self) -> _Buckets:
+        return _Buckets(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def _render_child(self, values: Tuple[str, ...], child: _Buckets) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (math.inf,), child.counts):
+            cumulative += count
+            le = 'le="' + ("+Inf" if bound == math.inf else _format(bound)) + '"'
+            lines.append(f"{self.name}_bucket{self._label_text(values, le)} {cumulative}")
+        lines.append(f"{self.name}_sum{self._label_text(values)} {_format(child.sum)}")
+        lines.append(f"{self.name}_count{self._label_text(values)} {child.count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds metrics plus collectors that report point-in-time values at scrape time."""
+
+    def __init__(self) -> None:
+        self._metrics: List[_Metric] = []
+        self._collectors: Dict[str, Tuple[Optional[str], Callable[[], Dict]]] = {}
+        self.enabled = True
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(
+        self, name: str, collect: Callable[[], Dict], label: Optional[str] = None
+    ) -> None:
+        """Expose ``collect()`` values as gauges named ``<name>_<key>``; replaces by name.
+
+        With ``label``, ``collect()`` returns ``{label_value: {key: value}}`` and each
+        gauge carries ``label="label_value"``.
+        """
+
+        self._collectors[name] = (label, collect)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for prefix, (label, collect) in self._collectors.items():
+            values = collect() or {}
+            if label is None:
+                for key, value in values.items():
+                    lines.append(f"# TYPE {prefix}_{key} gauge")
+                    lines.append(f"{prefix}_{key} {_format(value)}")
+                continue
+            by_key: Dict[str, List[str]] = {}
+            for label_value, group in values.items():
+                for key, value in group.items():
+                    by_key.setdefault(key, []).append(
+                        f'{prefix}_{key}{{{label}="{label_value}"}} {_format(value)}'
+                    )
+            for key, samples in by_key.items():
+                lines.append(f"# TYPE {prefix}_{key} gauge")
+                lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+
+class RequestTimings:
+    """Per-request stage durations, rendered as a ``Server-Timing`` header."""
+
+    __slots__ = ("stages",)
+
+    def __init__(self) -> None:
+        self.stages: Dict[str, float] = {}
+
+    def record(self, stage: str, seconds: float) -> None:
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def header(self) -> str:
+        return ", ".join(f"{name};dur={seconds * 1000:.3f}" for name, seconds in self.stages.items())
+
+
+def _format(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.register(
+    Histogram("plan_stage_seconds", "Time spent in each plan generation stage", ["stage"])
+)
+PLAN_TASKS = REGISTRY.register(
+    Histogram(
+        "plan_tasks",
+        "Tasks per generated plan",
+        buckets=(1, 3, 5, 10, 20, 50, 100, 500, 1000, 10000),
+    )
+)
+PROVIDER_ERRORS = REGISTRY.register(
+    Counter("plan_provider_errors_total", "LLM provider calls that raised")
+)
+JSON_FAILURES = REGISTRY.register(
+    Counter("plan_json_failures_total", "LLM responses that were not valid JSON")
+)
+JSON_RECOVERED = REGISTRY.register(
+    Counter("plan_json_recovered_total", "Malformed LLM responses repaired without a retry")
+)
+LLM_RETRIES = REGISTRY.register(
+    Counter("plan_llm_retries_total", "LLM calls retried after an unrecoverable response")
+)
+LLM_QUEUE_WAIT = REGISTRY.register(
+    Histogram(
+        "plan_llm_queue_wait_seconds",
+        "Time LLM calls waited for a provider concurrency slot",
+        ["model"],
+    )
+)
+LLM_TOKENS = REGISTRY.register(
+    Counter("plan_llm_tokens_total", "Tokens reported by the model, by kind", ["kind"])
+)
+TIMELINE_CONFLICTS = REGISTRY.register(
+    Counter("plan_timeline_conflicts_total", "Timeline conflicts found after scheduling")
+)
+PLANS_IN_FLIGHT = REGISTRY.register(
+    Gauge("plan_requests_in_flight", "Plan generations currently running")
+)
+RESPONSE_BYTES = REGISTRY.register(
+    Histogram(
+        "plan_response_bytes",
+        "Encoded plan response size on the wire",
+        ["format", "encoding"],
+        buckets=(1_000, 10_000, 100_000, 1_000_000, 10_000_000, 100_000_000),
+    )
+)
+
+_current_timings: ContextVar[Optional[RequestTimings]] = ContextVar(
+    "plan_request_timings", default=None
+)
+
+
+class _Stage:
+    __slots__ = ("_name", "_started")
+
+    def __init__(self, name: str) -> None:
+        self._name = name
+
+    def __enter__(self) -> "_Stage":
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        elapsed = time.perf_counter() - self._started
+        STAGE_SECONDS.labels(self._name).observe(elapsed)
+        timings = _current_timings.get()
+        if timings is not None:
+            timings.record(self._name, elapsed)
+
+
+class _NoopStage:
+    def __enter__(self) -> "_NoopStage":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        return None
+
+
+_NOOP_STAGE = _NoopStage()
+
+
+def stage(name: str):
+    """Time a block as pipeline stage ``name``."""
+
+    return _Stage(name) if REGISTRY.enabled else _NOOP_STAGE
+
+
+def start_request_timings() -> RequestTimings:
+    """Begin collecting stage timings for the current request context."""
+
+    timings = RequestTimings()
+    _current_timings.set(timings)
+    return timings
+
+
+class StartupTimings:
+    """Worker startup costs, exported as the ``plan_startup`` gauges."""
+
+    def __init__(self) -> None:
+        self.provider_build_seconds: Optional[float] = None
+        self.warmup_seconds: Optional[float] = None
+        self.startup_seconds: Optional[float] = None
+        self.first_request_seconds: Optional[float] = None
+
+    def as_dict(self) -> Dict[str, float]:
+        return {key: value for key, value in vars(self).items() if value is not None}
+
+
+STARTUP = StartupTimings()
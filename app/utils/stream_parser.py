@@ -0,0 +1,173 @@
+"""
+Incremental and tolerant decoding of plan documents produced by the model.
+"""
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+
+class TaskStreamParser:
+    """Yield each object of the ``tasks`` array as soon as its closing brace arrives.
+
+    The parser tracks JSON nesting and string state across chunks, so it tolerates
+    arbitrary chunk boundaries. Both ``{"tasks": [...]}`` documents and bare task
+    arrays are recognised.
+    """
+
+    def __init__(self) -> None:
+        self._text = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = -1
+        self._last_string: Optional[str] = None
+        self._pending_key: Optional[str] = None
+        self._tasks_depth: Optional[int] = None
+        self._tasks_closed = False
+        self._task_start = -1
+        self._metadata_start = -1
+        self.metadata: Optional[Dict[str, Any]] = None
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """Consume ``chunk`` and return any task objects completed by it."""
+
+        self._text += chunk
+        text = self._text
+        completed: List[Dict[str, Any]] = []
+
+        for i in range(self._pos, len(text)):
+            ch = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    self._last_string = text[self._string_start + 1 : i]
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                self._string_start = i
+            elif ch == ":" and self._depth == 1:
+                self._pending_key = self._last_string
+            elif ch == "," and self._depth == 1:
+                self._pending_key = None
+            elif ch in "{[":
+                self._depth += 1
+                if ch == "[" and self._tasks_depth is None and not self._tasks_closed and (
+                    self._depth == 1 or (self._depth == 2 and self._pending_key == "tasks")
+                ):
+                    self._tasks_depth = self._depth
+                elif (
+                    ch == "{"
+                    and self._tasks_depth is not None
+                    and self._depth == self._tasks_depth + 1
+                ):
+                    self._task_start = i
+                elif ch == "{" and self._depth == 2 and self._pending_key == "metadata":
+                    self._metadata_start = i
+            elif ch in "}]":
+                if ch == "}" and self._task_start >= 0 and self._depth == self._tasks_depth + 1:
+                    try:
+                        completed.append(json.loads(text[self._task_start : i + 1]))
+                    except json.JSONDecodeError:
+                        pass
+                    self._task_start = -1
+                elif ch == "}" and self._metadata_start >= 0 and self._depth == 2:
+                    try:
+                        self.metadata = json.loads(text[self._metadata_start : i + 1])
+                    except json.JSONDecodeError:
+                        pass
+                    self._metadata_start = -1
+                elif ch == "]" and self._depth == self._tasks_depth:
+                    self._tasks_depth = None
+                    self._tasks_closed = True
+                self._depth -= 1
+
+        self._pos = len(text)
+        return completed
+
+    def document(self) -> Optional[Any]:
+        """Return the full parsed document once the stream has ended, if valid."""
+
+        try:
+            return json.loads(clean_json_text(self._text))
+        except json.JSONDecodeError:
+            return None
+
+
+@dataclass
+class DecodedPlan:
+    plan: Any
+    recovered: bool = False
+
+
+def strip_markdown_fences(text: str) -> str:
+    """Remove a surrounding ```json ... ``` block if present."""
+
+    text = text.strip()
+    if text.startswith("```"):
+        text = text[3:]
+        if text[:4].lower() == "json":
+            text = text[4:]
+        if text.rstrip().endswith("```"):
+            text = text.rstrip()[:-3]
+    return text.strip()
+
+
+def remove_trailing_commas(text: str) -> str:
+    """Drop commas directly before a closing brace or bracket, ignoring string contents."""
+
+    out: List[str] = []
+    in_string = escape = False
+    length = len(text)
+    for i, ch in enumerate(text):
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch == ",":
+            j = i + 1
+            while j < length and text[j] in " \t\r\n":
+                j += 1
+            if j < length and text[j] in "}]":
+                continue
+        out.append(ch)
+    return "".join(out)
+
+
+def clean_json_text(text: str) -> str:
+    return remove_trailing_commas(strip_markdown_fences(text))
+
+
+def decode_plan(text: str) -> Optional[DecodedPlan]:
+    """Decode a model response, salvaging complete tasks from truncated output.
+
+    Returns ``None`` only when neither the document nor any task object can be read.
+    """
+
+    cleaned = clean_json_text(text)
+    try:
+        return DecodedPlan(plan=json.loads(cleaned))
+    except json.JSONDecodeError:
+        pass
+
+    parser = TaskStreamParser()
+    tasks = parser.feed(cleaned)
+    if not tasks:
+        return None
+    metadata = dict(parser.metadata or {})
+    assumptions = list(metadata.get("assumptions") or [])
+    assumptions.append(f"Recovered {len(tasks)} complete task(s) from a truncated model response.")
+    metadata["assumptions"] = assumptions
+    return DecodedPlan(plan={"metadata": metadata, "tasks": tasks}, recovered=True)
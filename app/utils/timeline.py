@@ -1,39 +1,252 @@
 from __future__ import annotations
 
-from datetime import date, timedelta
-from typing import Iterable, List
+import heapq
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Dict, Iterable, List, Mapping, Optional
 
 from app.schemas import Task
+from app.utils.validation import ValidationError, validate_dependencies
 
 
-def backfill_dates(tasks: Iterable[Task], fallback_start: date, horizon_days: int) -> List[Task]:
-    """Ensure every task has dates within the planning horizon.
+@dataclass
+class Schedule:
+    """Result of a critical-path pass over a plan."""
+
+    tasks: List[Task]
+    order: List[str] = field(default_factory=list)
+    slack_days: Dict[str, int] = field(default_factory=dict)
+    critical_path: List[str] = field(default_factory=list)
+    finish: Optional[date] = None
+    makespan_days: Optional[int] = None
+    owner_utilization: Dict[str, float] = field(default_factory=dict)
+
+
+def schedule_tasks(
+    tasks: Iterable[Task],
+    fallback_start: date,
+    horizon_days: int,
+    order: Optional[List[str]] = None,
+    in_place: bool = False,
+) -> Schedule:
+    """Place every task at its earliest dependency-respecting start and find the critical path.
 
-    When the language model omits scheduling data, we distribute remaining tasks evenly
-    across the available timeline while respecting declared dependencies.
+    A forward pass over the topological order computes earliest start/finish, so
+    independent tasks run in parallel lanes and no task starts before its prerequisites
+    finish. A backward pass computes latest start and slack. Tasks without a duration
+    share the horizon evenly along the longest chain. Both passes are O(V+E).
+
+    ``order`` may be the topological order already returned by ``validate_dependencies``;
+    when omitted it is computed here, and an invalid graph falls back to input order with
+    dependencies on not-yet-placed tasks ignored. With ``in_place`` the caller's tasks
+    receive their dates directly instead of being copied.
     """
 
-    scheduled: List[Task] = []
-    remaining_days = max(horizon_days, 1)
     tasks_list = list(tasks)
-    unscheduled = [task for task in tasks_list if not task.start_date or not task.due_date]
+    if not tasks_list:
+        return Schedule(tasks=[])
 
-    if not unscheduled:
-        return tasks_list
-
-    slot = max(1, remaining_days // max(len(unscheduled), 1))
-    current_start = fallback_start
+    position = {task.id: i for i, task in enumerate(tasks_list)}
+    if order is None:
+        try:
+            order = validate_dependencies(tasks_list)
+        except ValidationError:
+            order = None
+    if order is not None:
+        sequence = [position[task_id] for task_id in order]
+        preds = [[position[dep] for dep in task.depends_on] for task in tasks_list]
+    else:
+        sequence = list(range(len(tasks_list)))
+        preds = [
+            [position[dep] for dep in task.depends_on if position.get(dep, i) < i]
+            for i, task in enumerate(tasks_list)
+        ]
 
+    # Durations in days; None marks tasks that take an even share of the horizon.
+    durations: List[Optional[int]] = []
     for task in tasks_list:
-        if task in unscheduled:
-            start = task.start_date or current_start
-            duration = task.duration_days or slot
-            due = task.due_date or start + timedelta(days=duration)
-            if due < start:
-                due = start + timedelta(days=max(duration, 1))
-            scheduled.append(task.copy(update={"start_date": start, "due_date": due}))
-            current_start = due + timedelta(days=1)
+        if task.start_date and task.due_date:
+            durations.append(max((task.due_date - task.start_date).days, 0))
         else:
-            scheduled.append(task)
+            durations.append(task.duration_days)
+
+    chain = [0] * len(tasks_list)
+    for i in sequence:
+        longest = max((chain[p] for p in preds[i]), default=0)
+        chain[i] = longest + (1 if durations[i] is None else 0)
+    slot = max(1, max(horizon_days, 1) // max(max(chain), 1))
+
+    base = fallback_start.toordinal()
+    earliest_start = [0] * len(tasks_list)
+    earliest_finish = [0] * len(tasks_list)
+    for i in sequence:
+        task = tasks_list[i]
+        duration = durations[i] if durations[i] is not None else slot
+        durations[i] = duration
+        lower = task.start_date.toordinal() if task.start_date else base
+        start = max([lower] + [earliest_finish[p] + 1 for p in preds[i]])
+        finish = start + duration
+        if task.due_date and not task.start_date and task.due_date.toordinal() >= start:
+            finish = task.due_date.toordinal()
+            durations[i] = finish - start
+        earliest_start[i] = start
+        earliest_finish[i] = finish
+
+    project_finish = max(earliest_finish)
+    latest_finish = [project_finish] * len(tasks_list)
+    slack = [0] * len(tasks_list)
+    for i in reversed(sequence):
+        latest_start = latest_finish[i] - durations[i]
+        slack[i] = latest_start - earliest_start[i]
+        for p in preds[i]:
+            if latest_start - 1 < latest_finish[p]:
+                latest_finish[p] = latest_start - 1
+
+    critical_path: List[int] = []
+    node = next(
+        (i for i in sequence if earliest_finish[i] == project_finish and slack[i] == 0), None
+    )
+    while node is not None:
+        critical_path.append(node)
+        node = next(
+            (
+                p
+                for p in preds[node]
+                if slack[p] == 0 and earliest_finish[p] + 1 == earliest_start[node]
+            ),
+            None,
+        )
+
+    scheduled: List[Task] = []
+    for i, task in enumerate(tasks_list):
+        start = date.fromordinal(earliest_start[i])
+        due = date.fromordinal(earliest_finish[i])
+        if task.start_date != start or task.due_date != due:
+            task = _with_dates(task, start, due, in_place)
+        scheduled.append(task)
+
+    return Schedule(
+        tasks=scheduled,
+        order=[tasks_list[i].id for i in sequence],
+        slack_days={tasks_list[i].id: slack[i] for i in sequence},
+        critical_path=[tasks_list[i].id for i in reversed(critical_path)],
+        finish=date.fromordinal(project_finish),
+        makespan_days=project_finish - min(earliest_start),
+    )
+
+
+def level_resources(
+    tasks: Iterable[Task],
+    owner_capacity: Mapping[str, int],
+    fallback_start: date,
+    horizon_days: int,
+    order: Optional[List[str]] = None,
+    in_place: bool = False,
+) -> Schedule:
+    """Schedule tasks so no owner runs more than its capacity of tasks at once.
+
+    Starts from the unconstrained critical-path schedule, then performs serial list
+    scheduling: ready tasks are taken from a heap ordered by slack (critical work
+    first), and each capacity-limited owner keeps a heap of slot release days. Runs in
+    O((V+E) log V). Owners are matched case-insensitively; owners missing from
+    ``owner_capacity`` and tasks without an owner are unconstrained.
+    """
+
+    tasks_list = list(tasks)
+    base_schedule = schedule_tasks(
+        tasks_list, fallback_start, horizon_days, order=order, in_place=in_place
+    )
+    if not tasks_list:
+        return base_schedule
+
+    capacity = {owner.strip().lower(): max(limit, 1) for owner, limit in owner_capacity.items()}
+    position = {task_id: i for i, task_id in enumerate(base_schedule.order)}
+    index = {task.id: i for i, task in enumerate(tasks_list)}
+    planned = base_schedule.tasks
+    durations = [(t.due_date - t.start_date).days for t in planned]
+    preds = [
+        [
+            index[dep]
+            for dep in task.depends_on
+            if dep in position and position[dep] < position[task.id]
+        ]
+        for task in tasks_list
+    ]
+    dependents: List[List[int]] = [[] for _ in tasks_list]
+    for i, deps in enumerate(preds):
+        for p in deps:
+            dependents[p].append(i)
+
+    base = fallback_start.toordinal()
+    remaining = [len(deps) for deps in preds]
+    release = [
+        task.start_date.toordinal() if task.start_date else base for task in tasks_list
+    ]
+    priority = [(base_schedule.slack_days[t.id], position[t.id]) for t in tasks_list]
+    ready = [(*priority[i], i) for i in range(len(tasks_list)) if remaining[i] == 0]
+    heapq.heapify(ready)
+    slots: Dict[str, List[int]] = {owner: [] for owner in capacity}
+    busy_days: Dict[str, int] = {owner: 0 for owner in capacity}
+    start = [0] * len(tasks_list)
+    finish = [0] * len(tasks_list)
+
+    while ready:
+        _, _, i = heapq.heappop(ready)
+        begin = release[i]
+        owner = (tasks_list[i].owner or "").strip().lower()
+        if owner in capacity:
+            owner_slots = slots[owner]
+            if len(owner_slots) >= capacity[owner]:
+                begin = max(begin, heapq.heappop(owner_slots) + 1)
+            heapq.heappush(owner_slots, begin + durations[i])
+            busy_days[owner] += durations[i] + 1
+        start[i] = begin
+        finish[i] = begin + durations[i]
+        for child in dependents[i]:
+            release[child] = max(release[child], finish[i] + 1)
+            remaining[child] -= 1
+            if remaining[child] == 0:
+                heapq.heappush(ready, (*priority[child], child))
+
+    first, last = min(start), max(finish)
+    span = last - first + 1
+    leveled: List[Task] = []
+    for i, task in enumerate(planned):
+        begin, end = date.fromordinal(start[i]), date.fromordinal(finish[i])
+        if task.start_date != begin or task.due_date != end:
+            task = _with_dates(task, begin, end, in_place)
+        leveled.append(task)
+
+    return Schedule(
+        tasks=leveled,
+        order=base_schedule.order,
+        slack_days=base_schedule.slack_days,
+        critical_path=base_schedule.critical_path,
+        finish=date.fromordinal(last),
+        makespan_days=last - first,
+        owner_utilization={
+            owner: round(busy_days[owner] / (capacity[owner] * span), 3) for owner in capacity
+        },
+    )
+
+
+def _with_dates(task: Task, start: date, due: date, in_place: bool) -> Task:
+    if not in_place:
+        return task.model_copy(update={"start_date": start, "due_date": due})
+    # The task is already validated, so skip another model round-trip (and pydantic's
+    # comparatively slow __setattr__) and write the two dates directly.
+    task.__dict__["start_date"] = start
+    task.__dict__["due_date"] = due
+    task.__pydantic_fields_set__.update(("start_date", "due_date"))
+    return task
+
+
+def backfill_dates(tasks: Iterable[Task], fallback_start: date, horizon_days: int) -> List[Task]:
+    """Ensure every task has dates within the planning horizon.
+
+    When the language model omits scheduling data, tasks are placed by the critical-path
+    scheduler so dependent work starts after its prerequisites and independent work
+    runs in parallel.
+    """
 
-    return scheduled
+    return schedule_tasks(tasks, fallback_start, horizon_days).tasks
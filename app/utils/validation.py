@@ -1,56 +1,136 @@
 """
 Validation utilities for task plans to ensure logical consistency.
 """
-from typing import List, Set, Tuple
+from collections import deque
+from datetime import date, timedelta
+from typing import Dict, List, Mapping, NamedTuple, Optional, Set, Tuple
 from app.schemas import Task
 
 
 class ValidationError(Exception):
     """Raised when task plan validation fails."""
-    pass
 
+    def __init__(self, message: str, cycle: Optional[List[str]] = None) -> None:
+        super().__init__(message)
+        self.cycle = cycle or []
 
-def validate_dependencies(tasks: List[Task]) -> None:
+
+def validate_dependencies(tasks: List[Task]) -> List[str]:
     """
     Ensure all dependencies reference valid task IDs and contain no cycles.
     
+    Runs Kahn's algorithm over an id index, so the check is O(V+E) and iterative.
+    
+    Returns:
+        Task IDs in topological order (prerequisites first, ties kept in input order).
+    
     Raises:
-        ValidationError: If invalid dependencies or cycles detected.
+        ValidationError: If duplicate IDs, invalid dependencies or cycles detected.
+            For cycles, ``cycle`` holds the full path, e.g. ``['T1', 'T2', 'T1']``.
     """
-    task_ids = {task.id for task in tasks}
+    position: Dict[str, int] = {}
+    for i, task in enumerate(tasks):
+        if position.setdefault(task.id, i) != i:
+            raise ValidationError(f"Duplicate task id '{task.id}'")
     
-    # Check all dependencies reference valid IDs
-    for task in tasks:
+    # Check all dependencies reference valid IDs and build integer adjacency lists;
+    # repeated IDs in depends_on become parallel edges, which Kahn's algorithm handles.
+    dependents: List[List[int]] = [[] for _ in tasks]
+    indegree: List[int] = [0] * len(tasks)
+    for i, task in enumerate(tasks):
         for dep_id in task.depends_on:
-            if dep_id not in task_ids:
+            dep = position.get(dep_id)
+            if dep is None:
                 raise ValidationError(
                     f"Task '{task.id}' depends on non-existent task '{dep_id}'"
                 )
+            dependents[dep].append(i)
+        indegree[i] = len(task.depends_on)
+    
+    ready = deque(i for i, degree in enumerate(indegree) if degree == 0)
+    order: List[int] = []
+    while ready:
+        node = ready.popleft()
+        order.append(node)
+        for child in dependents[node]:
+            indegree[child] -= 1
+            if indegree[child] == 0:
+                ready.append(child)
+    
+    if len(order) < len(tasks):
+        cycle = _find_cycle(tasks, position, indegree)
+        raise ValidationError(
+            f"Circular dependency detected: {' -> '.join(cycle)}",
+            cycle=cycle,
+        )
+    return [tasks[i].id for i in order]
+
+
+def _find_cycle(tasks: List[Task], position: Dict[str, int], indegree: List[int]) -> List[str]:
+    """Walk unresolved dependencies until a node repeats; every leftover node has one."""
+    node = next(i for i, degree in enumerate(indegree) if degree > 0)
+    seen: Dict[int, int] = {}
+    path: List[int] = []
+    while node not in seen:
+        seen[node] = len(path)
+        path.append(node)
+        node = next(
+            position[dep] for dep in tasks[node].depends_on if indegree[position[dep]] > 0
+        )
+    # Dependencies point backwards in time, so reverse to read as "runs before".
+    cycle = [tasks[i].id for i in path[seen[node]:] + [node]]
+    return cycle[::-1]
+
+
+def validate_changed_dependencies(tasks: List[Task], changed_ids: Set[str]) -> None:
+    """
+    Re-validate a previously valid plan after ``changed_ids`` were added or replaced.
     
-    # Check for cycles using DFS
-    def has_cycle(node: str, visited: Set[str], rec_stack: Set[str]) -> bool:
-        visited.add(node)
-        rec_stack.add(node)
-        
-        task = next((t for t in tasks if t.id == node), None)
-        if task:
-            for dep in task.depends_on:
-                if dep not in visited:
-                    if has_cycle(dep, visited, rec_stack):
-                        return True
-                elif dep in rec_stack:
-                    return True
-        
-        rec_stack.remove(node)
-        return False
+    Only the changed tasks' references are checked, and any new cycle must pass through
+    a changed task, so cycle detection walks just their dependency ancestry.
     
-    visited: Set[str] = set()
+    Raises:
+        ValidationError: If duplicate IDs, invalid dependencies or cycles detected.
+    """
+    index: Dict[str, Task] = {}
     for task in tasks:
-        if task.id not in visited:
-            if has_cycle(task.id, visited, set()):
+        if task.id in changed_ids and task.id in index:
+            raise ValidationError(f"Duplicate task id '{task.id}'")
+        index.setdefault(task.id, task)
+    
+    for task_id in changed_ids:
+        for dep_id in index[task_id].depends_on:
+            if dep_id not in index:
+                raise ValidationError(
+                    f"Task '{task_id}' depends on non-existent task '{dep_id}'"
+                )
+    
+    # Iterative three-colour DFS over depends_on, starting from each changed task.
+    done: Set[str] = set()
+    for root in changed_ids:
+        if root in done:
+            continue
+        path: List[str] = [root]
+        on_path: Dict[str, int] = {root: 0}
+        stack = [iter(index[root].depends_on)]
+        while stack:
+            dep_id = next(stack[-1], None)
+            if dep_id is None:
+                stack.pop()
+                finished = path.pop()
+                del on_path[finished]
+                done.add(finished)
+                continue
+            if dep_id in on_path:
+                cycle = (path[on_path[dep_id]:] + [dep_id])[::-1]
                 raise ValidationError(
-                    f"Circular dependency detected involving task '{task.id}'"
+                    f"Circular dependency detected: {' -> '.join(cycle)}",
+                    cycle=cycle,
                 )
+            if dep_id not in done:
+                on_path[dep_id] = len(path)
+                path.append(dep_id)
+                stack.append(iter(index[dep_id].depends_on))
 
 
 def validate_timeline(tasks: List[Task]) -> List[Tuple[str, str]]:
@@ -81,3 +161,78 @@ def validate_timeline(tasks: List[Task]) -> List[Tuple[str, str]]:
                 ))
     
     return conflicts
+
+
+class Overload(NamedTuple):
+    """A run of days on which an owner has more concurrent tasks than capacity."""
+
+    owner: str
+    start: date
+    end: date
+    task_ids: List[str]
+
+
+def find_owner_overloads(
+    tasks: List[Task],
+    owner_capacity: Mapping[str, int],
+    default_capacity: Optional[int] = None,
+) -> List[Overload]:
+    """
+    Find days on which an owner runs more tasks at once than its capacity allows.
+    
+    Tasks are indexed by owner and each owner's intervals are swept in date order, so
+    the check is O(n log n) rather than comparing every pair of tasks. Task dates are
+    inclusive, matching the scheduler. Owners are matched case-insensitively; owners
+    missing from ``owner_capacity`` use ``default_capacity``, or are unconstrained
+    when it is ``None``.
+    
+    Returns:
+        One ``Overload`` per maximal run of overloaded days, listing every task active
+        during the run.
+    """
+    capacity = {owner.strip().lower(): limit for owner, limit in owner_capacity.items()}
+    by_owner: Dict[str, List[Tuple[int, int, int]]] = {}
+    for i, task in enumerate(tasks):
+        owner = (task.owner or "").strip().lower()
+        if not owner or not task.start_date or not task.due_date:
+            continue
+        if capacity.get(owner, default_capacity) is None:
+            continue
+        events = by_owner.setdefault(owner, [])
+        # Releases sort before arrivals on the same day: (day, 0) < (day, 1).
+        events.append((task.start_date.toordinal(), 1, i))
+        events.append((task.due_date.toordinal() + 1, 0, i))
+
+    overloads: List[Overload] = []
+    for owner, events in by_owner.items():
+        limit = capacity.get(owner, default_capacity)
+        events.sort()
+        active: Dict[int, None] = {}
+        members: Dict[int, None] = {}
+        opened: Optional[int] = None
+        for n, (day, kind, i) in enumerate(events):
+            if kind:
+                active[i] = None
+                if opened is not None:
+                    members[i] = None
+            else:
+                del active[i]
+            if n + 1 < len(events) and events[n + 1][0] == day:
+                continue
+            # All events for ``day`` are applied; compare the load against capacity.
+            if len(active) > limit:
+                if opened is None:
+                    opened = day
+                    members = dict(active)
+            elif opened is not None:
+                overloads.append(
+                    Overload(
+                        owner=owner,
+                        start=date.fromordinal(opened),
+                        end=date.fromordinal(day) - timedelta(days=1),
+                        task_ids=[tasks[i].id for i in members],
+                    )
+                )
+                opened = None
+    return overloads
+
@@ -0,0 +1,56 @@
+"""Compare per-task validation and copying with the bulk assembly path.
+
+"legacy" mirrors the original pipeline: ``Task.model_validate`` per task, copied
+dates, and FastAPI's dump-and-revalidate of the response model. "bulk" validates the
+array with ``TASK_LIST_ADAPTER``, schedules in place, and serializes without
+re-validation.
+
+Run with ``python -m benchmarks.bench_assembly``.
+"""
+from __future__ import annotations
+
+import time
+from datetime import date
+from typing import Any, Callable, Dict, List
+
+from app.schemas import TASK_LIST_ADAPTER, PlanMetadata, PlanResponse, Task
+from app.utils.timeline import schedule_tasks
+from benchmarks.fakes import synthetic_raw_tasks
+
+
+def legacy(raw: List[Dict[str, Any]]) -> bytes:
+    tasks = [Task.model_validate(task) for task in raw]
+    tasks = schedule_tasks(tasks, date.today(), horizon_days=90).tasks
+    response = PlanResponse(metadata=PlanMetadata(goal="bench"), tasks=tasks)
+    return PlanResponse.model_validate(response.model_dump()).model_dump_json().encode()
+
+
+def bulk(raw: List[Dict[str, Any]]) -> bytes:
+    tasks = TASK_LIST_ADAPTER.validate_python(raw)
+    tasks = schedule_tasks(tasks, date.today(), horizon_days=90, in_place=True).tasks
+    response = PlanResponse.model_construct(metadata=PlanMetadata(goal="bench"), tasks=tasks)
+    return response.model_dump_json().encode()
+
+
+def best_of(fn: Callable[[], Any], runs: int = 3) -> float:
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return min(timings)
+
+
+def main() -> None:
+    for size in (1_000, 10_000, 50_000):
+        raw = synthetic_raw_tasks(size)
+        before = best_of(lambda: legacy(raw))
+        after = best_of(lambda: bulk(raw))
+        print(
+            f"n={size:>6}: legacy {before:8.1f} ms  bulk {after:8.1f} ms  "
+            f"({before / after:.2f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""Compare serialization time and payload size of each plan response format.
+
+Formats whose optional library is not installed are skipped. Compressed sizes are
+reported for gzip, and for brotli when it is available.
+
+Run with ``python -m benchmarks.bench_encoding``.
+"""
+from __future__ import annotations
+
+import gzip
+from datetime import date
+
+from app.schemas import TASK_LIST_ADAPTER, PlanMetadata, PlanResponse
+from app.utils import encoding
+from app.utils.timeline import schedule_tasks
+from benchmarks.bench_assembly import best_of
+from benchmarks.fakes import synthetic_raw_tasks
+
+
+def build_plan(size: int) -> PlanResponse:
+    tasks = TASK_LIST_ADAPTER.validate_python(synthetic_raw_tasks(size))
+    tasks = schedule_tasks(tasks, date.today(), horizon_days=90, in_place=True).tasks
+    return PlanResponse.model_construct(metadata=PlanMetadata(goal="bench"), tasks=tasks)
+
+
+def main() -> None:
+    for size in (1_000, 10_000, 50_000):
+        plan = build_plan(size)
+        print(f"n={size}")
+        for name, (_, encoder, available) in encoding.FORMATS.items():
+            if not available:
+                print(f"  {name:<8} unavailable")
+                continue
+            elapsed = best_of(lambda: encoder(plan))
+            body = encoder(plan)
+            line = (
+                f"  {name:<8} {elapsed:8.1f} ms  {len(body) / 1024:9.1f} KiB  "
+                f"gzip {len(gzip.compress(body, compresslevel=5)) / 1024:8.1f} KiB"
+            )
+            if encoding.brotli is not None:
+                line += f"  br {len(encoding.brotli.compress(body, quality=4)) / 1024:8.1f} KiB"
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Measure cold-start cost: importing the app and serving the first request.
+
+Each sample runs in a fresh interpreter so module caches do not hide import time.
+Mock mode is used, so the model SDK should not be imported at all.
+
+Run with ``python -m benchmarks.bench_startup``.
+"""
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+from statistics import median
+from typing import Dict, List
+
+_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import app.main
+imported = time.perf_counter() - started
+from fastapi.testclient import TestClient
+with TestClient(app.main.app) as client:
+    lifespan = app.main.STARTUP.startup_seconds
+    begin = time.perf_counter()
+    client.post("/plan", json={"goal": "Cold start"}).raise_for_status()
+    first = time.perf_counter() - begin
+print(json.dumps({
+    "import_seconds": imported,
+    "startup_seconds": lifespan,
+    "first_request_seconds": first,
+    "sdk_imported": "google.generativeai" in sys.modules,
+}))
+"""
+
+
+def sample() -> Dict[str, float]:
+    env = dict(
+        os.environ,
+        SMART_TASK_PLANNER_MOCK="true",
+        PLAN_STORE_BACKEND="none",
+        PLAN_CACHE_BACKEND="none",
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", _PROBE], env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(runs: int = 5) -> None:
+    samples: List[Dict[str, float]] = [sample() for _ in range(runs)]
+    for key in ("import_seconds", "startup_seconds", "first_request_seconds"):
+        print(f"{key:<22} median {median(s[key] for s in samples) * 1000:8.1f} ms")
+    print(f"model SDK imported:    {any(s['sdk_imported'] for s in samples)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+"""Time the critical-path scheduler on synthetic plans.
+
+Run with ``python -m benchmarks.bench_timeline``.
+"""
+from __future__ import annotations
+
+import time
+from datetime import date
+
+from app.utils.timeline import schedule_tasks
+from app.utils.validation import validate_dependencies, validate_timeline
+from benchmarks.fakes import synthetic_plan
+
+
+def main() -> None:
+    for size in (1_000, 10_000, 50_000, 100_000):
+        tasks = synthetic_plan(size)
+        started = time.perf_counter()
+        order = validate_dependencies(tasks)
+        schedule = schedule_tasks(tasks, date.today(), horizon_days=90, order=order)
+        elapsed = (time.perf_counter() - started) * 1000
+        assert not validate_timeline(schedule.tasks)
+        print(
+            f"schedule_tasks n={size:>7}: {elapsed:8.1f} ms "
+            f"(critical path {len(schedule.critical_path)} tasks)"
+        )
+
+
+if __name__ == "__main__":
+    main()
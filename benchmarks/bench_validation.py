@@ -0,0 +1,24 @@
+"""Time dependency validation on synthetic plans.
+
+Run with ``python -m benchmarks.bench_validation``.
+"""
+from __future__ import annotations
+
+import time
+
+from app.utils.validation import validate_dependencies
+from benchmarks.fakes import synthetic_plan
+
+
+def main() -> None:
+    for size in (10_000, 25_000, 50_000, 100_000):
+        tasks = synthetic_plan(size)
+        started = time.perf_counter()
+        order = validate_dependencies(tasks)
+        elapsed = (time.perf_counter() - started) * 1000
+        assert len(order) == size
+        print(f"validate_dependencies n={size:>7}: {elapsed:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
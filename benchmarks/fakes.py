@@ -0,0 +1,61 @@
+"""Synthetic plans and fake providers for offline benchmarking."""
+from __future__ import annotations
+
+import asyncio
+import random
+from typing import Any, Dict, List, Optional
+
+from app.llm.provider import MockPlanner
+from app.schemas import Task
+
+
+def synthetic_raw_tasks(size: int, max_deps: int = 3, seed: int = 7) -> List[Dict[str, Any]]:
+    """Build raw task dicts forming a random DAG over earlier tasks."""
+
+    rng = random.Random(seed)
+    tasks = []
+    for i in range(size):
+        deps = [f"T{rng.randrange(i)}" for _ in range(rng.randint(0, max_deps))] if i else []
+        tasks.append(
+            {
+                "id": f"T{i}",
+                "title": f"Task {i}",
+                "owner": f"Role {i % 12}",
+                "duration_days": rng.randint(1, 5),
+                "depends_on": sorted(set(deps)),
+            }
+        )
+    return tasks
+
+
+def synthetic_plan(size: int, max_deps: int = 3, seed: int = 7) -> List[Task]:
+    """Build validated tasks where each depends on up to ``max_deps`` earlier tasks."""
+
+    return [Task.model_validate(task) for task in synthetic_raw_tasks(size, max_deps, seed)]
+
+
+class LatencyPlanner(MockPlanner):
+    """Mock planner that sleeps like a remote model and returns ``task_count`` tasks."""
+
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0, task_count: int = 3) -> None:
+        self._latency = latency_ms / 1000
+        self._jitter = jitter_ms / 1000
+        self._task_count = task_count
+        self._tasks = synthetic_raw_tasks(task_count)
+
+    async def generate_plan(
+        self, prompt: str, schema: Dict[str, Any], max_output_tokens: Optional[int] = None
+    ) -> Dict[str, Any]:
+        delay = self._latency + random.uniform(0, self._jitter)
+        if delay:
+            await asyncio.sleep(delay)
+        return self._plan()
+
+    def _plan(self) -> Dict[str, Any]:
+        return {
+            "metadata": {"planning_strategy": "synthetic benchmark plan", "assumptions": []},
+            "tasks": self._tasks,
+        }
+
+    def name(self) -> str:
+        return f"latency-planner-{self._task_count}"
@@ -0,0 +1,189 @@
+"""Offline benchmark suite for the planning pipeline.
+
+Measures latency percentiles and throughput for the post-processing utilities on
+synthetic plans, for ``PlanService.generate`` against fake providers, and for the
+full ``/plan`` path under concurrent load through an in-process ASGI client. Results
+are written as JSON so runs from different releases can be diffed.
+
+Run with ``python -m benchmarks.run --output bench.json``.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import sys
+import time
+from datetime import date, datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+from app.main import app, get_service
+from app.schemas import PlanRequest
+from app.services.plan_service import PlanService
+from app.utils.timeline import backfill_dates
+from app.utils.validation import validate_dependencies, validate_timeline
+from benchmarks.fakes import LatencyPlanner, synthetic_plan
+
+DEFAULT_SIZES = [10, 100, 1_000, 10_000, 100_000]
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of ``samples``."""
+
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def summarize(samples_ms: List[float], wall_seconds: float, operations: int) -> Dict[str, float]:
+    return {
+        "samples": len(samples_ms),
+        "p50_ms": round(percentile(samples_ms, 50), 4),
+        "p95_ms": round(percentile(samples_ms, 95), 4),
+        "p99_ms": round(percentile(samples_ms, 99), 4),
+        "max_ms": round(max(samples_ms), 4),
+        "throughput_per_s": round(operations / wall_seconds, 2) if wall_seconds else 0.0,
+    }
+
+
+def time_sync(fn: Callable[[], Any], iterations: int) -> Dict[str, float]:
+    samples = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        begin = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - begin) * 1000)
+    return summarize(samples, time.perf_counter() - started, iterations)
+
+
+async def time_concurrent(
+    fn: Callable[[int], Awaitable[Any]], requests: int, concurrency: int
+) -> Dict[str, float]:
+    limit = asyncio.Semaphore(concurrency)
+    samples: List[float] = []
+
+    async def one(i: int) -> None:
+        async with limit:
+            begin = time.perf_counter()
+            await fn(i)
+            samples.append((time.perf_counter() - begin) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    return summarize(samples, time.perf_counter() - started, requests)
+
+
+def iterations_for(size: int, iterations: int) -> int:
+    # Keep the largest plans to a handful of repetitions so the suite stays interactive.
+    return max(3, min(iterations, 200_000 // max(size, 1)))
+
+
+def bench_utilities(sizes: List[int], iterations: int) -> Dict[str, Any]:
+    results: Dict[str, Any] = {}
+    for size in sizes:
+        tasks = synthetic_plan(size)
+        runs = iterations_for(size, iterations)
+        scheduled = backfill_dates(tasks, fallback_start=date.today(), horizon_days=90)
+        results[str(size)] = {
+            "validate_dependencies": time_sync(lambda: validate_dependencies(tasks), runs),
+            "backfill_dates": time_sync(
+                lambda: backfill_dates(tasks, fallback_start=date.today(), horizon_days=90), runs
+            ),
+            "validate_timeline": time_sync(lambda: validate_timeline(scheduled), runs),
+        }
+    return results
+
+
+async def bench_service(
+    sizes: List[int], requests: int, concurrency: int, latency_ms: float
+) -> Dict[str, Any]:
+    results: Dict[str, Any] = {}
+    for size in sizes:
+        service = PlanService(provider=LatencyPlanner(latency_ms=latency_ms, task_count=size))
+        runs = iterations_for(size, requests)
+
+        async def call(i: int) -> None:
+            await service.generate(PlanRequest(goal=f"Benchmark goal {i}", horizon_days=30))
+
+        results[str(size)] = await time_concurrent(call, runs, concurrency)
+    return results
+
+
+async def bench_http(
+    sizes: List[int], requests: int, concurrency: int, latency_ms: float
+) -> Dict[str, Any]:
+    results: Dict[str, Any] = {}
+    transport = httpx.ASGITransport(app=app)
+    try:
+        for size in sizes:
+            service = PlanService(provider=LatencyPlanner(latency_ms=latency_ms, task_count=size))
+            app.dependency_overrides[get_service] = lambda: service
+            runs = iterations_for(size, requests)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+                async def call(i: int) -> None:
+                    response = await client.post(
+                        "/plan", json={"goal": f"Benchmark goal {i}", "horizon_days": 30}
+                    )
+                    response.raise_for_status()
+
+                results[str(size)] = await time_concurrent(call, runs, concurrency)
+    finally:
+        app.dependency_overrides.pop(get_service, None)
+    return results
+
+
+def run_suite(
+    sizes: List[int],
+    iterations: int,
+    requests: int,
+    concurrency: int,
+    latency_ms: float,
+) -> Dict[str, Any]:
+    service_sizes = [size for size in sizes if size <= 10_000]
+    return {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "config": {
+            "sizes": sizes,
+            "iterations": iterations,
+            "requests": requests,
+            "concurrency": concurrency,
+            "latency_ms": latency_ms,
+        },
+        "utilities": bench_utilities(sizes, iterations),
+        "plan_service": asyncio.run(
+            bench_service(service_sizes, requests, concurrency, latency_ms)
+        ),
+        "http_plan": asyncio.run(bench_http(service_sizes, requests, concurrency, latency_ms)),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--iterations", type=int, default=50, help="Repetitions per utility")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per load test")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Fake provider latency")
+    parser.add_argument("--output", help="Write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+    # Per-request INFO logs would dominate the timings being measured.
+    logging.getLogger().setLevel(logging.WARNING)
+
+    report = run_suite(args.sizes, args.iterations, args.requests, args.concurrency, args.latency_ms)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            handle.write(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,14 @@
+from __future__ import annotations
+
+import pytest
+
+from app.config import get_settings
+
+
+@pytest.fixture(autouse=True)
+def isolated_settings(monkeypatch):
+    # Keep tests from writing a plan store into the working tree; tests opt back in.
+    monkeypatch.setenv("PLAN_STORE_BACKEND", "none")
+    get_settings.cache_clear()
+    yield
+    get_settings.cache_clear()
@@ -0,0 +1,31 @@
+"""Test doubles shared by several test modules."""
+from __future__ import annotations
+
+from app.llm.provider import MockPlanner
+
+
+class CountingPlanner(MockPlanner):
+    def __init__(self) -> None:
+        self.calls = 0
+
+    async def generate_plan(self, prompt, schema, max_output_tokens=None):
+        self.calls += 1
+        return await super().generate_plan(prompt, schema, max_output_tokens)
+
+
+class DatedPlanner(CountingPlanner):
+    async def generate_plan(self, prompt, schema, max_output_tokens=None):
+        self.calls += 1
+        return {
+            "metadata": {},
+            "tasks": [
+                {"id": "T1", "title": "Design", "start_date": "2025-10-13", "due_date": "2025-10-16"},
+                {
+                    "id": "T2",
+                    "title": "Build",
+                    "start_date": "2025-10-16",
+                    "due_date": "2025-10-20",
+                    "depends_on": ["T1"],
+                },
+            ],
+        }
@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import asyncio
+import sqlite3
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import get_settings
+from app.main import app
+from app.services.admission import (
+    AdmissionController,
+    MemoryRateLimiter,
+    Rejected,
+    SQLiteRateLimiter,
+    client_key,
+)
+
+
+def test_memory_bucket_allows_burst_then_reports_wait():
+    limiter = MemoryRateLimiter(rate_per_second=1.0, burst=2)
+
+    assert limiter.acquire("a") == 0
+    assert limiter.acquire("a") == 0
+    assert 0 < limiter.acquire("a") <= 1.0
+    assert limiter.acquire("b") == 0
+
+
+def test_sqlite_buckets_are_shared_between_instances(tmp_path):
+    path = str(tmp_path / "limits.sqlite3")
+    first = SQLiteRateLimiter(path, rate_per_second=0.01, burst=1)
+    second = SQLiteRateLimiter(path, rate_per_second=0.01, burst=1)
+    try:
+        assert first.acquire("client") == 0
+        assert second.acquire("client") > 0
+    finally:
+        first.close()
+        second.close()
+
+
+def test_sqlite_check_does_not_block_the_event_loop(tmp_path):
+    path = str(tmp_path / "limits.sqlite3")
+    limiter = SQLiteRateLimiter(path, rate_per_second=1.0, burst=5)
+    other = sqlite3.connect(path, isolation_level=None)
+
+    async def scenario():
+        controller = AdmissionController(limiter)
+        # Another worker holds the write lock, so the check waits on the busy timeout.
+        other.execute("BEGIN IMMEDIATE")
+        check = asyncio.ensure_future(controller.check_rate("client"))
+        await asyncio.sleep(0.1)
+        waiting = not check.done()
+        other.execute("COMMIT")
+        await check
+        return waiting
+
+    try:
+        assert asyncio.run(scenario())
+    finally:
+        other.close()
+        limiter.close()
+
+
+def test_controller_sheds_when_queue_is_full():
+    async def scenario():
+        controller = AdmissionController(None, max_concurrency=1, max_queue=1, queue_timeout_seconds=5)
+        release = asyncio.Event()
+
+        async def hold():
+            async with controller.slot():
+                await release.wait()
+
+        holder = asyncio.ensure_future(hold())
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(hold())
+        await asyncio.sleep(0)
+        with pytest.raises(Rejected) as shed:
+            async with controller.slot():
+                pass
+        release.set()
+        await asyncio.gather(holder, waiter)
+        return controller, shed.value
+
+    controller, shed = asyncio.run(scenario())
+
+    assert shed.status_code == 503 and shed.retry_after >= 1
+    assert controller.stats.admitted == 2
+    assert controller.stats.shed_queue_full == 1
+    assert controller.stats.in_flight == 0
+
+
+def test_queued_request_times_out():
+    async def scenario():
+        controller = AdmissionController(None, max_concurrency=1, queue_timeout_seconds=0.01)
+        async with controller.slot():
+            with pytest.raises(Rejected):
+                async with controller.slot():
+                    pass
+        return controller
+
+    assert asyncio.run(scenario()).stats.shed_timeout == 1
+
+
+def test_client_key_uses_only_known_api_keys():
+    known = AdmissionController(None, api_keys=["secret"]).api_key_hashes
+
+    assert client_key({"x-api-key": "secret"}, ("1.2.3.4", 1), known).startswith("key:")
+    assert client_key({"x-api-key": "made-up"}, ("1.2.3.4", 1), known) == "ip:1.2.3.4"
+    assert client_key({}, ("1.2.3.4", 1), known) == "ip:1.2.3.4"
+
+
+def test_plan_endpoint_returns_429_with_retry_after(monkeypatch):
+    monkeypatch.setenv("SMART_TASK_PLANNER_MOCK", "true")
+    monkeypatch.setenv("RATE_LIMIT_BURST", "2")
+    monkeypatch.setenv("RATE_LIMIT_PER_MINUTE", "1")
+    monkeypatch.setenv("RATE_LIMIT_API_KEYS", '["known"]')
+    with TestClient(app) as client:
+        statuses = [client.post("/plan", json={"goal": "Burst"}).status_code for _ in range(3)]
+        limited = client.post("/plan", json={"goal": "Burst"})
+        rotated = [
+            client.post("/plan", json={"goal": "Burst"}, headers={"X-API-Key": f"k{i}"}).status_code
+            for i in range(3)
+        ]
+        known_key = client.post("/plan", json={"goal": "Burst"}, headers={"X-API-Key": "known"})
+        health = client.get("/health")
+
+    assert statuses == [200, 200, 429]
+    assert int(limited.headers["retry-after"]) >= 1
+    assert rotated == [429, 429, 429]
+    assert known_key.status_code == 200
+    assert health.status_code == 200
+
+
+def test_batch_is_charged_per_distinct_plan(monkeypatch):
+    monkeypatch.setenv("SMART_TASK_PLANNER_MOCK", "true")
+    monkeypatch.setenv("BATCH_MAX_ITEMS", "6")
+    monkeypatch.setenv("RATE_LIMIT_BATCH_PLANS_PER_MINUTE", "1")
+    with TestClient(app) as client:
+        first = client.post("/plan/batch", json={"requests": [{"goal": f"Goal {i}"} for i in range(4)]})
+        # Six items but only two distinct goals, which exactly uses up the bucket.
+        duplicates = client.post("/plan/batch", json={"requests": [{"goal": "A"}, {"goal": "B"}] * 3})
+        limited = client.post("/plan/batch", json={"requests": [{"goal": "C"}]})
+        single = client.post("/plan", json={"goal": "Not a batch"})
+
+    assert first.status_code == 200
+    assert all(item["error"] is None for item in first.json()["results"])
+    assert duplicates.status_code == 200 and len(duplicates.json()["results"]) == 6
+    assert limited.status_code == 429 and int(limited.headers["retry-after"]) >= 1
+    assert single.status_code == 200
+
+
+def test_batch_larger_than_burst_is_accepted_at_default_settings(monkeypatch):
+    monkeypatch.setenv("SMART_TASK_PLANNER_MOCK", "true")
+    batch = {"requests": [{"goal": f"Goal {i}"} for i in range(get_settings().rate_limit_burst + 5)]}
+    with TestClient(app) as client:
+        response = client.post("/plan/batch", json=batch)
+        # The batch has its own bucket, so single plans still have their full burst.
+        singles = [client.post("/plan", json={"goal": "Single"}).status_code for _ in range(3)]
+
+    assert response.status_code == 200
+    assert all(item["error"] is None for item in response.json()["results"])
+    assert singles == [200, 200, 200]
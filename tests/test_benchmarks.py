@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+from benchmarks.run import percentile, run_suite
+
+
+def test_percentile_uses_nearest_rank():
+    samples = [float(i) for i in range(1, 101)]
+
+    assert percentile(samples, 50) == 50.0
+    assert percentile(samples, 99) == 99.0
+
+
+def test_suite_produces_report_for_each_stage():
+    report = run_suite(sizes=[10], iterations=2, requests=4, concurrency=2, latency_ms=0)
+
+    assert set(report["utilities"]["10"]) == {
+        "validate_dependencies",
+        "backfill_dates",
+        "validate_timeline",
+    }
+    assert report["plan_service"]["10"]["samples"] == 4
+    assert report["http_plan"]["10"]["samples"] == 4
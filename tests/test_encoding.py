@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import csv
+import gzip
+import io
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.utils.encoding import UnsupportedFormat, compress, negotiate_format
+
+
+def test_negotiate_format_prefers_explicit_parameter_then_quality():
+    assert negotiate_format("application/json", "csv") == "csv"
+    assert negotiate_format("application/json;q=0.5, text/csv", None) == "csv"
+    assert negotiate_format("text/html, */*;q=0.8", None) == "json"
+    assert negotiate_format(None, None, default="csv") == "csv"
+    with pytest.raises(UnsupportedFormat):
+        negotiate_format("image/png", None)
+    with pytest.raises(UnsupportedFormat):
+        negotiate_format(None, "yaml")
+
+
+def test_compress_only_above_threshold():
+    body = b"x" * 100
+    assert compress(body, "gzip", min_size=1000) == (body, None)
+    assert compress(body, "identity", min_size=10) == (body, None)
+    compressed, encoding = compress(body, "gzip, deflate", min_size=10)
+    assert encoding == "gzip"
+    assert gzip.decompress(compressed) == body
+
+
+def test_plan_is_served_as_csv_and_compressed_json(monkeypatch):
+    monkeypatch.setenv("SMART_TASK_PLANNER_MOCK", "true")
+    monkeypatch.setenv("RESPONSE_COMPRESSION_MIN_BYTES", "10")
+    with TestClient(app) as client:
+        as_csv = client.post("/plan", params={"format": "csv"}, json={"goal": "Launch"})
+        as_json = client.post(
+            "/plan", json={"goal": "Launch"}, headers={"Accept-Encoding": "gzip"}
+        )
+        rejected = client.post("/plan", json={"goal": "Launch"}, headers={"Accept": "image/png"})
+
+    rows = list(csv.DictReader(io.StringIO(as_csv.text)))
+    assert as_csv.headers["content-type"].startswith("text/csv")
+    assert [row["id"] for row in rows] == ["T1", "T2", "T3"]
+    assert rows[1]["depends_on"] == "T1"
+    assert as_json.headers["content-encoding"] == "gzip"
+    assert as_json.json()["metadata"]["goal"] == "Launch"
+    assert rejected.status_code == 406
+
+
+def test_stored_plan_export_defaults_to_csv(monkeypatch, tmp_path):
+    monkeypatch.setenv("SMART_TASK_PLANNER_MOCK", "true")
+    monkeypatch.setenv("PLAN_STORE_BACKEND", "sqlite")
+    monkeypatch.setenv("PLAN_STORE_PATH", str(tmp_path / "plans.sqlite3"))
+    with TestClient(app) as client:
+        plan_id = client.post("/plan", json={"goal": "Export"}).json()["metadata"]["plan_id"]
+        client.portal.call(app.state.service._store.flush)
+        exported = client.get(f"/plans/{plan_id}/export")
+
+    assert exported.headers["content-type"].startswith("text/csv")
+    assert f'filename="{plan_id}.csv"' in exported.headers["content-disposition"]
+    assert exported.text.splitlines()[0].startswith("id,title,owner")
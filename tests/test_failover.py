@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from app.llm.failover import FailoverPlanner
+from app.llm.provider import LLMProvider
+from app.utils.metrics import MetricsRegistry
+
+
+class FakeModel(LLMProvider):
+    def __init__(self, label: str, delay: float = 0.0, fail: bool = False) -> None:
+        self.label = label
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+
+    async def generate_plan(self, prompt, schema, max_output_tokens=None):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError(f"{self.label} down")
+        return {"tasks": [], "metadata": {"planning_strategy": self.label}}
+
+    def name(self) -> str:
+        return self.label
+
+
+def test_fails_over_to_next_model():
+    planner = FailoverPlanner([FakeModel("primary", fail=True), FakeModel("backup")])
+
+    result = asyncio.run(planner.generate_plan("p", {}))
+
+    assert result["metadata"]["planning_strategy"] == "backup"
+    assert planner.stats()["primary"]["failures"] == 1
+
+
+def test_hedges_slow_primary():
+    slow, fast = FakeModel("slow", delay=1.0), FakeModel("fast")
+    planner = FailoverPlanner([slow, fast], hedge_delay_seconds=0.01)
+
+    result = asyncio.run(planner.generate_plan("p", {}))
+
+    assert result["metadata"]["planning_strategy"] == "fast"
+    assert planner.stats()["fast"]["hedge_wins"] == 1
+
+
+def test_open_circuit_skips_model():
+    primary, backup = FakeModel("primary", fail=True), FakeModel("backup")
+    planner = FailoverPlanner([primary, backup], failure_threshold=2, reset_seconds=60)
+
+    for _ in range(3):
+        asyncio.run(planner.generate_plan("p", {}))
+
+    assert primary.calls == 2
+    assert planner.stats()["primary"]["circuit_open"] is True
+
+
+def test_raises_when_every_model_fails():
+    planner = FailoverPlanner([FakeModel("a", fail=True), FakeModel("b", fail=True)])
+
+    with pytest.raises(ValueError):
+        asyncio.run(planner.generate_plan("p", {}))
+
+
+def test_half_open_trial_is_kept_for_a_model_that_actually_runs():
+    primary, backup = FakeModel("a"), FakeModel("b", fail=True)
+    planner = FailoverPlanner([primary, backup], hedge=False, failure_threshold=1, reset_seconds=0.05)
+
+    async def scenario():
+        primary.fail = True
+        with pytest.raises(ValueError):
+            await planner.generate_plan("p", {})
+        # Both circuits are open; once they cool down the primary recovers on its own.
+        await asyncio.sleep(0.06)
+        primary.fail = False
+        await planner.generate_plan("p", {})
+        primary.fail, backup.fail = True, False
+        return await planner.generate_plan("p", {})
+
+    result = asyncio.run(scenario())
+
+    assert result["metadata"]["planning_strategy"] == "b"
+    assert backup.calls == 2
+
+
+def test_failover_stats_are_exported_per_model():
+    planner = FailoverPlanner([FakeModel("a", fail=True), FakeModel("b")])
+    asyncio.run(planner.generate_plan("p", {}))
+    registry = MetricsRegistry()
+    registry.add_collector("plan_failover", planner.stats, label="model")
+
+    body = registry.render()
+
+    assert 'plan_failover_failures{model="a"} 1' in body
+    assert 'plan_failover_calls{model="b"} 1' in body
+    assert body.count("# TYPE plan_failover_calls gauge") == 1
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.config import Settings
+from app.llm.gemini import GeminiPlanner
+from app.llm.registry import ProviderRegistry
+from app.utils.metrics import LLM_QUEUE_WAIT, MetricsRegistry
+
+
+class FakeModel:
+    def __init__(self, delay: float) -> None:
+        self.delay = delay
+        self.active = 0
+        self.peak = 0
+
+    async def generate_content_async(self, prompt, generation_config=None):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(self.delay)
+        self.active -= 1
+        return SimpleNamespace(text='{"metadata": {}, "tasks": []}')
+
+
+def test_concurrency_is_bounded_and_queue_wait_recorded():
+    planner = GeminiPlanner(api_key="test-key", model="queue-wait-model", max_concurrency=2)
+    planner._model = FakeModel(delay=0.02)
+
+    async def scenario():
+        await asyncio.gather(*(planner.generate_plan("p", {}) for _ in range(5)))
+
+    asyncio.run(scenario())
+
+    assert planner._model.peak == 2
+    assert planner.stats.calls == 5
+    assert planner.stats.max_wait_seconds > 0
+    assert LLM_QUEUE_WAIT.labels("queue-wait-model").count == 5
+
+
+def test_provider_stats_are_exported_per_model():
+    registry = ProviderRegistry(Settings(gemini_api_key="k", gemini_model="export-model"))
+    metrics = MetricsRegistry()
+    metrics.add_collector("plan_llm", registry.provider_stats, label="model")
+    registry.start()
+
+    body = metrics.render()
+
+    assert 'plan_llm_in_flight{model="export-model"} 0' in body
+    assert 'plan_llm_timeouts{model="export-model"} 0' in body
+
+
+def test_slow_call_times_out():
+    planner = GeminiPlanner(api_key="test-key", timeout_seconds=0.01)
+    planner._model = FakeModel(delay=1)
+
+    with pytest.raises(TimeoutError):
+        asyncio.run(planner.generate_plan("p", {}))
+    assert planner.stats.timeouts == 1
+
+
+class ScriptedModel:
+    def __init__(self, *texts: str) -> None:
+        self.texts = list(texts)
+        self.calls = 0
+
+    async def generate_content_async(self, prompt, generation_config=None):
+        self.calls += 1
+        return SimpleNamespace(text=self.texts.pop(0))
+
+
+def test_truncated_response_recovered_without_retry():
+    planner = GeminiPlanner(api_key="test-key")
+    planner._model = ScriptedModel(
+        '```json\n{"metadata": {}, "tasks": [{"id": "T1", "title": "a"}, {"id": "T2", "ti'
+    )
+
+    plan = asyncio.run(planner.generate_plan("p", {}))
+
+    assert [t["id"] for t in plan["tasks"]] == ["T1"]
+    assert planner.stats.recovered == 1 and planner._model.calls == 1
+
+
+def test_unrecoverable_response_retried_with_backoff():
+    planner = GeminiPlanner(api_key="test-key", retry_base_delay_seconds=0)
+    planner._model = ScriptedModel("not json", '{"metadata": {}, "tasks": []}')
+
+    plan = asyncio.run(planner.generate_plan("p", {}))
+
+    assert plan == {"metadata": {}, "tasks": []}
+    assert planner.stats.retried == 1
+
+
+class UsageModel:
+    def __init__(self) -> None:
+        self.configs = []
+
+    async def generate_content_async(self, prompt, generation_config=None):
+        self.configs.append(generation_config)
+        usage = SimpleNamespace(prompt_token_count=120, candidates_token_count=80)
+        return SimpleNamespace(text='{"metadata": {}, "tasks": []}', usage_metadata=usage)
+
+
+def test_output_budget_forwarded_and_usage_recorded():
+    planner = GeminiPlanner(api_key="test-key")
+    planner._model = UsageModel()
+
+    asyncio.run(planner.generate_plan("p", {}, max_output_tokens=900))
+    asyncio.run(planner.generate_plan("p", {}))
+
+    assert [c["max_output_tokens"] for c in planner._model.configs] == [900, 2048]
+    assert planner.stats.prompt_tokens == 240
+    assert planner.stats.output_tokens == 160
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.llm.provider import MockPlanner
+from app.main import app
+from app.schemas import PlanJobRequest
+from app.services.job_queue import JobQueue, JobQueueFull
+from app.services.plan_service import PlanService
+
+
+class GatedPlanner(MockPlanner):
+    """Blocks every call until ``release`` is set."""
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.release = asyncio.Event()
+
+    async def generate_plan(self, prompt, schema, max_output_tokens=None):
+        self.calls += 1
+        await self.release.wait()
+        return await super().generate_plan(prompt, schema, max_output_tokens)
+
+
+async def wait_for_status(queue: JobQueue, job_id: str, status: str) -> None:
+    for _ in range(200):
+        if queue.get(job_id).status == status:
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"job {job_id} never reached {status}")
+
+
+def test_jobs_deduplicate_backpressure_and_cancel():
+    async def scenario():
+        planner = GatedPlanner()
+        queue = JobQueue(PlanService(provider=planner), workers=1, max_queue=1)
+        queue.start()
+        try:
+            running = queue.submit(PlanJobRequest(goal="A"))
+            await wait_for_status(queue, running.job_id, "running")
+            queued = queue.submit(PlanJobRequest(goal="B"))
+            duplicate = queue.submit(PlanJobRequest(goal="A"))
+            with pytest.raises(JobQueueFull) as full:
+                queue.submit(PlanJobRequest(goal="C"))
+
+            queue.cancel(queued.job_id)
+            # The cancelled job no longer holds the only queue place.
+            replacement = queue.submit(PlanJobRequest(goal="D"))
+            planner.release.set()
+            await wait_for_status(queue, replacement.job_id, "succeeded")
+            return planner, queue, running, queued, duplicate, full.value
+        finally:
+            await queue.stop()
+
+    planner, queue, running, queued, duplicate, full = asyncio.run(scenario())
+
+    assert duplicate.deduplicated and duplicate.job_id == running.job_id
+    assert full.retry_after >= 1
+    assert queue.get(queued.job_id).status == "cancelled"
+    assert queue.get(running.job_id).result.metadata.goal == "A"
+    assert planner.calls == 2
+    assert queue.stats.rejected == 1 and queue.stats.cancelled == 1
+
+
+def test_finished_job_is_not_reused_for_a_new_submission():
+    async def scenario():
+        queue = JobQueue(PlanService(provider=MockPlanner()), workers=1)
+        queue.start()
+        try:
+            first = queue.submit(PlanJobRequest(goal="Again"))
+            await wait_for_status(queue, first.job_id, "succeeded")
+            second = queue.submit(PlanJobRequest(goal="Again"))
+            await wait_for_status(queue, second.job_id, "succeeded")
+            return first, second, queue.stats
+        finally:
+            await queue.stop()
+
+    first, second, stats = asyncio.run(scenario())
+
+    assert second.job_id != first.job_id and not second.deduplicated
+    assert stats.succeeded == 2 and stats.deduplicated == 0
+
+
+def test_running_job_can_be_cancelled():
+    async def scenario():
+        queue = JobQueue(PlanService(provider=GatedPlanner()), workers=1)
+        queue.start()
+        try:
+            job = queue.submit(PlanJobRequest(goal="Slow"))
+            await wait_for_status(queue, job.job_id, "running")
+            queue.cancel(job.job_id)
+            await wait_for_status(queue, job.job_id, "cancelled")
+            again = queue.submit(PlanJobRequest(goal="Slow"))
+            return job, again
+        finally:
+            await queue.stop()
+
+    job, again = asyncio.run(scenario())
+
+    assert again.job_id != job.job_id and not again.deduplicated
+
+
+def test_webhook_receives_finished_job():
+    received = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            received.append(json.loads(self.rfile.read(int(self.headers["Content-Length"]))))
+            self.send_response(204)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    async def scenario():
+        queue = JobQueue(PlanService(provider=MockPlanner()), workers=1)
+        queue.start()
+        try:
+            url = f"http://127.0.0.1:{server.server_port}/done"
+            job = queue.submit(PlanJobRequest(goal="Notify", callback_url=url))
+            await wait_for_status(queue, job.job_id, "succeeded")
+            with pytest.raises(ValueError):
+                queue.submit(PlanJobRequest(goal="Other", callback_url="http://example.com/hook"))
+            return job
+        finally:
+            await queue.stop()
+
+    try:
+        job = asyncio.run(scenario())
+    finally:
+        server.shutdown()
+
+    assert received[0]["job_id"] == job.job_id
+    assert received[0]["status"] == "succeeded"
+
+
+def test_job_endpoints_accept_and_report(monkeypatch):
+    monkeypatch.setenv("SMART_TASK_PLANNER_MOCK", "true")
+    with TestClient(app) as client:
+        accepted = client.post("/plan/jobs", json={"goal": "Background"})
+        job_id = accepted.json()["job_id"]
+        client.portal.call(wait_for_status, app.state.jobs, job_id, "succeeded")
+        polled = client.get(f"/plan/jobs/{job_id}").json()
+        missing = client.get("/plan/jobs/unknown")
+
+    assert accepted.status_code == 202
+    assert accepted.headers["location"] == f"/plan/jobs/{job_id}"
+    assert polled["status"] == "succeeded"
+    assert polled["result"]["metadata"]["goal"] == "Background"
+    assert missing.status_code == 404
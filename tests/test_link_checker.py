@@ -0,0 +1,258 @@
+from __future__ import annotations
+
+import asyncio
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.llm.provider import MockPlanner
+from app.schemas import PlanRequest, Task
+from app.services import link_checker
+from app.services.link_checker import LinkChecker
+from app.services.plan_service import PlanService
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    hits: dict = {}
+    active = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def _respond(self, head: bool) -> None:
+        cls = type(self)
+        with cls.lock:
+            cls.hits[self.path] = cls.hits.get(self.path, 0) + 1
+            cls.active += 1
+            cls.peak = max(cls.peak, cls.active)
+        try:
+            if self.path.startswith("/slow"):
+                time.sleep(0.2)
+            if self.path == "/slow-forever":
+                time.sleep(1.0)
+            if self.path == "/nohead" and head:
+                status = 405
+            elif self.path == "/gone":
+                status = 404
+            elif self.path in ("/moved", "/to-internal"):
+                port = self.server.server_address[1]
+                target = "/ok" if self.path == "/moved" else f"http://127.0.0.2:{port}/ok"
+                self.send_response(301)
+                self.send_header("Location", target)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            else:
+                status = 200
+            self.send_response(status)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+        finally:
+            with cls.lock:
+                cls.active -= 1
+
+    def do_HEAD(self):
+        self._respond(head=True)
+
+    def do_GET(self):
+        self._respond(head=False)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub():
+    StubHandler.hits = {}
+    StubHandler.peak = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_classifies_links_and_caches_verdicts(stub):
+    urls = [
+        f"{stub}/ok",
+        f"{stub}/gone",
+        f"{stub}/nohead",
+        f"{stub}/moved",
+        "ftp://example.com/x",
+        "http://[docs.example.com/guide",
+    ]
+
+    async def scenario():
+        checker = LinkChecker(budget_seconds=2.0, allow_private=True)
+        try:
+            first = await checker.check(urls)
+            second = await checker.check(urls)
+        finally:
+            await checker.aclose()
+        return checker, first, second
+
+    checker, first, second = asyncio.run(scenario())
+
+    assert first == dict(zip(urls, [True, False, True, True, False, False]))
+    assert second == first
+    assert StubHandler.hits["/ok"] == 2  # once directly, once via the redirect
+    assert checker.stats.cache_hits == len(urls)
+
+
+def test_private_hosts_are_not_fetched_by_default(stub):
+    async def scenario():
+        checker = LinkChecker()
+        try:
+            return await checker.check([f"{stub}/gone"])
+        finally:
+            await checker.aclose()
+
+    assert asyncio.run(scenario()) == {f"{stub}/gone": None}
+    assert StubHandler.hits == {}
+
+
+def test_hostnames_resolving_to_private_addresses_are_not_fetched(stub, monkeypatch):
+    real_getaddrinfo = socket.getaddrinfo
+
+    def fake_getaddrinfo(host, *args, **kwargs):
+        return real_getaddrinfo("127.0.0.1" if host == "docs.internal.test" else host, *args, **kwargs)
+
+    monkeypatch.setattr(socket, "getaddrinfo", fake_getaddrinfo)
+    url = "http://docs.internal.test:{}/ok".format(stub.rsplit(":", 1)[1])
+
+    async def scenario():
+        checker = LinkChecker()
+        try:
+            return await checker.check([url]), checker.stats
+        finally:
+            await checker.aclose()
+
+    verdicts, stats = asyncio.run(scenario())
+
+    assert verdicts == {url: None}
+    assert stats.blocked == 1 and stats.requests == 0
+    assert StubHandler.hits == {}
+
+
+def test_redirects_to_private_addresses_are_not_followed(stub, monkeypatch):
+    # Treat the stub's own address as public so only the redirect target is private.
+    monkeypatch.setattr(link_checker, "_is_private_address", lambda address: address == "127.0.0.2")
+
+    async def scenario():
+        checker = LinkChecker(budget_seconds=2.0)
+        try:
+            return await checker.check([f"{stub}/to-internal", f"{stub}/moved"]), checker.stats
+        finally:
+            await checker.aclose()
+
+    verdicts, stats = asyncio.run(scenario())
+
+    assert verdicts == {f"{stub}/to-internal": None, f"{stub}/moved": True}
+    assert stats.blocked == 1
+    assert StubHandler.hits == {"/to-internal": 1, "/moved": 1, "/ok": 1}
+
+
+MALFORMED_HOSTS = ["http://a..b/", "http://" + "x" * 70 + ".example.com/guide"]
+
+
+@pytest.mark.parametrize("allow_private", [False, True])
+def test_malformed_hostnames_never_fail_the_check(allow_private):
+    async def scenario():
+        checker = LinkChecker(budget_seconds=2.0, allow_private=allow_private)
+        try:
+            return await checker.check(MALFORMED_HOSTS)
+        finally:
+            await checker.aclose()
+
+    verdicts = asyncio.run(scenario())
+
+    if allow_private:
+        assert set(verdicts) == set(MALFORMED_HOSTS)
+    else:
+        assert verdicts == {url: False for url in MALFORMED_HOSTS}
+
+
+def test_failing_check_is_reported_unknown(monkeypatch):
+    async def broken(self, url):
+        raise RuntimeError("resolver exploded")
+
+    monkeypatch.setattr(LinkChecker, "_follow", broken)
+
+    async def scenario():
+        checker = LinkChecker()
+        try:
+            return await checker.check(["https://docs.example.com/"])
+        finally:
+            await checker.aclose()
+
+    assert asyncio.run(scenario()) == {"https://docs.example.com/": None}
+
+
+def test_budget_bounds_wait_and_late_checks_fill_cache(stub):
+    url = f"{stub}/slow"
+
+    async def scenario():
+        checker = LinkChecker(budget_seconds=0.05, allow_private=True)
+        try:
+            started = time.perf_counter()
+            early = await checker.check([url])
+            elapsed = time.perf_counter() - started
+            await asyncio.sleep(0.4)
+            late = await checker.check([url])
+        finally:
+            await checker.aclose()
+        return early, elapsed, late, checker.stats
+
+    early, elapsed, late, stats = asyncio.run(scenario())
+
+    assert early == {url: None}
+    assert elapsed < 0.15
+    assert late == {url: True}
+    assert stats.over_budget == 1 and stats.requests == 1
+
+
+def test_per_host_limit_caps_concurrent_requests(stub):
+    urls = [f"{stub}/slow/{i}" for i in range(6)]
+
+    async def scenario():
+        checker = LinkChecker(budget_seconds=5.0, per_host=2, allow_private=True)
+        try:
+            return await checker.check(urls)
+        finally:
+            await checker.aclose()
+
+    assert all(asyncio.run(scenario()).values())
+    assert StubHandler.peak == 2
+
+
+class LinkedPlanner(MockPlanner):
+    def __init__(self, links) -> None:
+        self.links = links
+
+    async def generate_plan(self, prompt, schema, max_output_tokens=None):
+        return {
+            "metadata": {},
+            "tasks": [Task(id="T1", title="Read docs", reference_links=self.links).model_dump(mode="json")],
+        }
+
+
+@pytest.mark.parametrize("mode", ["flag", "drop"])
+def test_service_flags_or_drops_dead_links(stub, mode):
+    links = [f"{stub}/ok", f"{stub}/gone", f"{stub}/slow-forever", "http://[docs.example.com/guide"]
+    links += MALFORMED_HOSTS
+
+    async def scenario():
+        checker = LinkChecker(mode=mode, budget_seconds=0.5, allow_private=True)
+        try:
+            service = PlanService(provider=LinkedPlanner(links), links=checker)
+            return await service.generate(PlanRequest(goal="Learn", horizon_days=3))
+        finally:
+            await checker.aclose()
+
+    plan = asyncio.run(scenario())
+
+    assert plan.metadata.dead_links == [f"{stub}/gone", *links[3:]]
+    kept = links if mode == "flag" else [links[0], links[2]]
+    assert plan.tasks[0].reference_links == kept
@@ -0,0 +1,17 @@
+from __future__ import annotations
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+
+
+def test_plan_reports_stage_timings_and_metrics(monkeypatch):
+    monkeypatch.setenv("SMART_TASK_PLANNER_MOCK", "true")
+    with TestClient(app) as client:
+        response = client.post("/plan", json={"goal": "Ship", "horizon_days": 7})
+        stages = {part.split(";")[0] for part in response.headers["server-timing"].split(", ")}
+        body = client.get("/metrics").text
+
+    assert {"prompt", "llm", "parse", "validate", "schedule", "timeline"} <= stages
+    assert 'plan_stage_seconds_count{stage="llm"}' in body
+    assert "plan_requests_in_flight 0" in body
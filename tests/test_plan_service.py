@@ -1,11 +1,16 @@
 from __future__ import annotations
 
 import asyncio
+import threading
 from datetime import date
 
-from app.schemas import PlanRequest
+from app.llm.provider import MockPlanner
+from app.schemas import PlanRequest, PlanResponse, ReplanRequest
+from app.services.plan_cache import MemoryPlanCache, SQLitePlanCache
 from app.services.plan_service import PlanService
 
+from fakes import CountingPlanner, DatedPlanner
+
 
 def test_mock_plan_contains_tasks(monkeypatch):
     monkeypatch.setenv("SMART_TASK_PLANNER_MOCK", "true")
@@ -17,3 +22,188 @@ def test_mock_plan_contains_tasks(monkeypatch):
     assert len(response.tasks) >= 1
     assert all(task.id for task in response.tasks)
     assert all(task.due_date is not None for task in response.tasks)
+
+
+def test_cache_hit_skips_provider_and_reschedules(tmp_path):
+    planner = CountingPlanner()
+    cache = SQLitePlanCache(str(tmp_path / "cache.sqlite3"), ttl_seconds=60, max_entries=4)
+    service = PlanService(provider=planner, cache=cache)
+    payload = PlanRequest(goal="Ship a demo", horizon_days=7)
+
+    first = asyncio.run(service.generate(payload))
+    second = asyncio.run(service.generate(PlanRequest(goal="Ship  a demo ", horizon_days=7)))
+
+    assert planner.calls == 1
+    assert service.cache_stats() == {"hits": 1, "misses": 1, "evictions": 0}
+    assert second.tasks[0].start_date == date.today()
+    assert [t.id for t in second.tasks] == [t.id for t in first.tasks]
+
+
+def test_cache_hit_reschedules_dated_plan_from_today():
+    # The planner's dates are those of the day the plan was cached, since passed.
+    planner = DatedPlanner()
+    service = PlanService(provider=planner, cache=MemoryPlanCache(ttl_seconds=60, max_entries=4))
+    payload = PlanRequest(goal="Ship a demo", horizon_days=14)
+
+    async def streamed():
+        frames = [frame async for frame in service.generate_stream(payload)]
+        return PlanResponse.model_validate(frames[-1]["data"])
+
+    fresh = asyncio.run(service.generate(payload))
+    hits = [asyncio.run(service.generate(payload)), asyncio.run(streamed())]
+
+    assert planner.calls == 1
+    assert fresh.tasks[0].start_date == date(2025, 10, 13)
+    for hit in hits:
+        assert hit.tasks[0].start_date == date.today()
+        assert [t.duration_days for t in hit.tasks] == [3, 4]
+        assert hit.tasks[1].start_date >= hit.tasks[0].due_date
+
+
+def test_sqlite_cache_runs_off_the_event_loop_and_skips_fresh_access_writes(tmp_path):
+    cache = SQLitePlanCache(str(tmp_path / "cache.sqlite3"), ttl_seconds=60, max_entries=4)
+    threads = []
+    original = cache._get
+
+    def recording_get(key):
+        threads.append(threading.get_ident())
+        return original(key)
+
+    cache._get = recording_get
+
+    async def scenario():
+        await cache.aset("k", {"tasks": []})
+        before = cache._conn.total_changes
+        hits = [await cache.aget("k") for _ in range(3)]
+        return hits, cache._conn.total_changes - before
+
+    try:
+        hits, writes = asyncio.run(scenario())
+    finally:
+        cache.close()
+
+    assert hits == [{"tasks": []}] * 3
+    assert writes == 0
+    assert threading.get_ident() not in threads
+
+
+def test_memory_cache_evicts_least_recently_used():
+    cache = MemoryPlanCache(ttl_seconds=60, max_entries=2)
+    cache.set("a", {"tasks": []})
+    cache.set("b", {"tasks": []})
+    cache.get("a")
+    cache.set("c", {"tasks": []})
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.stats.evictions == 1
+
+
+class SlowPlanner(CountingPlanner):
+    async def generate_plan(self, prompt, schema, max_output_tokens=None):
+        await asyncio.sleep(0.05)
+        return await super().generate_plan(prompt, schema, max_output_tokens)
+
+
+def test_concurrent_identical_requests_share_one_provider_call():
+    planner = SlowPlanner()
+    service = PlanService(provider=planner)
+    payload = PlanRequest(goal="Ship a demo", horizon_days=7)
+
+    async def scenario():
+        cancelled = asyncio.ensure_future(service.generate(payload))
+        others = [asyncio.ensure_future(service.generate(payload)) for _ in range(3)]
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        return await asyncio.gather(*others)
+
+    results = asyncio.run(scenario())
+
+    assert planner.calls == 1
+    assert all(len(r.tasks) == 3 for r in results)
+    assert service.coalescing_stats() == {"originated": 1, "coalesced": 3}
+
+
+def test_stream_emits_tasks_then_final_plan():
+    service = PlanService(provider=MockPlanner())
+    payload = PlanRequest(goal="Ship a demo", horizon_days=7)
+
+    async def collect():
+        return [frame async for frame in service.generate_stream(payload)]
+
+    frames = asyncio.run(collect())
+
+    assert [f["type"] for f in frames] == ["task", "task", "task", "plan"]
+    assert [f["data"]["id"] for f in frames[:3]] == ["T1", "T2", "T3"]
+    final = frames[-1]["data"]
+    assert final["metadata"]["goal"] == "Ship a demo"
+    assert all(task["due_date"] for task in final["tasks"])
+
+
+class FlakyPlanner(CountingPlanner):
+    async def generate_plan(self, prompt, schema, max_output_tokens=None):
+        if "Broken" in prompt:
+            raise RuntimeError("model unavailable")
+        return await super().generate_plan(prompt, schema, max_output_tokens)
+
+
+def test_batch_dedupes_and_isolates_failures():
+    planner = FlakyPlanner()
+    service = PlanService(provider=planner)
+    payloads = [
+        PlanRequest(goal="Ship a demo", horizon_days=7),
+        PlanRequest(goal="Broken goal", horizon_days=7),
+        PlanRequest(goal="Ship a demo", horizon_days=7),
+    ]
+
+    batch = asyncio.run(service.generate_batch(payloads, concurrency=1))
+
+    assert planner.calls == 1
+    assert [r.index for r in batch.results] == [0, 1, 2]
+    assert batch.results[0].plan is not None and batch.results[2].plan is not None
+    assert batch.results[1].plan is None and "model unavailable" in batch.results[1].error
+    assert batch.summed_item_time_ms >= 0 and batch.wall_time_ms >= 0
+
+
+class ReplanPlanner(CountingPlanner):
+    async def generate_plan(self, prompt, schema, max_output_tokens=None):
+        self.calls += 1
+        self.prompt = prompt
+        return {"tasks": [{"id": "T3", "title": "Hire contractors", "depends_on": ["T2"], "duration_days": 4}]}
+
+
+def test_replan_date_change_is_local_and_skips_completed():
+    planner = ReplanPlanner()
+    service = PlanService(provider=MockPlanner())
+    plan = asyncio.run(service.generate(PlanRequest(goal="Ship a demo", horizon_days=7)))
+    service = PlanService(provider=planner)
+
+    updated = asyncio.run(
+        service.replan(ReplanRequest(plan=plan, horizon_days=30, completed_task_ids=["T1"]))
+    )
+
+    assert planner.calls == 0
+    by_id = {t.id: t for t in updated.tasks}
+    assert by_id["T1"] == plan.tasks[0]
+    assert by_id["T2"].start_date == date.today()
+    assert by_id["T2"].depends_on == ["T1"]
+    assert updated.metadata.horizon_days == 30
+
+
+def test_replan_constraint_regenerates_only_affected_subgraph():
+    planner = ReplanPlanner()
+    plan = asyncio.run(
+        PlanService(provider=MockPlanner()).generate(PlanRequest(goal="Ship", horizon_days=7))
+    )
+    service = PlanService(provider=planner)
+
+    updated = asyncio.run(
+        service.replan(
+            ReplanRequest(plan=plan, constraint="No hiring freeze", affected_task_ids=["T3"])
+        )
+    )
+
+    assert planner.calls == 1
+    assert '"T1"' in planner.prompt and "Tasks to revise" in planner.prompt
+    assert [t.title for t in updated.tasks][-1] == "Hire contractors"
+    assert updated.metadata.assumptions[-1] == "Re-planned for constraint: No hiring freeze"
@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+
+
+def test_generated_plans_are_stored_and_listed(monkeypatch, tmp_path):
+    monkeypatch.setenv("SMART_TASK_PLANNER_MOCK", "true")
+    monkeypatch.setenv("PLAN_STORE_BACKEND", "sqlite")
+    monkeypatch.setenv("PLAN_STORE_PATH", str(tmp_path / "plans.sqlite3"))
+    with TestClient(app) as client:
+        ids = [
+            client.post("/plan", json={"goal": f"Goal {i}"}).json()["metadata"]["plan_id"]
+            for i in range(3)
+        ]
+        client.portal.call(app.state.service._store.flush)
+
+        fetched = client.get(f"/plans/{ids[0]}").json()
+        first_page = client.get("/plans", params={"limit": 2}).json()
+        second_page = client.get(
+            "/plans", params={"limit": 2, "cursor": first_page["next_cursor"]}
+        ).json()
+        by_task = client.get("/plans", params={"task_id": "T2", "goal": "goal 1"}).json()
+
+    assert fetched["metadata"]["goal"] == "Goal 0"
+    assert [item["plan_id"] for item in first_page["items"]] == ids[:0:-1]
+    assert [item["plan_id"] for item in second_page["items"]] == ids[:1]
+    assert second_page["next_cursor"] is None
+    assert [item["plan_id"] for item in by_task["items"]] == [ids[1]]
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+from datetime import date
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.schemas import PlanMetadata, PlanResponse, PortfolioPlan, PortfolioRequest, Task
+from app.services.portfolio import schedule_portfolio
+from app.utils.validation import ValidationError, find_owner_overloads
+
+START = date(2030, 1, 7)
+
+
+def plan(goal, *tasks):
+    return PlanResponse(metadata=PlanMetadata(goal=goal, horizon_days=30), tasks=list(tasks))
+
+
+def request(**kwargs):
+    return PortfolioRequest(
+        plans=[
+            PortfolioPlan(
+                key="web",
+                plan=plan(
+                    "Web",
+                    Task(id="T1", title="Design", owner="Designer", duration_days=2),
+                    Task(id="T2", title="Build", owner="Engineer", duration_days=3, depends_on=["T1"]),
+                ),
+            ),
+            PortfolioPlan(
+                key="app",
+                plan=plan(
+                    "App",
+                    Task(id="T1", title="Design", owner="designer", duration_days=2),
+                    Task(id="T2", title="Build", owner="Engineer", duration_days=3, depends_on=["T1"]),
+                ),
+            ),
+        ],
+        start_date=START,
+        **kwargs,
+    )
+
+
+def test_overload_sweep_reports_each_overloaded_run():
+    tasks = [
+        Task(id="a", title="a", owner="Ops", start_date=date(2030, 1, 1), due_date=date(2030, 1, 3)),
+        Task(id="b", title="b", owner="ops", start_date=date(2030, 1, 3), due_date=date(2030, 1, 5)),
+        Task(id="c", title="c", owner="Ops", start_date=date(2030, 1, 6), due_date=date(2030, 1, 6)),
+        Task(id="d", title="d", owner="Dev", start_date=date(2030, 1, 1), due_date=date(2030, 1, 9)),
+    ]
+
+    overloads = find_owner_overloads(tasks, {"Ops": 1})
+
+    assert [(o.owner, o.start, o.end, o.task_ids) for o in overloads] == [
+        ("ops", date(2030, 1, 3), date(2030, 1, 3), ["a", "b"])
+    ]
+    assert find_owner_overloads(tasks, {"Ops": 2}) == []
+
+
+def test_unconstrained_portfolio_reports_cross_plan_conflicts():
+    portfolio = schedule_portfolio(request(), START, 30)
+
+    assert [t.id for t in portfolio.tasks] == ["web:T1", "web:T2", "app:T1", "app:T2"]
+    assert portfolio.tasks[1].depends_on == ["web:T1"]
+    assert {(c.owner, c.start_date) for c in portfolio.metadata.conflicts} == {
+        ("designer", START),
+        ("engineer", date(2030, 1, 10)),
+    }
+    assert all(c.plans == ["app", "web"] for c in portfolio.metadata.conflicts)
+
+
+def test_levelled_portfolio_with_cross_dependency_has_no_conflicts():
+    portfolio = schedule_portfolio(
+        request(
+            owner_capacity={"Designer": 1, "Engineer": 1},
+            cross_plan_dependencies={"app:T2": ["web:T2"]},
+        ),
+        START,
+        30,
+    )
+    by_id = {t.id: t for t in portfolio.tasks}
+
+    assert portfolio.metadata.conflicts == []
+    assert by_id["app:T2"].start_date > by_id["web:T2"].due_date
+    assert portfolio.metadata.plan_finish["app"] == by_id["app:T2"].due_date
+
+
+def test_unknown_cross_dependency_is_rejected():
+    with pytest.raises(ValidationError):
+        schedule_portfolio(request(cross_plan_dependencies={"web:T9": ["app:T1"]}), START, 30)
+
+
+def test_portfolio_endpoint_rejects_cycles():
+    payload = request(
+        cross_plan_dependencies={"web:T1": ["app:T2"], "app:T1": ["web:T2"]}
+    ).model_dump(mode="json")
+    with TestClient(app) as client:
+        response = client.post("/plan/portfolio", json=payload)
+        ok = client.post("/plan/portfolio", json=request().model_dump(mode="json"))
+
+    assert response.status_code == 422
+    assert "Circular dependency" in response.json()["detail"]
+    assert len(ok.json()["metadata"]["conflicts"]) == 2
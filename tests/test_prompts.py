@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import asyncio
+
+from app.config import Settings
+from app.llm.prompts import PLAN_TEMPLATES, output_token_budget, task_range
+from app.llm.provider import MockPlanner
+from app.llm.registry import ProviderRegistry
+from app.schemas import PlanRequest
+from app.services.plan_service import PlanService
+
+
+def test_task_range_scales_with_horizon_unless_count_given():
+    assert task_range(None, 30) == (5, 10)
+    assert task_range(None, 7) == (3, 5)
+    assert task_range(None, 365) == (7, 15)
+    assert task_range(4, 365) == (4, 4)
+
+
+def test_output_budget_grows_with_tasks_and_is_capped():
+    assert output_token_budget(1, 8192) == 512
+    assert output_token_budget(10, 8192) < output_token_budget(20, 8192)
+    assert output_token_budget(50, 4096) == 4096
+
+
+def test_compact_variant_has_smaller_static_prefix():
+    assert PLAN_TEMPLATES["compact"].prefix_tokens < PLAN_TEMPLATES["full"].prefix_tokens / 2
+
+
+class BudgetRecorder(MockPlanner):
+    def __init__(self) -> None:
+        self.budgets = []
+        self.prompts = []
+
+    async def generate_plan(self, prompt, schema, max_output_tokens=None):
+        self.prompts.append(prompt)
+        self.budgets.append(max_output_tokens)
+        return await super().generate_plan(prompt, schema, max_output_tokens)
+
+
+def test_service_renders_variant_and_sizes_output():
+    planner = BudgetRecorder()
+    registry = ProviderRegistry(Settings(SMART_TASK_PLANNER_MOCK=True, prompt_variant="compact"))
+    service = PlanService(provider=planner, registry=registry)
+
+    asyncio.run(service.generate(PlanRequest(goal="Small", task_count=3)))
+    asyncio.run(service.generate(PlanRequest(goal="Large", task_count=30)))
+
+    assert planner.prompts[0].startswith(PLAN_TEMPLATES["compact"].prefix)
+    assert "Tasks: 3-3." in planner.prompts[0]
+    assert planner.budgets[0] < planner.budgets[1]
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import signal
+import subprocess
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import Settings
+from app.llm.provider import MockPlanner
+from app.llm.registry import PROVIDER_FACTORIES, ProviderRegistry
+from app.main import app
+from app.services.plan_service import PlanService
+
+
+def test_registry_shares_provider_and_swaps_on_reload():
+    registry = ProviderRegistry(Settings(SMART_TASK_PLANNER_MOCK=True))
+    service = PlanService(registry=registry)
+    first = registry.default()
+    assert registry.default() is first
+    assert service.provider_name() == "mock-planner"
+
+    asyncio.run(registry.reload(Settings(SMART_TASK_PLANNER_MOCK=True, default_horizon_days=5)))
+    assert registry.default() is not first
+    assert service._settings.default_horizon_days == 5
+
+
+def test_app_reuses_service_across_requests(monkeypatch):
+    monkeypatch.setenv("SMART_TASK_PLANNER_MOCK", "true")
+    with TestClient(app) as client:
+        service = app.state.service
+        assert client.get("/health").json()["provider"] == "mock-planner"
+        assert client.post("/plan", json={"goal": "Ship", "horizon_days": 7}).status_code == 200
+        assert app.state.service is service
+
+
+def test_mock_mode_never_imports_model_sdk():
+    probe = "import sys, app.main; print('google.generativeai' in sys.modules)"
+    env = dict(os.environ, SMART_TASK_PLANNER_MOCK="true")
+    result = subprocess.run([sys.executable, "-c", probe], env=env, capture_output=True, text=True)
+
+    assert result.stdout.strip().splitlines()[-1] == "False"
+
+
+class WarmPlanner(MockPlanner):
+    warmed = 0
+
+    async def warm_up(self):
+        WarmPlanner.warmed += 1
+
+    def name(self):
+        return "warm-planner"
+
+
+def build_warm_planner(settings, model):
+    return WarmPlanner()
+
+
+def test_registered_provider_is_loaded_by_name_and_warmed(monkeypatch):
+    monkeypatch.setitem(PROVIDER_FACTORIES, "warm", f"{__name__}:build_warm_planner")
+    registry = ProviderRegistry(Settings(GEMINI_API_KEY="k", llm_provider="warm"))
+
+    asyncio.run(registry.warm_up())
+
+    assert registry.names() == ["gemini-2.0-flash-exp"]
+    assert registry.default().name() == "warm-planner"
+    assert WarmPlanner.warmed == 1
+    with pytest.raises(ValueError):
+        ProviderRegistry(Settings(GEMINI_API_KEY="k", llm_provider="nope")).start()
+
+
+def test_sighup_reloads_providers_from_settings(monkeypatch):
+    monkeypatch.setenv("SMART_TASK_PLANNER_MOCK", "true")
+
+    async def scenario():
+        async with app.router.lifespan_context(app):
+            registry = app.state.registry
+            before = registry.default()
+            monkeypatch.setenv("DEFAULT_HORIZON_DAYS", "9")
+            os.kill(os.getpid(), signal.SIGHUP)
+            for _ in range(100):
+                if registry.default() is not before:
+                    break
+                await asyncio.sleep(0.01)
+            return registry.default() is not before, registry.settings.default_horizon_days
+
+    assert asyncio.run(scenario()) == (True, 9)
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import date
+
+from app.schemas import PlanRequest
+from app.services.plan_cache import MemoryPlanCache
+from app.services.plan_service import PlanService
+from app.services.similar_goals import GoalIndex, normalize_goal, undated
+
+from fakes import CountingPlanner, DatedPlanner
+
+
+def test_normalization_folds_synonyms_and_drops_durations():
+    assert normalize_goal("Launch a mobile app in 3 months") == ["launch", "mobile", "app"]
+    assert normalize_goal("ship our mobile app within 90 days") == ["launch", "mobile", "app"]
+    assert normalize_goal("Learn Python 3") == ["learn", "python", "3"]
+
+
+def test_index_matches_above_threshold_only():
+    index = GoalIndex(threshold=0.8, max_entries=2)
+    index.add("Launch a mobile app", {"tasks": [{}, {}]})
+
+    assert index.lookup("Release our mobile apps").score == 1.0
+    assert index.lookup("Launch a mobile game") is None
+    assert index.lookup("Launch a mobile app", task_count=5) is None
+
+    index.add("Plan a wedding", {"tasks": []})
+    index.add("Write a novel", {"tasks": []})
+    assert index.lookup("Launch a mobile app") is None
+    assert index.stats.evictions == 1
+
+
+def test_similar_goal_reuses_plan_rescheduled_for_new_horizon():
+    planner = CountingPlanner()
+    service = PlanService(
+        provider=planner,
+        cache=MemoryPlanCache(ttl_seconds=60, max_entries=8),
+        similar=GoalIndex(threshold=0.8),
+    )
+
+    first = asyncio.run(
+        service.generate(PlanRequest(goal="Launch a mobile app in 3 months", horizon_days=90))
+    )
+    second = asyncio.run(
+        service.generate(PlanRequest(goal="ship our mobile app within 90 days", horizon_days=6))
+    )
+
+    assert planner.calls == 1
+    assert first.metadata.similarity is None
+    assert second.metadata.similarity == 1.0
+    assert second.metadata.goal == "ship our mobile app within 90 days"
+    assert [t.id for t in second.tasks] == [t.id for t in first.tasks]
+    assert second.metadata.horizon_days == 6
+    assert second.tasks[0].start_date == date.today()
+    assert service.similarity_stats()["reused"] == 1
+
+
+def test_reused_plan_drops_old_dates_but_keeps_spans():
+    planner = DatedPlanner()
+    service = PlanService(provider=planner, similar=GoalIndex(threshold=0.8))
+
+    asyncio.run(service.generate(PlanRequest(goal="Launch a mobile app in 3 months", horizon_days=90)))
+    reused = asyncio.run(
+        service.generate(PlanRequest(goal="Launch a mobile app in 2 weeks", horizon_days=14))
+    )
+
+    assert planner.calls == 1
+    assert reused.metadata.similarity == 1.0
+    assert reused.tasks[0].start_date == date.today()
+    assert [t.duration_days for t in reused.tasks] == [3, 4]
+    assert all(t.due_date >= date.today() for t in reused.tasks)
+    assert undated({"tasks": [{"id": "T1", "due_date": "bad", "start_date": "2025-01-01"}]}) == {
+        "tasks": [{"id": "T1"}]
+    }
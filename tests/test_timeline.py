@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from datetime import date, timedelta
+
+from app.schemas import Task
+from app.utils.timeline import level_resources, schedule_tasks
+from app.utils.validation import validate_timeline
+
+START = date(2025, 1, 6)
+
+
+def make_task(task_id: str, duration: int, *deps: str, **dates) -> Task:
+    return Task(id=task_id, title=task_id, duration_days=duration, depends_on=list(deps), **dates)
+
+
+def test_independent_tasks_run_in_parallel_and_critical_path_found():
+    tasks = [
+        make_task("A", 2),
+        make_task("B", 5),
+        make_task("C", 1, "A"),
+        make_task("D", 1, "B", "C"),
+    ]
+
+    schedule = schedule_tasks(tasks, fallback_start=START, horizon_days=14)
+    by_id = {t.id: t for t in schedule.tasks}
+
+    assert by_id["A"].start_date == by_id["B"].start_date == START
+    assert by_id["D"].start_date == START + timedelta(days=6)
+    assert schedule.critical_path == ["B", "D"]
+    assert schedule.slack_days["A"] > 0 and schedule.slack_days["B"] == 0
+
+
+def test_conflicting_model_dates_are_shifted():
+    tasks = [
+        make_task("A", 1, start_date=START, due_date=START + timedelta(days=4)),
+        make_task("B", 1, "A", start_date=START + timedelta(days=1), due_date=START + timedelta(days=2)),
+    ]
+
+    schedule = schedule_tasks(tasks, fallback_start=START, horizon_days=14)
+
+    assert validate_timeline(schedule.tasks) == []
+    assert schedule.tasks[1].due_date - schedule.tasks[1].start_date == timedelta(days=1)
+
+
+def test_tasks_without_duration_share_the_longest_chain():
+    tasks = [Task(id=f"T{i}", title="t", depends_on=[f"T{i - 1}"] if i else []) for i in range(4)]
+
+    schedule = schedule_tasks(tasks, fallback_start=START, horizon_days=20)
+
+    assert schedule.tasks[0].due_date == START + timedelta(days=5)
+    assert schedule.critical_path == ["T0", "T1", "T2", "T3"]
+
+
+def test_owner_capacity_serialises_shared_role():
+    tasks = [
+        make_task("A", 2, owner="Engineer"),
+        make_task("B", 2, owner="engineer"),
+        make_task("C", 2, owner="Designer"),
+    ]
+
+    schedule = level_resources(tasks, {"Engineer": 1}, fallback_start=START, horizon_days=14)
+    by_id = {t.id: t for t in schedule.tasks}
+
+    assert by_id["A"].start_date == START
+    assert by_id["B"].start_date == START + timedelta(days=3)
+    assert by_id["C"].start_date == START
+    assert schedule.makespan_days == 5
+    assert schedule.owner_utilization == {"engineer": 1.0}
+
+
+def test_in_place_scheduling_updates_given_tasks():
+    tasks = [make_task("A", 2), make_task("B", 1, "A")]
+
+    schedule = schedule_tasks(tasks, fallback_start=START, horizon_days=14, in_place=True)
+
+    assert schedule.tasks[1] is tasks[1]
+    assert tasks[1].start_date == START + timedelta(days=3)
+    assert "start_date" in tasks[1].model_dump(exclude_unset=True)
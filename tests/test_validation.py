@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import pytest
+
+from app.schemas import Task
+from app.utils.validation import (
+    ValidationError,
+    validate_changed_dependencies,
+    validate_dependencies,
+)
+
+
+def make_task(task_id: str, *deps: str) -> Task:
+    return Task(id=task_id, title=task_id, depends_on=list(deps))
+
+
+def test_returns_topological_order():
+    tasks = [make_task("T3", "T1", "T2"), make_task("T1"), make_task("T2", "T1", "T1")]
+
+    assert validate_dependencies(tasks) == ["T1", "T2", "T3"]
+
+
+def test_reports_exact_cycle_path():
+    tasks = [make_task("A", "C"), make_task("B", "A"), make_task("C", "B"), make_task("D")]
+
+    with pytest.raises(ValidationError) as excinfo:
+        validate_dependencies(tasks)
+
+    assert excinfo.value.cycle == ["A", "B", "C", "A"]
+
+
+def test_deep_chain_does_not_recurse():
+    tasks = [make_task("T0")] + [make_task(f"T{i}", f"T{i - 1}") for i in range(1, 20_000)]
+
+    order = validate_dependencies(tasks)
+
+    assert order[0] == "T0" and order[-1] == "T19999"
+
+
+def test_unknown_dependency_rejected():
+    with pytest.raises(ValidationError):
+        validate_dependencies([make_task("T1", "missing")])
+
+
+def test_changed_tasks_checked_for_new_cycles():
+    tasks = [make_task("A", "C"), make_task("B", "A"), make_task("C", "B"), make_task("D")]
+
+    validate_changed_dependencies(tasks, {"D"})
+    with pytest.raises(ValidationError) as excinfo:
+        validate_changed_dependencies(tasks, {"C"})
+
+    assert excinfo.value.cycle == ["C", "A", "B", "C"]